@@ -4,6 +4,7 @@ from typing import Iterable, Optional, Callable
 from contracts import contract, ContractsMeta, with_metaclass
 
 from alfred import indent, format_iter
+from alfred.events import EventBus
 
 
 class ExtensionError(BaseException):
@@ -157,6 +158,8 @@ class App:
     >>> # Or use a context for this to be done automatically:
     >>> with app:
     >>>     # Make the app do something.
+
+    Extensions observe each other's changes through the app's event bus.
     """
 
     # The currently running App, or None if no App is running.
@@ -167,6 +170,7 @@ class App:
         self._service_definitions = {}
         self._services = {}
         self._service_stack = []
+        self._events = EventBus()
 
     def __enter__(self):
         self.start()
@@ -187,8 +191,14 @@ class App:
         if self.__class__.current is not self:
             raise RuntimeError(
                 'Another instance of Alfred is already running, and it cannot be stopped through this instance.')
+        self._events.shutdown()
         self.__class__.current = None
 
+    @property
+    @contract
+    def events(self) -> EventBus:
+        return self._events
+
     @contract
     def _add_service(self, service_definition: ServiceDefinition):
         self._service_definitions.setdefault(
@@ -0,0 +1,113 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable, Optional
+
+from contracts import contract
+
+
+class LruCache:
+    """
+    Caches a bounded number of values, discarding the least recently used.
+
+    Values may expire after a number of seconds, after which they are treated
+    as if they were never cached.
+    """
+
+    @contract
+    def __init__(self, maxsize: int, ttl: Optional[float] = None,
+                 clock: Callable = time.monotonic):
+        """
+
+        :param maxsize: The maximum number of cached values.
+        :param ttl: The default number of seconds values are cached for, or
+          None to cache them until they are discarded.
+        :param clock: Returns the current time in seconds.
+        """
+        assert maxsize > 0
+        assert ttl is None or ttl > 0
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._clock = clock
+        # The values and the times they expire at, if they expire.
+        self._values = OrderedDict()
+        self._lock = Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    @contract
+    def maxsize(self) -> int:
+        return self._maxsize
+
+    @property
+    @contract
+    def ttl(self) -> Optional[float]:
+        return self._ttl
+
+    @property
+    @contract
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    @contract
+    def misses(self) -> int:
+        return self._misses
+
+    def get(self, key, default=None):
+        """
+        Gets a cached value.
+        :param key: Hashable
+        :param default: The value to return if the key is not cached.
+        :return:
+        """
+        with self._lock:
+            try:
+                value, expires = self._values[key]
+            except KeyError:
+                self._misses += 1
+                return default
+            if expires is not None and expires <= self._clock():
+                del self._values[key]
+                self._misses += 1
+                return default
+            self._values.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def set(self, key, value, ttl: Optional[float] = None):
+        """
+        Caches a value.
+        :param key: Hashable
+        :param value:
+        :param ttl: The number of seconds to cache the value for, if it must
+          expire sooner than self.ttl.
+        """
+        if ttl is None:
+            ttl = self._ttl
+        expires = None if ttl is None else self._clock() + ttl
+        with self._lock:
+            self._values[key] = value, expires
+            self._values.move_to_end(key)
+            if len(self._values) > self._maxsize:
+                self._values.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._values.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def __contains__(self, key):
+        with self._lock:
+            try:
+                _, expires = self._values[key]
+            except KeyError:
+                return False
+            return expires is None or expires > self._clock()
+
+    def __len__(self):
+        return len(self._values)
@@ -0,0 +1,254 @@
+import logging
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count
+from threading import Lock
+from typing import Callable, Hashable, List, Optional
+
+from contracts import contract
+
+
+class Event:
+    """
+    Describes that something happened.
+
+    Subclasses are event types. Subscribers receive the events of the type they
+    subscribed to, and of its subtypes.
+    """
+
+    @property
+    def coalescing_key(self) -> Optional[Hashable]:
+        """
+        Gets the key to coalesce pending events by.
+
+        If an asynchronous subscriber has not yet received an event of the same
+        type with an equal key, that event is replaced by this one. Events with
+        None as their key are never coalesced.
+        """
+        return None
+
+
+class SubscriberStats:
+    """
+    Counts the events dispatched to a subscriber, and how long that took.
+
+    Latencies are the number of seconds between publishing an event, and the
+    subscriber having handled it, including the time spent queued.
+    """
+
+    def __init__(self):
+        self.dispatched = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.failed = 0
+        self.total_latency = 0.0
+        self.maximum_latency = 0.0
+
+    def _record(self, latency: float):
+        self.dispatched += 1
+        self.total_latency += latency
+        self.maximum_latency = max(self.maximum_latency, latency)
+
+    @property
+    @contract
+    def mean_latency(self) -> float:
+        if not self.dispatched:
+            return 0.0
+        return self.total_latency / self.dispatched
+
+
+class Subscription:
+    """
+    Delivers events to a single listener.
+
+    Synchronous subscriptions call their listener from the thread that
+    publishes each event, before EventBus.publish() returns. Asynchronous
+    subscriptions queue events and call their listener from the bus's thread
+    pool, one event at a time and in the order they were published. If the
+    queue is full, the oldest pending event is dropped.
+    """
+
+    def __init__(self, bus: 'EventBus', event_type: type, listener: Callable,
+                 asynchronous: bool, queue_size: int):
+        assert queue_size > 0
+        self._bus = bus
+        self._event_type = event_type
+        self._listener = listener
+        self._asynchronous = asynchronous
+        self._queue_size = queue_size
+        # The pending events and the times they were published, keyed by
+        # their coalescing keys.
+        self._queue = OrderedDict()
+        self._sequence = count()
+        self._draining = False
+        self._lock = Lock()
+        self._stats = SubscriberStats()
+
+    @property
+    def event_type(self) -> type:
+        return self._event_type
+
+    @property
+    def listener(self) -> Callable:
+        return self._listener
+
+    @property
+    @contract
+    def asynchronous(self) -> bool:
+        return self._asynchronous
+
+    @property
+    @contract
+    def stats(self) -> SubscriberStats:
+        return self._stats
+
+    @property
+    @contract
+    def pending(self) -> int:
+        """
+        Gets the number of events that are queued for the listener.
+        """
+        return len(self._queue)
+
+    def cancel(self):
+        self._bus.unsubscribe(self)
+
+    def _deliver(self, event: Event, published: float):
+        if not self._asynchronous:
+            self._listener(event)
+            with self._lock:
+                self._stats._record(time.perf_counter() - published)
+            return
+        coalescing_key = event.coalescing_key
+        if coalescing_key is None:
+            key = next(self._sequence)
+        else:
+            key = type(event), coalescing_key
+        with self._lock:
+            if key in self._queue:
+                # Keep the original publication time, so latencies include the
+                # time the subscriber has been waiting for this change.
+                _, published = self._queue[key]
+                self._stats.coalesced += 1
+            elif len(self._queue) >= self._queue_size:
+                self._queue.popitem(last=False)
+                self._stats.dropped += 1
+            self._queue[key] = event, published
+            if self._draining:
+                return
+            self._draining = True
+        self._bus._submit(self._drain)
+
+    def _drain(self):
+        while True:
+            with self._lock:
+                if not self._queue:
+                    self._draining = False
+                    return
+                _, (event, published) = self._queue.popitem(last=False)
+            try:
+                self._listener(event)
+            except Exception:
+                with self._lock:
+                    self._stats.failed += 1
+                logging.getLogger(__name__).exception(
+                    'Could not dispatch %s to %s.', event, self._listener)
+                continue
+            with self._lock:
+                self._stats._record(time.perf_counter() - published)
+
+
+class EventBus:
+    """
+    Dispatches events to the subscribers of their types.
+
+    Exceptions raised by synchronous listeners propagate to the code that
+    published the event. Exceptions raised by asynchronous listeners are
+    logged and counted in the subscriber's statistics.
+    """
+
+    QUEUE_SIZE = 1000
+    MAXIMUM_WORKERS = 4
+
+    @contract
+    def __init__(self, maximum_workers: Optional[int] = None):
+        self._maximum_workers = maximum_workers if maximum_workers is not None else self.MAXIMUM_WORKERS
+        self._subscriptions = []
+        # The subscriptions per event type, which are looked up on first use.
+        self._dispatch = {}
+        self._executor = None
+        self._lock = Lock()
+
+    @property
+    @contract
+    def subscriptions(self) -> List:
+        """
+        Gets all subscriptions.
+        :return: List[Subscription]
+        """
+        return list(self._subscriptions)
+
+    @contract
+    def subscribe(self, event_type: type, listener: Callable,
+                  asynchronous: bool = False,
+                  queue_size: Optional[int] = None) -> Subscription:
+        """
+        Subscribes a listener to events.
+        :param event_type: The type of the events to receive.
+        :param listener: The function to call with each event.
+        :param asynchronous: Whether to call the listener from the thread pool,
+          rather than from the publishing thread.
+        :param queue_size: The maximum number of pending events, if the
+          subscription is asynchronous.
+        """
+        assert issubclass(event_type, Event)
+        subscription = Subscription(
+            self, event_type, listener, asynchronous,
+            queue_size if queue_size is not None else self.QUEUE_SIZE)
+        with self._lock:
+            self._subscriptions.append(subscription)
+            self._dispatch = {}
+        return subscription
+
+    @contract
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+            self._dispatch = {}
+
+    @contract
+    def publish(self, event: Event):
+        published = time.perf_counter()
+        event_type = type(event)
+        dispatch = self._dispatch
+        try:
+            subscriptions = dispatch[event_type]
+        except KeyError:
+            with self._lock:
+                subscriptions = tuple(
+                    subscription for subscription in self._subscriptions if
+                    issubclass(event_type, subscription.event_type))
+                self._dispatch[event_type] = subscriptions
+        for subscription in subscriptions:
+            subscription._deliver(event, published)
+
+    def _submit(self, task: Callable):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self._maximum_workers)
+            executor = self._executor
+        executor.submit(task)
+
+    @contract
+    def shutdown(self, wait: bool = True):
+        """
+        Stops the thread pool.
+        :param wait: Whether to wait for pending events to be dispatched.
+        """
+        with self._lock:
+            executor = self._executor
+            self._executor = None
+        if executor is not None:
+            executor.shutdown(wait)
@@ -1,5 +1,8 @@
+import os
+import tempfile
 from functools import wraps
 from unittest import TestCase
+from unittest.mock import patch
 
 from alfred.app import App
 
@@ -63,6 +66,15 @@ def expand_data(values):
 
 class AppTestCase(TestCase):
     def setUp(self):
+        # Give each test its own caches, so they never depend on or leak into
+        # other test runs.
+        cache_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_directory.cleanup)
+        environment = patch.dict(os.environ, {
+            'ALFRED_CACHE_DIRECTORY': cache_directory.name,
+        })
+        environment.start()
+        self.addCleanup(environment.stop)
         self.addCleanup(self._stopApp)
         self._app = App()
         for extension in self.get_extension_classes():
@@ -0,0 +1,58 @@
+from unittest import TestCase
+
+from alfred.cache import LruCache
+
+
+class LruCacheTest(TestCase):
+    def testGet(self):
+        sut = LruCache(2)
+        sut.set('foo', 'Foo')
+        self.assertEqual(sut.get('foo'), 'Foo')
+        self.assertEqual(sut.hits, 1)
+        self.assertEqual(sut.misses, 0)
+
+    def testGetWithUnknownKey(self):
+        sut = LruCache(2)
+        self.assertIsNone(sut.get('foo'))
+        self.assertEqual(sut.get('foo', 'Foo'), 'Foo')
+        self.assertEqual(sut.hits, 0)
+        self.assertEqual(sut.misses, 2)
+
+    def testSetShouldDiscardLeastRecentlyUsedValue(self):
+        sut = LruCache(2)
+        sut.set('foo', 'Foo')
+        sut.set('bar', 'Bar')
+        sut.get('foo')
+        sut.set('baz', 'Baz')
+        self.assertEqual(len(sut), 2)
+        self.assertIn('foo', sut)
+        self.assertNotIn('bar', sut)
+        self.assertIn('baz', sut)
+
+    def testDelete(self):
+        sut = LruCache(2)
+        sut.set('foo', 'Foo')
+        sut.delete('foo')
+        sut.delete('bar')
+        self.assertNotIn('foo', sut)
+
+    def testClear(self):
+        sut = LruCache(2)
+        sut.set('foo', 'Foo')
+        sut.clear()
+        self.assertEqual(len(sut), 0)
+
+    def testGetShouldExpireValues(self):
+        now = [0.0]
+        sut = LruCache(2, 10.0, lambda: now[0])
+        sut.set('foo', 'Foo')
+        sut.set('bar', 'Bar', 1.0)
+        now[0] = 5.0
+        self.assertEqual(sut.get('foo'), 'Foo')
+        self.assertNotIn('bar', sut)
+        self.assertIsNone(sut.get('bar'))
+        now[0] = 10.0
+        self.assertIsNone(sut.get('foo'))
+        self.assertEqual(len(sut), 0)
+        self.assertEqual(sut.hits, 1)
+        self.assertEqual(sut.misses, 2)
@@ -0,0 +1,109 @@
+from threading import Event as ThreadingEvent
+from unittest import TestCase
+
+from alfred.app import App
+from alfred.events import Event, EventBus
+
+
+class FruitEvent(Event):
+    def __init__(self, name: str):
+        self.name = name
+
+    @property
+    def coalescing_key(self):
+        return self.name
+
+
+class RipeFruitEvent(FruitEvent):
+    pass
+
+
+class OtherEvent(Event):
+    pass
+
+
+class EventBusTest(TestCase):
+    def setUp(self):
+        self._sut = EventBus()
+
+    def tearDown(self):
+        self._sut.shutdown()
+
+    def testPublishShouldDispatchSynchronously(self):
+        fruit_events = []
+        self._sut.subscribe(FruitEvent, fruit_events.append)
+        ripe_fruit_events = []
+        self._sut.subscribe(RipeFruitEvent, ripe_fruit_events.append)
+        apple = FruitEvent('apple')
+        banana = RipeFruitEvent('banana')
+        self._sut.publish(apple)
+        self._sut.publish(banana)
+        self._sut.publish(OtherEvent())
+        self.assertEqual(fruit_events, [apple, banana])
+        self.assertEqual(ripe_fruit_events, [banana])
+
+    def testPublishShouldRaiseSynchronousListenerErrors(self):
+        def _listener(event):
+            raise ValueError()
+        self._sut.subscribe(OtherEvent, _listener)
+        with self.assertRaises(ValueError):
+            self._sut.publish(OtherEvent())
+
+    def testUnsubscribe(self):
+        events = []
+        subscription = self._sut.subscribe(OtherEvent, events.append)
+        self.assertEqual(self._sut.subscriptions, [subscription])
+        subscription.cancel()
+        self._sut.publish(OtherEvent())
+        self.assertEqual(events, [])
+        self.assertEqual(self._sut.subscriptions, [])
+
+    def testPublishShouldDispatchAsynchronously(self):
+        started = ThreadingEvent()
+        blocked = ThreadingEvent()
+        events = []
+
+        def _listener(event):
+            started.set()
+            blocked.wait(5)
+            events.append(event)
+        subscription = self._sut.subscribe(FruitEvent, _listener, True, 2)
+        apple = FruitEvent('apple')
+        self._sut.publish(apple)
+        started.wait(5)
+        # While the listener handles the apple, the bananas are coalesced, and
+        # then dropped once the queue is full.
+        self._sut.publish(FruitEvent('banana'))
+        self._sut.publish(FruitEvent('banana'))
+        cherry = FruitEvent('cherry')
+        self._sut.publish(cherry)
+        durian = FruitEvent('durian')
+        self._sut.publish(durian)
+        blocked.set()
+        self._sut.shutdown()
+        self.assertEqual(events, [apple, cherry, durian])
+        stats = subscription.stats
+        self.assertEqual(stats.dispatched, 3)
+        self.assertEqual(stats.coalesced, 1)
+        self.assertEqual(stats.dropped, 1)
+        self.assertGreater(stats.mean_latency, 0.0)
+        self.assertGreaterEqual(stats.maximum_latency, stats.mean_latency)
+        self.assertEqual(subscription.pending, 0)
+
+    def testPublishShouldCountAsynchronousListenerErrors(self):
+        def _listener(event):
+            raise ValueError()
+        subscription = self._sut.subscribe(OtherEvent, _listener, True)
+        self._sut.publish(OtherEvent())
+        self._sut.shutdown()
+        self.assertEqual(subscription.stats.failed, 1)
+        self.assertEqual(subscription.stats.dispatched, 0)
+
+
+class AppEventsTest(TestCase):
+    def testEvents(self):
+        with App() as sut:
+            events = []
+            sut.events.subscribe(OtherEvent, events.append)
+            sut.events.publish(OtherEvent())
+            self.assertEqual(len(events), 1)
@@ -1,11 +1,39 @@
-from typing import Optional, Iterable, Dict
+import heapq
+from bisect import bisect_right, insort
+from itertools import islice
+from operator import attrgetter
+from typing import Optional, Iterable, Dict, Callable
 
 from contracts import with_metaclass, ContractsMeta, contract
 
 from alfred import format_iter
 
 
-class Device(with_metaclass(ContractsMeta)):
+class Observable:
+    """
+    Notifies listeners of changes to an object's state.
+
+    Setters of observable state MUST call self._changed() after changing it.
+    """
+
+    @contract
+    def add_change_listener(self, listener: Callable):
+        """
+        Adds a listener, which is called with this object after it changed.
+        """
+        self.__dict__.setdefault('_change_listeners', []).append(listener)
+
+    @contract
+    def remove_change_listener(self, listener: Callable):
+        self.__dict__.get('_change_listeners', []).remove(listener)
+
+    def _changed(self):
+        # Copy the listeners, so they can remove themselves.
+        for listener in tuple(self.__dict__.get('_change_listeners', ())):
+            listener(self)
+
+
+class Device(with_metaclass(ContractsMeta, Observable)):
     @contract
     def __init__(self, device_id: str, device_type: str, label=None):
         self._id = device_id
@@ -28,10 +56,12 @@ class Device(with_metaclass(ContractsMeta)):
     @contract
     def label(self, label: str):
         self._label = label
+        self._changed()
 
     @label.deleter
     def label(self):
         self._label = None
+        self._changed()
 
 
 class DeviceNotFound(RuntimeError):
@@ -55,15 +85,48 @@ class DeviceRepository(with_metaclass(ContractsMeta)):
     def get_devices(self) -> Iterable:
         pass
 
+    @contract
+    def get_devices_after(self, after: Optional[str], limit: int) -> Iterable:
+        """
+        Gets devices ordered by their IDs.
+        :param after: If given, only get devices with IDs greater than this.
+        :param limit: The maximum number of devices to get.
+        :return: Iterable[Device]
+        """
+        return heapq.nsmallest(
+            limit,
+            filter(lambda device: after is None or device.id > after,
+                   self.get_devices()),
+            key=attrgetter('id'))
+
+    @contract
+    def get_devices_by_ids(self, device_ids: Iterable) -> Iterable:
+        """
+        Gets devices by their IDs.
+        :param device_ids: Iterable[str]
+        :return: Iterable[Device]. The devices, in the order of their IDs.
+          Unknown IDs are skipped.
+        """
+        devices = []
+        for device_id in device_ids:
+            try:
+                devices.append(self.get_device(device_id))
+            except DeviceNotFound:
+                continue
+        return devices
+
 
 class StaticDeviceRepository(DeviceRepository):
     def __init__(self):
         self._devices = {}
+        # The device IDs, sorted.
+        self._ids = []
 
     @contract
     def add_device(self, device: Device):
         assert device.id not in self._devices
         self._devices[device.id] = device
+        insort(self._ids, device.id)
 
     def get_device(self, device_id: str) -> Device:
         try:
@@ -74,11 +137,21 @@ class StaticDeviceRepository(DeviceRepository):
     def get_devices(self) -> Iterable:
         return list(self._devices.values())
 
+    def get_devices_by_ids(self, device_ids: Iterable) -> Iterable:
+        return [self._devices[device_id] for device_id in device_ids if
+                device_id in self._devices]
+
+    def get_devices_after(self, after: Optional[str], limit: int) -> Iterable:
+        start = 0 if after is None else bisect_right(self._ids, after)
+        return [self._devices[device_id] for device_id in
+                self._ids[start:start + limit]]
+
 
 class NestedDeviceRepository(DeviceRepository):
     def __init__(self):
         super().__init__()
         self._devices = None
+        self._devices_by_id = None
         self._device_repositories = []
 
     @contract
@@ -91,24 +164,38 @@ class NestedDeviceRepository(DeviceRepository):
         if self._devices is None:
             self._aggregate_devices()
 
-        for device in self._devices:
-            if device_id == device.id:
-                return device
-        raise DeviceNotFound(device_id, self._devices)
+        try:
+            return self._devices_by_id[device_id]
+        except KeyError:
+            raise DeviceNotFound(device_id, self._devices_by_id)
 
     def get_devices(self):
         if self._devices is None:
             self._aggregate_devices()
         return self._devices
 
+    def get_devices_by_ids(self, device_ids: Iterable):
+        if self._devices is None:
+            self._aggregate_devices()
+        return [self._devices_by_id[device_id] for device_id in device_ids
+                if device_id in self._devices_by_id]
+
+    def get_devices_after(self, after: Optional[str], limit: int):
+        return list(islice(heapq.merge(
+            *[repository.get_devices_after(after, limit)
+              for repository in self._device_repositories],
+            key=attrgetter('id')), limit))
+
     def _aggregate_devices(self):
         self._devices = []
+        self._devices_by_id = {}
         for repository in self._device_repositories:
             for device in repository.get_devices():
                 self._devices.append(device)
+                self._devices_by_id[device.id] = device
 
 
-class Powerable:
+class Powerable(Observable):
     def __init__(self):
         self._powered = False
 
@@ -120,9 +207,10 @@ class Powerable:
     @contract
     def powered(self, powered: bool):
         self._powered = powered
+        self._changed()
 
 
-class Illuminative:
+class Illuminative(Observable):
     def __init__(self):
         self._luminosity = 0.0
 
@@ -134,6 +222,7 @@ class Illuminative:
     @luminosity.setter
     def luminosity(self, luminosity: float):
         self._luminosity = luminosity
+        self._changed()
 
 
 class Rgb24Color:
@@ -159,7 +248,7 @@ class Rgb24Color:
         return self._green
 
 
-class Rgb24Colorable:
+class Rgb24Colorable(Observable):
     def __init__(self):
         self._color = Rgb24Color(0, 0, 0)
 
@@ -172,3 +261,4 @@ class Rgb24Colorable:
     @contract
     def color(self, color: Rgb24Color):
         self._color = color
+        self._changed()
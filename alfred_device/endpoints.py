@@ -0,0 +1,138 @@
+from typing import Optional, Iterator
+
+from contracts import contract
+
+from alfred.app import App
+from alfred_device.events import DeviceEventStream
+from alfred_http.endpoints import Endpoint, RequestType, Request, \
+    SuccessResponse, ResponseType, ResponsePayloadType, PayloadedMessage
+from alfred_http.http import HttpRequest, HttpBody
+from alfred_rest.changes import format_sync_token, parse_sync_token
+
+
+class DeviceEventsRequestType(RequestType):
+    """
+    Requests a stream of the changes to devices.
+
+    Clients resume streams through the Last-Event-ID request header, which
+    EventSource clients send automatically when they reconnect.
+    """
+
+    def __init__(self):
+        super().__init__('device-events', 'GET')
+
+    def from_http_request(self, http_request: HttpRequest):
+        return DeviceEventsRequest(self._get_last_event_id(http_request))
+
+    @staticmethod
+    def _get_last_event_id(http_request: HttpRequest) -> Optional[str]:
+        for name, value in http_request.headers.items():
+            if 'last-event-id' == name.lower():
+                try:
+                    parse_sync_token(value)
+                except ValueError:
+                    # Clients with unknown event IDs start afresh.
+                    return None
+                return value
+        return None
+
+
+class DeviceEventsRequest(Request):
+    @contract
+    def __init__(self, last_event_id: Optional[str] = None):
+        self._last_event_id = last_event_id
+
+    @property
+    @contract
+    def last_event_id(self) -> Optional[str]:
+        return self._last_event_id
+
+
+class DeviceEventsResponse(SuccessResponse, PayloadedMessage):
+    @contract
+    def __init__(self, stream: DeviceEventStream):
+        super().__init__()
+        self._stream = stream
+
+    @property
+    def payload(self):
+        return self._stream
+
+    @property
+    def http_response_headers(self):
+        return {
+            'Cache-Control': 'no-cache',
+            # Prevent reverse proxies from buffering events.
+            'X-Accel-Buffering': 'no',
+        }
+
+
+class EventStreamResponsePayloadType(ResponsePayloadType):
+    """
+    Streams device events as server-sent events.
+
+    Each changed device is sent as a "device" event with the device's current
+    state. "reset" events tell clients to reload all devices, because changes
+    were dropped. Comments are sent periodically while there are no events,
+    so that closed connections are noticed.
+
+    Streams start by telling clients how many milliseconds to wait before
+    reconnecting, which also sends the response headers right away.
+    """
+
+    CONTENT_TYPE = 'text/event-stream'
+    RETRY_INTERVAL = 1000
+    HEARTBEAT_INTERVAL = 15.0
+    COALESCE_INTERVAL = 0.05
+
+    def get_content_types(self):
+        return [self.CONTENT_TYPE]
+
+    def to_http_response_body(self, payload, content_type):
+        assert isinstance(payload, DeviceEventStream)
+        return HttpBody(self._iterencode(payload), content_type)
+
+    def _iterencode(self, stream: DeviceEventStream) -> Iterator:
+        codec = App.current.service('json', 'codec')
+        serializer = App.current.service('json', 'serializers').get_serializer(
+            App.current.service('device', 'device_resources').get_type())
+        try:
+            yield b'retry: %d\n\n' % self.RETRY_INTERVAL
+            while True:
+                events = stream.get(self.HEARTBEAT_INTERVAL,
+                                    self.COALESCE_INTERVAL)
+                if not events:
+                    yield b': heartbeat\n\n'
+                    continue
+                for event in events:
+                    event_id = format_sync_token(
+                        stream.epoch, event.event_id).encode('utf-8')
+                    if event.reset:
+                        yield b'id: %s\nevent: reset\ndata: {}\n\n' % event_id
+                    else:
+                        yield b'id: %s\nevent: device\ndata: %s\n\n' % (
+                            event_id, codec.encode(serializer(event.device)))
+        finally:
+            stream.close()
+
+
+class DeviceEventsResponseType(ResponseType):
+    def __init__(self):
+        super().__init__('device-events', (EventStreamResponsePayloadType(),))
+
+
+class DeviceEventsEndpoint(Endpoint):
+    """
+    Streams the changes to devices to clients, as server-sent events.
+    """
+
+    def __init__(self):
+        super().__init__('device-events', '/devices/events',
+                         DeviceEventsRequestType(),
+                         DeviceEventsResponseType())
+        self._events = App.current.service('device', 'events')
+
+    def handle(self, request):
+        assert isinstance(request, DeviceEventsRequest)
+        return DeviceEventsResponse(
+            self._events.subscribe(request.last_event_id))
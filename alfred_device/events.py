@@ -0,0 +1,253 @@
+import time
+from operator import attrgetter
+from threading import Condition, Lock
+from typing import Optional, List, Callable
+
+from contracts import contract
+
+from alfred.events import Event, EventBus
+from alfred_device.device import DeviceRepository, Device
+from alfred_rest.changes import ChangeLog, ChangesExpired
+
+
+class DeviceChanged(Event):
+    """
+    Published on the app's event bus when a device changed.
+
+    Pending changes to the same device are coalesced.
+    """
+
+    @contract
+    def __init__(self, device: Device):
+        self._device = device
+
+    @property
+    @contract
+    def device(self) -> Device:
+        return self._device
+
+    @property
+    def coalescing_key(self):
+        return self._device.id
+
+
+@contract
+def publish_device_changes(devices: DeviceRepository, events: EventBus):
+    """
+    Publishes the changes to devices as DeviceChanged events.
+    """
+    def _publish(device: Device):
+        events.publish(DeviceChanged(device))
+
+    for device in devices.get_devices():
+        device.add_change_listener(_publish)
+
+
+class DeviceEvent:
+    """
+    Describes that a device changed, or that all devices must be reloaded.
+    """
+
+    @contract
+    def __init__(self, event_id: int, device: Optional[Device] = None):
+        """
+
+        :param event_id: The sequence number of the change.
+        :param device: The device that changed, or None if clients must reload
+          all devices, because changes were dropped.
+        """
+        self._event_id = event_id
+        self._device = device
+
+    @property
+    @contract
+    def event_id(self) -> int:
+        return self._event_id
+
+    @property
+    @contract
+    def device(self) -> Optional[Device]:
+        return self._device
+
+    @property
+    @contract
+    def reset(self) -> bool:
+        return self._device is None
+
+
+class DeviceEventStream:
+    """
+    Queues the changes to devices for a single client.
+
+    Changes are coalesced per device, so clients only receive the latest state
+    of each device that changed since they last read the stream. If more
+    devices changed than the queue holds, the pending changes are dropped and
+    the client is told to reload all devices instead.
+    """
+
+    @contract
+    def __init__(self, maximum_size: int, close: Callable, epoch: str):
+        """
+
+        :param maximum_size: The maximum number of devices with pending
+          changes.
+        :param close: The function to call when the client closes the stream.
+        :param epoch: The epoch of the ChangeLog the event IDs are sequence
+          numbers of.
+        """
+        assert maximum_size > 0
+        self._maximum_size = maximum_size
+        self._close = close
+        self._epoch = epoch
+        # The pending changes per device ID.
+        self._pending = {}
+        # The sequence number of the latest dropped change, if changes were
+        # dropped since the stream was last read.
+        self._reset_event_id = None
+        self._condition = Condition()
+
+    @property
+    @contract
+    def epoch(self) -> str:
+        return self._epoch
+
+    @contract
+    def put(self, event_id: int, device: Device):
+        with self._condition:
+            if self._reset_event_id is not None:
+                self._reset_event_id = event_id
+            elif device.id in self._pending or \
+                    len(self._pending) < self._maximum_size:
+                self._pending[device.id] = DeviceEvent(event_id, device)
+            else:
+                self._pending.clear()
+                self._reset_event_id = event_id
+            self._condition.notify()
+
+    @contract
+    def reset(self, event_id: int):
+        """
+        Tells the client to reload all devices.
+        """
+        with self._condition:
+            self._pending.clear()
+            self._reset_event_id = event_id
+            self._condition.notify()
+
+    @contract
+    def get(self, timeout: float, coalesce_interval: float = 0.0) -> List:
+        """
+        Gets the pending events, waiting for them if there are none yet.
+        :param timeout: The number of seconds to wait for events.
+        :param coalesce_interval: The number of seconds to wait for further
+          changes to the same devices, once there are events.
+        :return: List[DeviceEvent]. The events, or an empty list if none
+          occurred before the timeout.
+        """
+        with self._condition:
+            if not self._has_events():
+                self._condition.wait(timeout)
+            if not self._has_events():
+                return []
+        if coalesce_interval:
+            time.sleep(coalesce_interval)
+        with self._condition:
+            if self._reset_event_id is not None:
+                events = [DeviceEvent(self._reset_event_id)]
+            else:
+                # Send the events in the order of their sequence numbers, so
+                # clients can resume from the last one they received.
+                events = sorted(self._pending.values(),
+                                key=attrgetter('event_id'))
+            self._pending.clear()
+            self._reset_event_id = None
+        return events
+
+    def _has_events(self) -> bool:
+        return bool(self._pending) or self._reset_event_id is not None
+
+    def close(self):
+        self._close(self)
+
+
+class DeviceEvents:
+    """
+    Publishes the changes to devices to the streams of all clients.
+
+    Changes are received as DeviceChanged events. The latest changes are kept
+    in a ChangeLog, so clients can resume their streams from the sync token
+    of the last event they received. See
+    alfred_rest.changes.format_sync_token().
+    """
+
+    HISTORY_SIZE = 1000
+    STREAM_SIZE = 100
+
+    @contract
+    def __init__(self, devices: DeviceRepository, events: EventBus,
+                 history_size: Optional[int] = None,
+                 stream_size: Optional[int] = None):
+        self._devices = devices
+        self._events = events
+        self._changes = ChangeLog(history_size if history_size is not None else self.HISTORY_SIZE)
+        self._stream_size = stream_size if stream_size is not None else self.STREAM_SIZE
+        self._streams = set()
+        self._subscription = None
+        self._lock = Lock()
+
+    def _listen(self):
+        # Listen lazily, so that changes are only recorded once there are
+        # clients.
+        if self._subscription is None:
+            self._subscription = self._events.subscribe(
+                DeviceChanged, lambda event: self.publish(event.device))
+
+    @contract
+    def publish(self, device: Device):
+        """
+        Publishes that a device changed.
+        """
+        # Queue the change while holding the lock, so that streams receive
+        # changes in the order of their sequence numbers.
+        with self._lock:
+            self._changes.record((device.id,))
+            event_id = self._changes.sequence
+            for stream in self._streams:
+                stream.put(event_id, device)
+
+    @contract
+    def subscribe(self,
+                  last_event_id: Optional[str] = None) -> DeviceEventStream:
+        """
+        Opens a stream of the changes to devices.
+        :param last_event_id: The sync token of the last event the client
+          received, to resume the stream from.
+        """
+        stream = DeviceEventStream(self._stream_size, self._unsubscribe,
+                                   self._changes.epoch)
+        with self._lock:
+            self._listen()
+            if last_event_id is not None:
+                self._resume(stream, last_event_id)
+            self._streams.add(stream)
+        return stream
+
+    def _resume(self, stream: DeviceEventStream, last_event_id: str):
+        try:
+            changes = self._changes.get_changes(last_event_id,
+                                                self._get_devices)
+        except (ValueError, ChangesExpired):
+            stream.reset(self._changes.sequence)
+            return
+        for change in changes:
+            if not change.deleted:
+                stream.put(change.sequence, change.resource)
+
+    def _get_devices(self, device_ids: Optional[List]):
+        if device_ids is None:
+            return self._devices.get_devices()
+        return self._devices.get_devices_by_ids(device_ids)
+
+    def _unsubscribe(self, stream: DeviceEventStream):
+        with self._lock:
+            self._streams.discard(stream)
@@ -1,6 +1,11 @@
 from alfred.app import Extension, App
 from alfred_device.device import NestedDeviceRepository
+from alfred_device.endpoints import DeviceEventsEndpoint
+from alfred_device.events import DeviceEvents, publish_device_changes, \
+    DeviceChanged
 from alfred_device.resource import NestedDeviceResourceRepository
+from alfred_http.endpoints import EndpointFactoryRepository
+from alfred_rest.changes import ResourcesChanged
 from alfred_rest.extension import RestExtension
 
 
@@ -18,11 +23,31 @@ class DeviceExtension(Extension):
         devices = NestedDeviceRepository()
         for tagged_device in App.current.services(tag='devices'):
             devices.add_devices(tagged_device)
+        publish_device_changes(devices, App.current.events)
         return devices
 
-    @Extension.service(tags=('resources',))
+    @Extension.service(tags=('resources', 'published_resources'))
     def _device_resources(self):
         resources = NestedDeviceResourceRepository()
         for tagged_resources in App.current.services(tag='device_resources'):
             resources.add_resources(tagged_resources)
+        # Devices may also change without going through their resources.
+        App.current.service('device', 'devices')
+
+        def _device_changed(event: DeviceChanged):
+            resources.devices_changed((event.device,))
+            App.current.events.publish(ResourcesChanged(
+                resources.get_type().name, (event.device.id,)))
+        App.current.events.subscribe(DeviceChanged, _device_changed)
         return resources
+
+    @Extension.service()
+    def _events(self):
+        return DeviceEvents(App.current.service('device', 'devices'),
+                            App.current.events)
+
+    @Extension.service(tags=('http_endpoints',))
+    def _endpoints(self):
+        return EndpointFactoryRepository([
+            DeviceEventsEndpoint,
+        ])
@@ -1,4 +1,7 @@
-from typing import List, Iterable
+import heapq
+from itertools import islice
+from operator import attrgetter, itemgetter
+from typing import List, Iterable, Optional
 
 from contracts import contract
 
@@ -6,9 +9,13 @@ from alfred_device.device import DeviceRepository, DeviceNotFound, Powerable, \
     Rgb24Colorable, Rgb24Color, Device, Illuminative
 from alfred_http.endpoints import BadRequestError
 from alfred_json.type import OutputDataType, InputDataType, \
-    UpdateInputDataType
+    UpdateInputDataType, Property
+from alfred_rest.changes import ChangeLog
+from alfred_rest.filter import filter_resources
+from alfred_rest.index import ResourceIndexes, QueryPlan
 from alfred_rest.resource import ResourceNotFound, \
-    UpdateableResourceRepository, ResourceType, AnyResourceType
+    UpdateableResourceRepository, ResourceType, AnyResourceType, paginate, \
+    Page, unique_ids, SyncableResourceRepository
 
 
 class DeviceType(ResourceType):
@@ -37,6 +44,16 @@ class DeviceType(ResourceType):
         instance.label = json_data['label']
         return instance
 
+    def update_properties_from_json(self, json_data, instance, names):
+        assert isinstance(instance, Device)
+        if 'id' in names and instance.id != json_data.get('id'):
+            raise BadRequestError()
+        if 'type' in names and instance.type != json_data.get('type'):
+            raise BadRequestError()
+        if 'label' in names:
+            instance.label = json_data['label']
+        return instance
+
     def to_json(self, data):
         assert isinstance(data, Device)
         try:
@@ -48,6 +65,13 @@ class DeviceType(ResourceType):
         except AttributeError:
             raise ValueError('Resources must have "id" and "type" properties.')
 
+    def get_properties(self):
+        return [
+            Property('id'),
+            Property('type'),
+            Property('label'),
+        ]
+
 
 class PowerableType(UpdateInputDataType, OutputDataType):
     def get_json_schema(self):
@@ -67,6 +91,11 @@ class PowerableType(UpdateInputDataType, OutputDataType):
         instance.powered = json_data['powered']
         return instance
 
+    def update_properties_from_json(self, json_data, instance, names):
+        if 'powered' in names:
+            return PowerableType.update_from_json(self, json_data, instance)
+        return instance
+
     def to_json(self, data):
         if isinstance(data, Powerable):
             return {
@@ -74,6 +103,11 @@ class PowerableType(UpdateInputDataType, OutputDataType):
             }
         return {}
 
+    def get_properties(self):
+        return [
+            Property('powered'),
+        ]
+
 
 class IlluminativeType(UpdateInputDataType, OutputDataType):
     def get_json_schema(self):
@@ -93,12 +127,22 @@ class IlluminativeType(UpdateInputDataType, OutputDataType):
         instance.luminosity = float(json_data['luminosity'])
         return instance
 
+    def update_properties_from_json(self, json_data, instance, names):
+        if 'luminosity' in names:
+            return IlluminativeType.update_from_json(self, json_data, instance)
+        return instance
+
     def to_json(self, data):
         assert isinstance(data, Illuminative)
         return {
             'luminosity': data.luminosity,
         }
 
+    def get_properties(self):
+        return [
+            Property('luminosity'),
+        ]
+
 
 class Rgb24TupleColorType(InputDataType, OutputDataType):
     def get_json_schema(self):
@@ -165,18 +209,48 @@ class Rgb24ColorableType(UpdateInputDataType, OutputDataType):
         instance.color = self._color_type.from_json(json_data['color'])
         return instance
 
+    def update_properties_from_json(self, json_data, instance, names):
+        if 'color' in names:
+            return Rgb24ColorableType.update_from_json(self, json_data, instance)
+        return instance
+
     def to_json(self, data):
         assert isinstance(data, Rgb24Colorable)
         return {
             'color': self._color_type.to_json(data.color),
         }
 
+    def get_properties(self):
+        return [
+            Property('color', self._color_type),
+        ]
 
-class DeviceResourceRepository(UpdateableResourceRepository):
+
+class DeviceResourceRepository(UpdateableResourceRepository,
+                               SyncableResourceRepository):
     @contract
-    def __init__(self, device_type: DeviceType, devices: DeviceRepository):
+    def __init__(self, device_type: DeviceType, devices: DeviceRepository,
+                 indexes: Iterable = ()):
+        """
+
+        :param device_type:
+        :param devices:
+        :param indexes: Iterable[alfred_rest.index.Index]. The indexes to
+          select devices by filters with.
+        """
         self._devices = devices
         self._type = device_type
+        self._indexes = ResourceIndexes(device_type, indexes)
+        self._indexed = False
+        self._changes = ChangeLog()
+
+    def _get_indexes(self) -> ResourceIndexes:
+        # Index the devices lazily, because they may still be added to their
+        # repository after this one was created.
+        if not self._indexed:
+            self._indexes.add(self._devices.get_devices())
+            self._indexed = True
+        return self._indexes
 
     def get_type(self):
         return self._type
@@ -187,30 +261,84 @@ class DeviceResourceRepository(UpdateableResourceRepository):
         except DeviceNotFound:
             raise ResourceNotFound(resource_id)
 
-    def get_resources(self, ids=None, filters=()):
-        devices = self._devices.get_devices()
+    def get_resources(self, ids=None, filters=(), page=None):
+        filters = list(filters)
+        if page is not None and page.sort is None and ids is None and \
+                not filters:
+            return self._devices.get_devices_after(page.after, page.limit)
         if ids is not None:
-            devices = filter(lambda x: x.id in ids, devices)
-        # @todo Apply the filters.
-        return devices
+            devices = self._devices.get_devices_by_ids(unique_ids(ids))
+            return paginate(filter_resources(devices, filters, self._type),
+                            page, self._type)
+        if self._uses_indexes(filters, page):
+            return self._get_indexes().select(filters, page)
+        devices = filter_resources(self._devices.get_devices(), filters,
+                                   self._type)
+        return paginate(devices, page, self._type)
+
+    def explain(self, ids=None, filters=(), page=None):
+        filters = list(filters)
+        if page is not None and page.sort is None and ids is None and \
+                not filters:
+            return {
+                'strategy': 'page',
+            }
+        if ids is not None:
+            return QueryPlan(candidates=len(unique_ids(ids)),
+                             residual_filters=filters, lookup=True).to_json()
+        return self._get_indexes().plan(filters, page).to_json()
+
+    def _uses_indexes(self, filters: List, page: Optional[Page]) -> bool:
+        if not self._indexes.has_indexes():
+            return False
+        return bool(filters) or page is not None and page.sort is not None
 
     def update_resource(self, resource):
         # Devices are updated on-the-fly, through their instances themselves,
         # to reduce lag. This usage is perhaps unusual for the resource API,
         # but it's simple and for now it works.
+        if self._indexed:
+            self._indexes.update((resource,))
+        self._changes.record((resource.id,))
         return resource
 
     def update_resources(self, resources):
         # Devices are updated on-the-fly, through their instances themselves,
         # to reduce lag. This usage is perhaps unusual for the resource API,
         # but it's simple and for now it works.
+        resources = list(resources)
+        if self._indexed:
+            self._indexes.update(resources)
+        self._changes.record(resource.id for resource in resources)
         return resources
 
+    @contract
+    def devices_changed(self, devices: Iterable) -> List:
+        """
+        Records that devices changed without going through this repository.
+        :param devices: Iterable[Device]
+        :return: List[Device]. The changed devices this repository contains.
+        """
+        devices = {device.id: device for device in devices}
+        devices = [devices[device.id] for device in
+                   self._devices.get_devices_by_ids(list(devices))]
+        if devices and self._indexed:
+            self._indexes.update(devices)
+        self._changes.record(device.id for device in devices)
+        return devices
+
+    def get_changes(self, since):
+        return self._changes.get_changes(since, self.get_resources)
+
 
-class NestedDeviceResourceRepository(UpdateableResourceRepository):
+class NestedDeviceResourceRepository(UpdateableResourceRepository,
+                                     SyncableResourceRepository):
     def __init__(self):
         self._type = AnyResourceType(DeviceType(), 'type', lambda x: x.type)
         self._resources = []
+        # The nested repositories' sequence numbers cannot be merged, so
+        # record the changes made through this repository separately.
+        self._changes = ChangeLog()
 
     @contract
     def add_resources(self, resources: DeviceResourceRepository):
@@ -224,30 +352,89 @@ class NestedDeviceResourceRepository(UpdateableResourceRepository):
         return self._get_resource(resource_id)[0]
 
     def _get_resource(self, resource_id):
+        # Look the resource up in each repository, without raising and
+        # handling an exception for every repository that does not have it.
         for resources in self._resources:
-            try:
-                return resources.get_resource(resource_id), resources
-            except ResourceNotFound:
-                continue
+            for resource in resources.get_resources([resource_id]):
+                return resource, resources
         raise ResourceNotFound(resource_id)
 
-    def get_resources(self, ids=None, filters=()):
-        return map(lambda x: x[0], self._get_resources(ids, filters))
+    def get_resources(self, ids=None, filters=(), page=None):
+        filters = list(filters)
+        repositories = self._get_repositories(filters)
+        if page is None:
+            return self._get_resources(repositories, ids, filters)
+        # Each repository returns its own first page, so merge those and
+        # re-apply the limit to get the first page of all resources.
+        if page.sort is None:
+            return list(islice(heapq.merge(
+                *[resources.get_resources(ids, filters, page)
+                  for resources in repositories],
+                key=attrgetter('id')), page.limit))
+        # Read the sort keys with each repository's own type, because the
+        # shared type can only read them by serializing devices entirely.
+        keyed_pages = []
+        for resources in repositories:
+            get_key = page.sort.get_key_function(resources.get_type())
+            keyed_pages.append([(get_key(resource), resource) for resource in
+                                resources.get_resources(ids, filters, page)])
+        return [resource for _, resource in islice(heapq.merge(
+            *keyed_pages, key=itemgetter(0), reverse=page.sort.descending),
+            page.limit)]
+
+    def explain(self, ids=None, filters=(), page=None):
+        filters = list(filters)
+        return {
+            'strategy': 'merge',
+            'repositories': {
+                resources.get_type().name: resources.explain(ids, filters,
+                                                             page)
+                for resources in self._get_repositories(filters)
+            },
+        }
 
-    def _get_resources(self, ids, filters):
-        retrieved_resources = []
-        for resources in self._resources:
-            for resource in resources.get_resources(ids, filters):
-                retrieved_resources.append((resource, resources))
-        # @todo (Re-)apply paging filters.
-        return retrieved_resources
+    def _get_repositories(self, filters: List):
+        # All resources in a repository are of the repository's type, so skip
+        # the repositories of other types entirely.
+        repositories = self._resources
+        for resource_filter in filters:
+            if 'type' == resource_filter.property_name:
+                repositories = [resources for resources in repositories if
+                                resource_filter.matches(
+                                    resources.get_type().name)]
+        return repositories
+
+    @staticmethod
+    def _get_resources(repositories: List, ids, filters: List):
+        # Yield the resources lazily, so they can be streamed.
+        for resources in repositories:
+            yield from resources.get_resources(ids, filters)
 
     def update_resource(self, resource):
         _, repo = self._get_resource(resource.id)
-        return repo.update_resource(resource)
+        updated_resource = repo.update_resource(resource)
+        self._changes.record((resource.id,))
+        return updated_resource
 
     def update_resources(self, resources: Iterable):
         updated_resources = []
         for resource in resources:
             updated_resources.append(self.update_resource(resource))
         return updated_resources
+
+    @contract
+    def devices_changed(self, devices: Iterable) -> List:
+        """
+        Records that devices changed without going through this repository.
+        :param devices: Iterable[Device]
+        :return: List[Device]. The changed devices this repository contains.
+        """
+        devices = list(devices)
+        changed_devices = []
+        for resources in self._resources:
+            changed_devices += resources.devices_changed(devices)
+        self._changes.record(device.id for device in changed_devices)
+        return changed_devices
+
+    def get_changes(self, since):
+        return self._changes.get_changes(since, self.get_resources)
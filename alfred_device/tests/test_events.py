@@ -0,0 +1,90 @@
+from unittest import TestCase
+
+from alfred.events import EventBus
+from alfred_device.device import Device, StaticDeviceRepository
+from alfred_device.events import DeviceEventStream, DeviceEvents, \
+    DeviceChanged, publish_device_changes
+from alfred_rest.changes import format_sync_token
+
+
+class DeviceEventStreamTest(TestCase):
+    def testGetShouldCoalesceChangesPerDevice(self):
+        sut = DeviceEventStream(10, lambda stream: None, 'abc')
+        foo = Device('foo', 'test')
+        bar = Device('bar', 'test')
+        sut.put(1, foo)
+        sut.put(2, bar)
+        sut.put(3, foo)
+        events = sut.get(0.0)
+        self.assertEqual([(event.event_id, event.device) for event in events],
+                         [(2, bar), (3, foo)])
+        self.assertEqual(sut.get(0.0), [])
+
+    def testGetShouldResetAfterOverflow(self):
+        sut = DeviceEventStream(1, lambda stream: None, 'abc')
+        sut.put(1, Device('foo', 'test'))
+        sut.put(2, Device('bar', 'test'))
+        sut.put(3, Device('baz', 'test'))
+        events = sut.get(0.0)
+        self.assertEqual(len(events), 1)
+        self.assertTrue(events[0].reset)
+        self.assertEqual(events[0].event_id, 3)
+
+
+class DeviceEventsTest(TestCase):
+    def setUp(self):
+        self._devices = StaticDeviceRepository()
+        for device_id in ('foo', 'bar'):
+            self._devices.add_device(Device(device_id, 'test'))
+        self._events = EventBus()
+        publish_device_changes(self._devices, self._events)
+
+    def testPublishDeviceChanges(self):
+        events = []
+        self._events.subscribe(DeviceChanged, events.append)
+        device = self._devices.get_device('foo')
+        device.label = 'Foo'
+        self.assertEqual([event.device for event in events], [device])
+
+    def testPublishShouldNotifySubscribers(self):
+        sut = DeviceEvents(self._devices, self._events)
+        stream = sut.subscribe()
+        device = self._devices.get_device('foo')
+        device.label = 'Foo'
+        events = stream.get(0.0)
+        self.assertEqual([(event.event_id, event.device) for event in events],
+                         [(2, device)])
+        stream.close()
+        device.label = 'FOO'
+        self.assertEqual(stream.get(0.0), [])
+
+    def testSubscribeShouldResume(self):
+        sut = DeviceEvents(self._devices, self._events)
+        stream = sut.subscribe()
+        stream.close()
+        self._devices.get_device('foo').label = 'Foo'
+        self._devices.get_device('bar').label = 'Bar'
+        stream = sut.subscribe(format_sync_token(stream.epoch, 2))
+        self.assertEqual([event.device.id for event in stream.get(0.0)],
+                         ['bar'])
+
+    def testSubscribeShouldResetForExpiredEvents(self):
+        sut = DeviceEvents(self._devices, self._events, 1)
+        stream = sut.subscribe()
+        stream.close()
+        self._devices.get_device('foo').label = 'Foo'
+        self._devices.get_device('bar').label = 'Bar'
+        stream = sut.subscribe(format_sync_token(stream.epoch, 1))
+        events = stream.get(0.0)
+        self.assertTrue(events[0].reset)
+
+    def testSubscribeShouldResetForOtherEpochs(self):
+        sut = DeviceEvents(self._devices, self._events)
+        stream = sut.subscribe()
+        stream.close()
+        self._devices.get_device('foo').label = 'Foo'
+        other_stream = DeviceEvents(self._devices, self._events).subscribe()
+        other_stream.close()
+        stream = sut.subscribe(format_sync_token(other_stream.epoch, 1))
+        events = stream.get(0.0)
+        self.assertTrue(events[0].reset)
@@ -1,9 +1,14 @@
 from unittest import TestCase
 
-from alfred_device.device import DeviceRepository, DeviceNotFound, Device
-from alfred_device.resource import DeviceResourceRepository, DeviceType
+from alfred_device.device import DeviceRepository, DeviceNotFound, Device, \
+    StaticDeviceRepository
+from alfred_device.resource import DeviceResourceRepository, DeviceType, \
+    NestedDeviceResourceRepository
 from alfred_json.type import OutputDataType
-from alfred_rest.resource import ResourceNotFound
+from alfred_rest.filter import EqualsFilter
+from alfred_rest.index import HashIndex, SortedIndex
+from alfred_rest.resource import ResourceNotFound, Page
+from alfred_rest.sort import Sort
 
 
 class DeviceResourceRepositoryTest(TestCase):
@@ -61,3 +66,164 @@ class DeviceResourceRepositoryTest(TestCase):
         devices = self.SomeDevices()
         sut = DeviceResourceRepository(DeviceType(), devices)
         self.assertNotEquals(len(sut.get_resources()), 0)
+
+    def testGetResourcesWithPage(self):
+        devices = StaticDeviceRepository()
+        for device_id in ('foo', 'bar', 'baz', 'qux'):
+            devices.add_device(Device(device_id, 'test'))
+        sut = DeviceResourceRepository(DeviceType(), devices)
+        self.assertEqual([x.id for x in sut.get_resources(page=Page(2))],
+                         ['bar', 'baz'])
+        self.assertEqual(
+            [x.id for x in sut.get_resources(page=Page(2, 'baz'))],
+            ['foo', 'qux'])
+
+    def testGetResourcesWithFilters(self):
+        devices = self.SomeDevices()
+        sut = DeviceResourceRepository(DeviceType(), devices)
+        self.assertEqual([x.id for x in sut.get_resources(
+            filters=[EqualsFilter('label', 'bar')])], ['bar'])
+
+    def testGetResourcesWithIndexes(self):
+        devices = self.SomeDevices()
+        sut = DeviceResourceRepository(DeviceType(), devices,
+                                       (HashIndex('label'),))
+        filters = [EqualsFilter('label', 'bar')]
+        self.assertEqual(sut.explain(filters=filters)['index'],
+                         'HashIndex(label)')
+        self.assertEqual([x.id for x in sut.get_resources(filters=filters)],
+                         ['bar'])
+        device = devices.get_device('bar')
+        device.label = 'baz'
+        sut.update_resource(device)
+        self.assertEqual(list(sut.get_resources(filters=filters)), [])
+
+    def testDevicesChangedShouldUpdateIndexes(self):
+        devices = self.SomeDevices()
+        sut = DeviceResourceRepository(DeviceType(), devices,
+                                       (HashIndex('label'),))
+        filters = [EqualsFilter('label', 'baz')]
+        self.assertEqual(list(sut.get_resources(filters=filters)), [])
+        device = devices.get_device('bar')
+        device.label = 'baz'
+        other_device = Device('baz', 'test', 'baz')
+        self.assertEqual(sut.devices_changed((device, other_device)),
+                         [device])
+        self.assertEqual([x.id for x in sut.get_resources(filters=filters)],
+                         ['bar'])
+
+    def testGetResourcesWithSortedPage(self):
+        devices = StaticDeviceRepository()
+        for device_id, label in (('foo', 'Kitchen'), ('bar', 'Attic'),
+                                 ('baz', 'Hall')):
+            devices.add_device(Device(device_id, 'test', label))
+        sut = DeviceResourceRepository(DeviceType(), devices,
+                                       (SortedIndex('label'),))
+        page = Page(2, 'bar', Sort('label'), 'Attic')
+        self.assertEqual(sut.explain(page=page)['strategy'], 'ordered')
+        self.assertEqual([x.id for x in sut.get_resources(page=page)],
+                         ['baz', 'foo'])
+
+    def testGetResourcesWithIdsAndPage(self):
+        devices = self.SomeDevices()
+        sut = DeviceResourceRepository(DeviceType(), devices)
+        self.assertEqual([x.id for x in sut.get_resources(
+            ids=['foo', 'bar'], page=Page(1, 'bar'))], ['foo'])
+
+    def testGetResourcesWithIdsShouldLookUpDevices(self):
+        devices = self.SomeDevices()
+        sut = DeviceResourceRepository(DeviceType(), devices,
+                                       (HashIndex('label'),))
+        ids = ['bar', 'baz', 'bar']
+        self.assertEqual(sut.explain(ids)['strategy'], 'lookup')
+        self.assertEqual([x.id for x in sut.get_resources(ids)], ['bar'])
+
+
+class NestedDeviceResourceRepositoryTest(TestCase):
+    def testGetResourcesWithPageShouldMergeRepositories(self):
+        sut = NestedDeviceResourceRepository()
+        for device_type, device_ids in (('test', ('a', 'c', 'e')),
+                                        ('other', ('b', 'd'))):
+            devices = StaticDeviceRepository()
+            for device_id in device_ids:
+                devices.add_device(Device(device_id, device_type))
+            sut.add_resources(
+                DeviceResourceRepository(DeviceType(device_type), devices))
+        self.assertEqual(
+            [x.id for x in sut.get_resources(page=Page(3, 'a'))],
+            ['b', 'c', 'd'])
+
+    def testGetResourcesWithSortedPageShouldMergeRepositories(self):
+        sut = NestedDeviceResourceRepository()
+        for device_type, labels in (('test', ('a', 'c', 'e')),
+                                    ('other', ('b', 'd'))):
+            devices = StaticDeviceRepository()
+            for label in labels:
+                devices.add_device(Device('%s-%s' % (device_type, label),
+                                          device_type, label))
+            sut.add_resources(
+                DeviceResourceRepository(DeviceType(device_type), devices))
+        page = Page(3, 'test-e', Sort('label', True), 'e')
+        self.assertEqual(
+            [x.label for x in sut.get_resources(page=page)],
+            ['d', 'c', 'b'])
+
+    def testGetResourcesWithIdsShouldLookUpDevices(self):
+        sut = NestedDeviceResourceRepository()
+        for device_type, device_ids in (('test', ('a', 'c')),
+                                        ('other', ('b', 'd'))):
+            devices = StaticDeviceRepository()
+            for device_id in device_ids:
+                devices.add_device(Device(device_id, device_type))
+            sut.add_resources(
+                DeviceResourceRepository(DeviceType(device_type), devices))
+        self.assertCountEqual(
+            [x.id for x in sut.get_resources(['d', 'a', 'e'])], ['a', 'd'])
+        self.assertEqual(sut.get_resource('d').type, 'other')
+        with self.assertRaises(ResourceNotFound):
+            sut.get_resource('e')
+
+    def testGetChanges(self):
+        sut = NestedDeviceResourceRepository()
+        devices = StaticDeviceRepository()
+        for device_id in ('foo', 'bar'):
+            devices.add_device(Device(device_id, 'test'))
+        sut.add_resources(DeviceResourceRepository(DeviceType('test'), devices))
+        changes = sut.get_changes('0')
+        self.assertCountEqual([x.resource_id for x in changes], ['foo', 'bar'])
+        device = sut.get_resource('bar')
+        device.label = 'Bar'
+        sut.update_resource(device)
+        changes = sut.get_changes(changes.token)
+        self.assertEqual([x.resource for x in changes], [device])
+
+    def testGetChangesAfterDevicesChanged(self):
+        sut = NestedDeviceResourceRepository()
+        devices = StaticDeviceRepository()
+        for device_id in ('foo', 'bar'):
+            devices.add_device(Device(device_id, 'test'))
+        sut.add_resources(DeviceResourceRepository(DeviceType('test'), devices))
+        token = sut.get_changes('0').token
+        device = devices.get_device('bar')
+        device.label = 'Bar'
+        sut.devices_changed((device, Device('baz', 'test')))
+        changes = sut.get_changes(token)
+        self.assertEqual([x.resource for x in changes], [device])
+
+    def testGetResourcesWithTypeFilterShouldSkipRepositories(self):
+        sut = NestedDeviceResourceRepository()
+        skipped_devices = self.UnavailableDevices()
+        sut.add_resources(
+            DeviceResourceRepository(DeviceType('skipped'), skipped_devices))
+        devices = StaticDeviceRepository()
+        devices.add_device(Device('foo', 'test'))
+        sut.add_resources(DeviceResourceRepository(DeviceType('test'), devices))
+        self.assertEqual([x.id for x in sut.get_resources(
+            filters=[EqualsFilter('type', 'test')])], ['foo'])
+
+    class UnavailableDevices(DeviceRepository):
+        def get_device(self, device_id: str):
+            raise AssertionError('This repository must not be used.')
+
+        def get_devices(self):
+            raise AssertionError('This repository must not be used.')
@@ -0,0 +1,209 @@
+import abc
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, Hashable, Iterable, Iterator, Optional
+
+from contracts import contract
+
+from alfred.events import Event
+from alfred_http.http import HttpResponse, HttpBody
+
+
+class DependenciesChanged(Event):
+    """
+    Published on the app's event bus when data that cached responses may
+    depend on changed.
+    """
+
+    @property
+    @abc.abstractmethod
+    def dependencies(self) -> Iterable:
+        """
+        Gets the keys of the data that changed.
+        :return: Iterable[Hashable]
+        """
+        pass
+
+
+class Generations:
+    """
+    Counts the changes to the data that cached responses depend on.
+    """
+
+    def __init__(self):
+        self._generations = {}
+        self._lock = Lock()
+
+    @contract
+    def get(self, dependencies: Iterable) -> Dict:
+        """
+        Gets the current generations of data.
+        :param dependencies: Iterable[Hashable]. The keys of the data.
+        :return: Dict[Hashable, int]
+        """
+        with self._lock:
+            return {dependency: self._generations.get(dependency, 0)
+                    for dependency in dependencies}
+
+    @contract
+    def bump(self, dependencies: Iterable):
+        """
+        Records that data changed.
+        :param dependencies: Iterable[Hashable]. The keys of the data.
+        """
+        with self._lock:
+            for dependency in dependencies:
+                self._generations[dependency] = self._generations.get(
+                    dependency, 0) + 1
+
+    @contract
+    def current(self, generations: Dict) -> bool:
+        """
+        Checks if generations are still current.
+        :param generations: Dict[Hashable, int]
+        """
+        with self._lock:
+            return all(self._generations.get(dependency, 0) == generation
+                       for dependency, generation in generations.items())
+
+
+class ResponseCache:
+    """
+    Caches serialized HTTP responses, discarding the least recently used.
+
+    Each response is cached together with the generations of the data it
+    depends on, and is discarded once any of these changed. Generations must
+    be retrieved before responses are built, so changes made while building
+    them are not missed.
+    """
+
+    MAXIMUM_ENTRIES = 1000
+    MAXIMUM_SIZE = 16 * 1024 * 1024
+
+    @contract
+    def __init__(self, maximum_entries: Optional[int] = None,
+                 maximum_size: Optional[int] = None):
+        """
+
+        :param maximum_entries: The maximum number of cached responses.
+        :param maximum_size: The maximum number of bytes of all cached
+          response bodies together.
+        """
+        self._maximum_entries = maximum_entries if maximum_entries is not None else self.MAXIMUM_ENTRIES
+        self._maximum_size = maximum_size if maximum_size is not None else self.MAXIMUM_SIZE
+        assert self._maximum_entries > 0
+        assert self._maximum_size > 0
+        self._generations = Generations()
+        # The cached responses, their generations, and their sizes.
+        self._responses = OrderedDict()
+        self._size = 0
+        self._lock = Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    @contract
+    def generations(self) -> Generations:
+        return self._generations
+
+    @property
+    @contract
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    @contract
+    def misses(self) -> int:
+        return self._misses
+
+    @property
+    @contract
+    def size(self) -> int:
+        """
+        Gets the number of bytes of all cached response bodies together.
+        """
+        return self._size
+
+    def get(self, key: Hashable) -> Optional[HttpResponse]:
+        with self._lock:
+            try:
+                response, generations, _ = self._responses[key]
+            except KeyError:
+                self._misses += 1
+                return None
+            if not self._generations.current(generations):
+                self._delete(key)
+                self._misses += 1
+                return None
+            self._responses.move_to_end(key)
+            self._hits += 1
+            return response
+
+    @contract
+    def set(self, key: Hashable, response: HttpResponse,
+            generations: Dict) -> HttpResponse:
+        """
+        Caches a response.
+
+        Streamed bodies are cached once they have been read entirely.
+        :param generations: Dict[Hashable, int]. The generations of the data
+          the response depends on, from before it was built.
+        :return: The response to send instead of the given one.
+        """
+        body = response.body
+        if body is None:
+            self._set(key, response, generations, 0)
+            return response
+        if not body.streamed:
+            self._set(key, response, generations, len(body.content))
+            return response
+        return HttpResponse(response.status, HttpBody(
+            self._tee(key, response, generations), body.content_type),
+            response.headers)
+
+    def _tee(self, key: Hashable, response: HttpResponse,
+             generations: Dict) -> Iterator:
+        chunks = []
+        size = 0
+        for chunk in response.body.content:
+            yield chunk
+            if chunks is not None:
+                size += len(chunk)
+                chunks.append(chunk)
+                # Stop collecting bodies that are too large to cache.
+                if size > self._maximum_size:
+                    chunks = None
+        if chunks is not None:
+            content = b''.join(chunks) if chunks and isinstance(
+                chunks[0], bytes) else ''.join(chunks)
+            self._set(key, HttpResponse(
+                response.status,
+                HttpBody(content, response.body.content_type),
+                response.headers), generations, size)
+
+    def _set(self, key: Hashable, response: HttpResponse, generations: Dict,
+             size: int):
+        if size > self._maximum_size:
+            return
+        with self._lock:
+            self._delete(key)
+            self._responses[key] = response, generations, size
+            self._size += size
+            while len(self._responses) > self._maximum_entries or \
+                    self._size > self._maximum_size:
+                self._delete(next(iter(self._responses)))
+
+    def _delete(self, key: Hashable):
+        try:
+            _, _, size = self._responses.pop(key)
+        except KeyError:
+            return
+        self._size -= size
+
+    def clear(self):
+        with self._lock:
+            self._responses.clear()
+            self._size = 0
+
+    def __len__(self):
+        return len(self._responses)
@@ -3,7 +3,7 @@ from copy import copy
 from typing import Iterable, Optional, Dict, Any
 
 from contracts import contract, ContractsMeta, with_metaclass
-from flask import url_for
+from flask import url_for, has_request_context, request, current_app
 
 from alfred import format_iter
 from alfred.app import App
@@ -70,6 +70,20 @@ class NotAcceptableError(Error):
         super().__init__(self.CODE, 'Not acceptable', 406, **kwargs)
 
 
+class ConflictError(Error):
+    CODE = 'conflict'
+
+    def __init__(self, **kwargs):
+        super().__init__(self.CODE, 'Conflict', 409, **kwargs)
+
+
+class GoneError(Error):
+    CODE = 'gone'
+
+    def __init__(self, **kwargs):
+        super().__init__(self.CODE, 'Gone', 410, **kwargs)
+
+
 class UnsupportedMediaTypeError(Error):
     CODE = 'unsupported_media_type'
 
@@ -77,6 +91,13 @@ class UnsupportedMediaTypeError(Error):
         super().__init__(self.CODE, 'Unsupported media type', 415, **kwargs)
 
 
+class InternalServerError(Error):
+    CODE = 'internal_server_error'
+
+    def __init__(self, **kwargs):
+        super().__init__(self.CODE, 'Internal server error', 500, **kwargs)
+
+
 class BadGatewayError(Error):
     CODE = 'bad_gateway'
 
@@ -289,6 +310,14 @@ class Response(Message):
     def http_response_status_code(self) -> int:
         pass
 
+    @property
+    @contract
+    def http_response_headers(self) -> Dict:
+        """
+        Gets the response's HTTP headers, in addition to the content headers.
+        """
+        return {}
+
 
 class ResponsePayloadType(PayloadType):
     @abc.abstractmethod
@@ -315,6 +344,18 @@ class ResponseType(MessageType):
         """
         return self._payload_types
 
+    @contract
+    def get_linked_response_types(self) -> Iterable:
+        """
+        Gets the response types of other responses this type converts.
+
+        Such responses are described by the schemas of their own response
+        types, and link to these through the HTTP Link header, with
+        rel="describedby".
+        :return: Iterable[ResponseType]
+        """
+        return ()
+
     @contract
     def to_http_response(self, response: Response,
                          content_type: str) -> HttpResponse:
@@ -328,6 +369,7 @@ class ResponseType(MessageType):
             http_response.body = self._to_http_response_payload(
                 response.payload, content_type)
         http_response.status = response.http_response_status_code
+        http_response.headers.update(response.http_response_headers)
         return http_response.to_response()
 
     @contract
@@ -419,6 +461,18 @@ class Endpoint(with_metaclass(ContractsMeta)):
     def response_type(self) -> ResponseType:
         return self._response_type
 
+    def get_cache_dependencies(self) -> Optional[Iterable]:
+        """
+        Gets the keys of the data this endpoint's responses depend on.
+
+        Successful responses to GET requests are cached until any of this data
+        changes, as published through alfred_http.cache.DependenciesChanged
+        events.
+        :return: Optional[Iterable[Hashable]]. The keys, or None if responses
+          must not be cached.
+        """
+        return None
+
     @abc.abstractmethod
     @contract
     def handle(self, request: Request) -> Response:
@@ -569,3 +623,18 @@ class EndpointUrlBuilder:
         if parameters is None:
             parameters = {}
         return url_for(endpoint.path, _external=True, **parameters)
+
+    @contract
+    def get_url_root(self) -> str:
+        """
+        Gets the root URL that URLs are currently built from.
+
+        URLs built during requests use the requested scheme, host, and script
+        root. Outside requests, they use the application's configuration.
+        """
+        if has_request_context():
+            return request.url_root
+        config = current_app.config
+        return '%s://%s%s/' % (config['PREFERRED_URL_SCHEME'],
+                               config['SERVER_NAME'],
+                               (config['APPLICATION_ROOT'] or '').rstrip('/'))
@@ -1,6 +1,7 @@
 from flask_cors import CORS
 
 from alfred.app import Extension, App
+from alfred_http.cache import ResponseCache, DependenciesChanged
 from alfred_http.endpoints import NestedEndpointRepository, EndpointUrlBuilder, \
     EmptyPayloadType
 from alfred_http.flask.app import FlaskApp, ReverseProxied
@@ -37,6 +38,16 @@ class HttpExtension(Extension):
         flask.wsgi_app = ReverseProxied(flask.wsgi_app)
         return flask
 
+    @Extension.service()
+    def _response_cache(self):
+        cache = ResponseCache()
+        # Invalidate responses synchronously, so that clients never receive
+        # stale responses after their own changes.
+        App.current.events.subscribe(
+            DependenciesChanged,
+            lambda event: cache.generations.bump(event.dependencies))
+        return cache
+
     @Extension.service()
     def _urls(self):
         return EndpointUrlBuilder(App.current.service('http', 'endpoints'))
@@ -1,17 +1,22 @@
-from typing import List, Dict, Iterable
+import json
+import re
+from functools import partial
+from typing import List, Dict, Iterable, Tuple
 
 from contracts import contract
 from flask import Flask, request as current_http_request, \
-    Response as FlaskHttpResponse
+    Response as FlaskHttpResponse, stream_with_context
 from flask.views import MethodView
-from werkzeug.datastructures import MIMEAccept
+from werkzeug.datastructures import MIMEAccept, MultiDict
 
 from alfred.app import App
 from alfred_http.endpoints import Error, \
     ErrorResponse, Endpoint, Request, NotAcceptableError, \
-    ResponseType, ErrorResponseType
+    ResponseType, ErrorResponseType, BadRequestError
 from alfred_http.http import HttpRequest, HttpBody, HttpResponse
 
+REQUEST_BODY_CHUNK_SIZE = 16384
+
 
 class ReverseProxied(object):
     """Copied from http://flask.pocoo.org/snippets/35/."""
@@ -40,14 +45,52 @@ class EmptyFlaskHttpResponse(FlaskHttpResponse):
     default_mimetype = ''
 
 
+_DEEP_OBJECT_KEY_SEGMENT = re.compile(r'\[([^\[\]]*)\]')
+
+
+@contract
+def get_deep_object_argument(query: MultiDict, name: str) -> Dict:
+    """
+    Gets a "deep object" query argument, such as name[foo][bar]=baz.
+    :return: The argument as nested dictionaries. Values are strings, or lists
+      of strings if they were given more than once.
+    :raises BadRequestError: Raised if a key is both a value and an object.
+    """
+    argument = {}
+    for key, values in query.lists():
+        if not key.startswith(name + '['):
+            continue
+        key_segments = key[len(name):]
+        path = _DEEP_OBJECT_KEY_SEGMENT.findall(key_segments)
+        if ''.join(map('[{}]'.format, path)) != key_segments:
+            continue
+        node = argument
+        for segment in path[:-1]:
+            node = node.setdefault(segment, {})
+            if not isinstance(node, Dict):
+                break
+        if not isinstance(node, Dict) or isinstance(node.get(path[-1]), Dict):
+            raise BadRequestError(
+                description='Query parameter "%s" conflicts with another parameter.' % key)
+        node[path[-1]] = values[0] if len(values) == 1 else values
+    return argument
+
+
 @contract
 def flask_to_alfred_http_request(flask_http_request, endpoint: Endpoint,
                                  kwargs: Dict) -> HttpRequest:
     request_charset = flask_http_request.mimetype_params.get(
         'charset')
-    charset = request_charset if request_charset else 'utf-8'
-    request_body_data = flask_http_request.get_data().decode(
-        charset)
+    # Convert the body if it uses another charset than UTF-8, which consumers
+    # expect. Otherwise stream the raw bytes, so consumers can process large
+    # bodies without reading them into memory entirely.
+    if request_charset and request_charset.lower() not in ('utf-8', 'utf8'):
+        request_body_data = flask_http_request.get_data().decode(
+            request_charset)
+    else:
+        request_body_data = iter(
+            partial(flask_http_request.stream.read, REQUEST_BODY_CHUNK_SIZE),
+            b'')
     request_body = HttpBody(request_body_data, current_http_request.mimetype)
 
     request_arguments = {}
@@ -61,8 +104,12 @@ def flask_to_alfred_http_request(flask_http_request, endpoint: Endpoint,
             query_value = flask_http_request.args.get(parameter.name)
             query_values = flask_http_request.args.getlist(
                 parameter.name)
+            deep_object = get_deep_object_argument(flask_http_request.args,
+                                                   parameter.name)
+            if not query_values and deep_object:
+                request_arguments[parameter.name] = deep_object
             # Use a single value, if it's expected and encountered.
-            if parameter.cardinality == 1 and [query_value] == query_values:
+            elif parameter.cardinality == 1 and [query_value] == query_values:
                 request_arguments[parameter.name] = query_value
             # In all other cases, pass on a list of the values.
             else:
@@ -86,10 +133,23 @@ def alfred_to_flask_http_response(
     body = alfred_http_response.body
     if body:
         http_response.headers.set('Content-Type', body.content_type)
-        http_response.set_data(body.content)
+        if body.streamed:
+            # Keep the request context around, because the body is produced
+            # after this view returns.
+            http_response.response = stream_with_context(body.content)
+        else:
+            http_response.set_data(body.content)
     return http_response
 
 
+@contract
+def build_response_cache_key(endpoint: Endpoint,
+                             http_request: HttpRequest,
+                             content_type: str) -> Tuple:
+    return endpoint.name, json.dumps(http_request.arguments,
+                                     sort_keys=True), content_type
+
+
 @contract
 def validate_accept_for_response_type(response_type: ResponseType,
                                       accept_headers: MIMEAccept):
@@ -156,6 +216,11 @@ class EndpointView(MethodView):
     @staticmethod
     @contract
     def _build_view(app: App, endpoint: Endpoint):
+        cache = app.service('http', 'response_cache')
+        cache_dependencies = None
+        if 'GET' == endpoint.request_type.method:
+            cache_dependencies = endpoint.get_cache_dependencies()
+
         def _view(**kwargs):
             try:
                 content_type = validate_accept_for_response_type(
@@ -165,6 +230,15 @@ class EndpointView(MethodView):
                 alfred_http_request = flask_to_alfred_http_request(
                     current_http_request, endpoint, kwargs)
 
+                if cache_dependencies is not None:
+                    cache_key = build_response_cache_key(
+                        endpoint, alfred_http_request, content_type)
+                    alfred_http_response = cache.get(cache_key)
+                    if alfred_http_response is not None:
+                        return alfred_to_flask_http_response(
+                            alfred_http_response)
+                    generations = cache.generations.get(cache_dependencies)
+
                 # Build the API request.
                 alfred_request = endpoint.request_type.from_http_request(
                     alfred_http_request)
@@ -177,6 +251,11 @@ class EndpointView(MethodView):
                 alfred_http_response = endpoint.response_type.to_http_response(
                     alfred_response, content_type)
 
+                if cache_dependencies is not None and \
+                        200 == alfred_http_response.status:
+                    alfred_http_response = cache.set(
+                        cache_key, alfred_http_response, generations)
+
                 return alfred_to_flask_http_response(alfred_http_response)
 
             except Error as e:
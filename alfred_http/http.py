@@ -1,20 +1,35 @@
 from copy import deepcopy
-from typing import Dict, Optional
+from typing import Dict, Optional, Iterable
 
 from contracts import contract
 
 
 class HttpBody:
     @contract
-    def __init__(self, content: str, content_type: str):
+    def __init__(self, content, content_type: str):
+        """
+
+        :param content: Union[str, bytes, Iterable[bytes]]. Bodies that are
+          iterables of byte chunks are streamed.
+        :param content_type:
+        """
+        assert isinstance(content, (str, bytes, Iterable))
         self._content = content
         self._content_type = content_type
 
     @property
-    @contract
-    def content(self) -> str:
+    def content(self):
+        """
+        Gets the body content.
+        :return: Union[str, bytes, Iterable[bytes]]
+        """
         return self._content
 
+    @property
+    @contract
+    def streamed(self) -> bool:
+        return not isinstance(self._content, (str, bytes))
+
     @property
     @contract
     def content_type(self) -> str:
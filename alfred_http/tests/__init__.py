@@ -1,4 +1,4 @@
-from typing import Optional, Dict
+from typing import Optional, Dict, Union
 
 from contracts import contract
 
@@ -27,6 +27,14 @@ def provide_5xx_codes():
     return expand_data(list(range(500, 508)) + [510, 511])
 
 
+def is_textual(content_type: str) -> bool:
+    """
+    Checks whether a content type is textual, so its content can be decoded.
+    """
+    return not content_type or content_type.startswith('text/') or \
+        content_type.endswith(('json', 'xml'))
+
+
 class HttpTestCase(AppTestCase):
     def setUp(self):
         super().setUp()
@@ -43,7 +51,8 @@ class HttpTestCase(AppTestCase):
         super().tearDown()
         self._flask_app_context.pop()
 
-    def request(self, endpoint_name: str, body: Optional[str] = None,
+    def request(self, endpoint_name: str,
+                body: Optional[Union[str, bytes]] = None,
                 parameters: Optional[Dict] = None,
                 headers: Optional[Dict] = None) -> HttpResponse:
         urls = self._app.service('http', 'urls')
@@ -51,16 +60,17 @@ class HttpTestCase(AppTestCase):
         endpoints = self._app.service('http', 'endpoints')
         endpoint = endpoints.get_endpoint(endpoint_name)
         assert isinstance(endpoint, Endpoint)
-        # @todo Ensure we only pass query parameters to `requests`.
+        # The URL contains the path parameters, and any other parameters as
+        # query parameters.
         flask_http_response = getattr(self._flask_app,
                                       endpoint.request_type.method.lower())(
             url,
             data=body,
-            query_string=parameters,
             headers=headers)
         http_response = HttpResponse(flask_http_response.status_code,
                                      HttpBody(flask_http_response.get_data(
-                                         as_text=True),
+                                         as_text=is_textual(
+                                             flask_http_response.mimetype)),
                                          flask_http_response.headers[
                                              'Content-Type']),
                                      dict(flask_http_response.headers))
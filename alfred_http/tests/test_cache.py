@@ -0,0 +1,72 @@
+from unittest import TestCase
+
+from alfred_http.cache import ResponseCache, Generations
+from alfred_http.http import HttpResponse, HttpBody
+
+
+def _build_response(content) -> HttpResponse:
+    return HttpResponse(200, HttpBody(content, 'text/plain'))
+
+
+class GenerationsTest(TestCase):
+    def testBump(self):
+        sut = Generations()
+        generations = sut.get(['foo', 'bar'])
+        self.assertEqual(generations, {'foo': 0, 'bar': 0})
+        self.assertTrue(sut.current(generations))
+        sut.bump(['foo'])
+        self.assertFalse(sut.current(generations))
+        self.assertEqual(sut.get(['foo']), {'foo': 1})
+
+
+class ResponseCacheTest(TestCase):
+    def testGetShouldReturnCurrentResponses(self):
+        sut = ResponseCache()
+        response = _build_response(b'foo')
+        self.assertIsNone(sut.get('foo'))
+        sut.set('foo', response, sut.generations.get(['bar']))
+        self.assertIs(sut.get('foo'), response)
+        sut.generations.bump(['baz'])
+        self.assertIs(sut.get('foo'), response)
+        sut.generations.bump(['bar'])
+        self.assertIsNone(sut.get('foo'))
+        self.assertEqual(len(sut), 0)
+        self.assertEqual(sut.hits, 2)
+        self.assertEqual(sut.misses, 2)
+
+    def testSetShouldNotCacheResponsesForStaleGenerations(self):
+        sut = ResponseCache()
+        generations = sut.generations.get(['bar'])
+        sut.generations.bump(['bar'])
+        sut.set('foo', _build_response(b'foo'), generations)
+        self.assertIsNone(sut.get('foo'))
+
+    def testSetShouldDiscardLeastRecentlyUsedResponses(self):
+        sut = ResponseCache(2)
+        for key in ('foo', 'bar'):
+            sut.set(key, _build_response(b'foo'), {})
+        sut.get('foo')
+        sut.set('baz', _build_response(b'baz'), {})
+        self.assertIsNotNone(sut.get('foo'))
+        self.assertIsNone(sut.get('bar'))
+        self.assertIsNotNone(sut.get('baz'))
+
+    def testSetShouldBoundSize(self):
+        sut = ResponseCache(maximum_size=5)
+        sut.set('foo', _build_response(b'foo'), {})
+        sut.set('bar', _build_response(b'bar'), {})
+        self.assertIsNone(sut.get('foo'))
+        self.assertIsNotNone(sut.get('bar'))
+        self.assertEqual(sut.size, 3)
+        sut.set('baz', _build_response(b'bazbaz'), {})
+        self.assertIsNone(sut.get('baz'))
+        self.assertEqual(sut.size, 3)
+
+    def testSetShouldCacheStreamedResponsesOnceRead(self):
+        sut = ResponseCache()
+        response = sut.set('foo', _build_response(iter([b'foo', b'bar'])), {})
+        self.assertIsNone(sut.get('foo'))
+        self.assertEqual(b''.join(response.body.content), b'foobar')
+        cached_response = sut.get('foo')
+        self.assertEqual(cached_response.body.content, b'foobar')
+        self.assertFalse(cached_response.body.streamed)
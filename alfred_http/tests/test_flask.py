@@ -0,0 +1,61 @@
+from unittest import TestCase
+
+from werkzeug.datastructures import MultiDict
+
+from alfred_http.endpoints import BadRequestError
+from alfred_http.flask.app import alfred_to_flask_http_response, \
+    get_deep_object_argument
+from alfred_http.http import HttpResponse, HttpBody
+from alfred_http.tests import HttpTestCase
+
+
+class AlfredToFlaskHttpResponseTest(HttpTestCase):
+    def testWithBody(self):
+        with self._app.service('http', 'flask').test_request_context():
+            http_response = alfred_to_flask_http_response(
+                HttpResponse(200, HttpBody(b'["foo"]', 'application/json')))
+            self.assertFalse(http_response.is_streamed)
+            self.assertEqual(http_response.get_data(), b'["foo"]')
+            self.assertEqual(http_response.headers['Content-Type'],
+                             'application/json')
+
+    def testWithStreamedBody(self):
+        def _chunks():
+            yield b'["foo"'
+            yield b']'
+        with self._app.service('http', 'flask').test_request_context():
+            http_response = alfred_to_flask_http_response(
+                HttpResponse(200, HttpBody(_chunks(), 'application/json')))
+            self.assertTrue(http_response.is_streamed)
+            self.assertEqual(http_response.get_data(), b'["foo"]')
+
+
+class GetDeepObjectArgumentTest(TestCase):
+    def testGetDeepObjectArgument(self):
+        query = MultiDict([
+            ('filter[type]', 'ola'),
+            ('filter[luminosity][gt]', '0'),
+            ('filter[luminosity][lt]', '1'),
+            ('filter[id][in]', 'foo'),
+            ('filter[id][in]', 'bar'),
+            ('filters[type]', 'hue'),
+            ('filter[type', 'hue'),
+        ])
+        self.assertEqual(get_deep_object_argument(query, 'filter'), {
+            'type': 'ola',
+            'luminosity': {
+                'gt': '0',
+                'lt': '1',
+            },
+            'id': {
+                'in': ['foo', 'bar'],
+            },
+        })
+
+    def testGetDeepObjectArgumentWithConflictingKeys(self):
+        query = MultiDict([
+            ('filter[type]', 'ola'),
+            ('filter[type][in]', 'hue'),
+        ])
+        with self.assertRaises(BadRequestError):
+            get_deep_object_argument(query, 'filter')
@@ -0,0 +1,226 @@
+import struct
+from math import ldexp
+from typing import Dict, List, Iterable, Callable, Iterator
+
+from alfred_json.codec import JsonCodec, encode_key
+
+_UINT8 = struct.Struct('>B')
+_UINT16 = struct.Struct('>H')
+_UINT32 = struct.Struct('>I')
+_UINT64 = struct.Struct('>Q')
+_FLOAT32 = struct.Struct('>f')
+_FLOAT64 = struct.Struct('>d')
+
+
+class _Float16:
+    """
+    Unpacks half-precision floats, which the struct module cannot unpack
+    before Python 3.6. See RFC 7049, appendix D.
+    """
+
+    size = _UINT16.size
+
+    @staticmethod
+    def unpack_from(buffer, offset=0):
+        half = _UINT16.unpack_from(buffer, offset)[0]
+        exponent = (half >> 10) & 0x1f
+        mantissa = half & 0x3ff
+        if exponent == 0:
+            value = ldexp(mantissa, -24)
+        elif exponent != 31:
+            value = ldexp(mantissa + 1024, exponent - 25)
+        else:
+            value = float('inf') if mantissa == 0 else float('nan')
+        return (-value if half & 0x8000 else value),
+
+
+_FLOAT16 = _Float16()
+
+_ARGUMENTS = (
+    (24, _UINT8),
+    (25, _UINT16),
+    (26, _UINT32),
+    (27, _UINT64),
+)
+_FLOATS = {
+    25: _FLOAT16,
+    26: _FLOAT32,
+    27: _FLOAT64,
+}
+_BREAK = 0xff
+
+
+class CborCodec(JsonCodec):
+    """
+    Encodes JSON data to, and decodes it from, CBOR.
+
+    See https://tools.ietf.org/html/rfc7049.
+    """
+
+    def encode(self, data):
+        encoded = bytearray()
+        self._encode(data, encoded)
+        return bytes(encoded)
+
+    def iterencode(self, items: Iterable, serializer: Callable) -> Iterator:
+        """
+        Encodes items to an indefinite-length array, item by item.
+        :param items: The items to encode.
+        :param serializer: Converts a single item to JSON data.
+        :return: Iterator[bytes]
+        """
+        yield b'\x9f'
+        for item in items:
+            yield self.encode(serializer(item))
+        yield bytes((_BREAK,))
+
+    def _encode(self, data, encoded: bytearray):
+        if data is None:
+            encoded.append(0xf6)
+        elif data is True:
+            encoded.append(0xf5)
+        elif data is False:
+            encoded.append(0xf4)
+        elif isinstance(data, int):
+            if data >= 0:
+                self._encode_head(0, data, encoded)
+            else:
+                self._encode_head(1, -1 - data, encoded)
+        elif isinstance(data, float):
+            encoded.append(0xfb)
+            encoded += _FLOAT64.pack(data)
+        elif isinstance(data, str):
+            self._encode_str(data, encoded)
+        elif isinstance(data, (List, tuple)):
+            self._encode_head(4, len(data), encoded)
+            for item in data:
+                self._encode(item, encoded)
+        elif isinstance(data, Dict):
+            self._encode_head(5, len(data), encoded)
+            for key, value in data.items():
+                self._encode_str(encode_key(key), encoded)
+                self._encode(value, encoded)
+        else:
+            raise TypeError('%s is not JSON serializable.' % type(data))
+
+    def _encode_str(self, data: str, encoded: bytearray):
+        data = data.encode('utf-8')
+        self._encode_head(3, len(data), encoded)
+        encoded += data
+
+    @staticmethod
+    def _encode_head(major_type: int, argument: int, encoded: bytearray):
+        major_type <<= 5
+        if argument < 24:
+            encoded.append(major_type | argument)
+            return
+        for additional_information, packer in _ARGUMENTS:
+            if argument < 1 << (packer.size * 8):
+                encoded.append(major_type | additional_information)
+                encoded += packer.pack(argument)
+                return
+        raise OverflowError('%d is too big for CBOR.' % argument)
+
+    def decode(self, encoded):
+        if isinstance(encoded, str):
+            raise ValueError('CBOR data must be bytes.')
+        try:
+            data, position = self._decode(memoryview(encoded), 0)
+        except (IndexError, struct.error):
+            raise ValueError('The CBOR data ends unexpectedly.')
+        except UnicodeDecodeError as e:
+            raise ValueError(str(e))
+        if position != len(encoded):
+            raise ValueError('Expected the end of the data at byte %d.' %
+                             position)
+        return data
+
+    def _decode(self, encoded: memoryview, position: int):
+        initial_byte = encoded[position]
+        major_type = initial_byte >> 5
+        additional_information = initial_byte & 0x1f
+        if major_type == 7:
+            return self._decode_simple(encoded, position + 1,
+                                       additional_information)
+        indefinite = additional_information == 31
+        if indefinite:
+            argument = None
+            position += 1
+        else:
+            argument, position = self._decode_argument(
+                encoded, position, additional_information)
+        if major_type == 0 and not indefinite:
+            return argument, position
+        if major_type == 1 and not indefinite:
+            return -1 - argument, position
+        if major_type == 3:
+            if indefinite:
+                return self._decode_indefinite_str(encoded, position)
+            end = position + argument
+            if end > len(encoded):
+                raise IndexError()
+            return str(encoded[position:end], 'utf-8'), end
+        if major_type == 4:
+            data = []
+            while self._has_item(encoded, position, argument, len(data)):
+                item, position = self._decode(encoded, position)
+                data.append(item)
+            return data, position + (1 if indefinite else 0)
+        if major_type == 5:
+            data = {}
+            while self._has_item(encoded, position, argument, len(data)):
+                key, position = self._decode(encoded, position)
+                if not isinstance(key, str):
+                    raise ValueError('Map keys must be strings.')
+                data[key], position = self._decode(encoded, position)
+            return data, position + (1 if indefinite else 0)
+        if major_type == 6 and not indefinite:
+            # JSON has no equivalent of tags, so use the tagged items as they
+            # are.
+            return self._decode(encoded, position)
+        raise ValueError(
+            'Unsupported CBOR item 0x%02x. Byte strings cannot be converted to JSON.' % initial_byte)
+
+    @staticmethod
+    def _has_item(encoded: memoryview, position: int, length, count: int):
+        if length is None:
+            return encoded[position] != _BREAK
+        return count < length
+
+    @staticmethod
+    def _decode_argument(encoded: memoryview, position: int,
+                         additional_information: int):
+        if additional_information < 24:
+            return additional_information, position + 1
+        for expected_additional_information, unpacker in _ARGUMENTS:
+            if additional_information == expected_additional_information:
+                return unpacker.unpack_from(encoded, position + 1)[
+                    0], position + 1 + unpacker.size
+        raise ValueError('Invalid CBOR argument at byte %d.' % position)
+
+    def _decode_indefinite_str(self, encoded: memoryview, position: int):
+        chunks = []
+        while encoded[position] != _BREAK:
+            if encoded[position] >> 5 != 3:
+                raise ValueError(
+                    'Expected a text string chunk at byte %d.' % position)
+            chunk, position = self._decode(encoded, position)
+            chunks.append(chunk)
+        return ''.join(chunks), position + 1
+
+    @staticmethod
+    def _decode_simple(encoded: memoryview, position: int,
+                       additional_information: int):
+        if additional_information == 20:
+            return False, position
+        if additional_information == 21:
+            return True, position
+        if additional_information in (22, 23):
+            # Map "undefined" to null, as JSON has no equivalent.
+            return None, position
+        if additional_information in _FLOATS:
+            unpacker = _FLOATS[additional_information]
+            return unpacker.unpack_from(encoded, position)[
+                0], position + unpacker.size
+        raise ValueError('Unsupported CBOR simple value at byte %d.' % (
+            position - 1))
@@ -0,0 +1,93 @@
+import abc
+import json
+
+from contracts import contract, ContractsMeta, with_metaclass
+
+try:
+    import orjson
+except ImportError:
+    # Allow this to fail, because orjson is an optional, faster backend.
+    orjson = None
+
+
+def encode_key(key) -> str:
+    """
+    Converts a mapping key to a string, like the standard library's JSON
+    encoder does.
+    :param key: Union[str, int, float, bool, None]
+    :return:
+    """
+    if isinstance(key, str):
+        return key
+    if isinstance(key, (int, float)) or key is None:
+        return json.dumps(key)
+    raise TypeError('Keys must be strings, numbers, booleans, or None, but %s was given.' % type(key))
+
+
+class JsonCodec(with_metaclass(ContractsMeta)):
+    """
+    Encodes JSON data to, and decodes it from, bytes.
+
+    Codecs tagged "json_codec" produce compact UTF-8 encoded JSON. Others may
+    produce binary formats that represent the same data, such as MessagePack.
+    """
+
+    @staticmethod
+    def is_available() -> bool:
+        """
+        Checks whether the codec's backend can be used in this environment.
+        :return:
+        """
+        return True
+
+    @abc.abstractmethod
+    @contract
+    def encode(self, data) -> bytes:
+        pass
+
+    @abc.abstractmethod
+    def decode(self, encoded):
+        """
+        Decodes JSON data.
+        :param encoded: Union[bytes, str]
+        :return:
+        :raises ValueError: Raised if the data is not valid JSON.
+        """
+        pass
+
+
+class StdlibJsonCodec(JsonCodec):
+    """
+    Provides a codec using Python's standard library.
+    """
+
+    def __init__(self):
+        self._encoder = json.JSONEncoder(ensure_ascii=False,
+                                         separators=(',', ':'))
+        self._decoder = json.JSONDecoder()
+
+    def encode(self, data):
+        return self._encoder.encode(data).encode('utf-8')
+
+    def decode(self, encoded):
+        if isinstance(encoded, bytes):
+            encoded = encoded.decode('utf-8')
+        return self._decoder.decode(encoded)
+
+
+class OrjsonJsonCodec(JsonCodec):
+    """
+    Provides a codec using orjson, if it is installed.
+    """
+
+    @staticmethod
+    def is_available():
+        return orjson is not None
+
+    def encode(self, data):
+        # Non-string keys, such as HTTP status codes, are common in our
+        # documents, and the standard library converts them as well.
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+
+    def decode(self, encoded):
+        return orjson.loads(encoded)
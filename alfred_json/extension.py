@@ -1,7 +1,15 @@
+import os
+
 from alfred.app import Extension, App
 from alfred_json import json_schema
-from alfred_json.rewriter import NestedRewriter, IdentifiableDataTypeAggregator
-from alfred_json.schema import SchemaProxy
+from alfred_json.cbor import CborCodec
+from alfred_json.codec import JsonCodec, StdlibJsonCodec, OrjsonJsonCodec
+from alfred_json.msgpack import MsgpackCodec
+from alfred_json.rewriter import NestedRewriter, \
+    IdentifiableDataTypeAggregator, SubschemaDeduplicator
+from alfred_json.schema import SchemaProxy, SchemaCache
+from alfred_json.serializer import SerializerCompiler
+from alfred_json.stream import JsonStreamEncoder, JsonStreamDecoder
 from alfred_json.validator import Validator
 
 
@@ -30,9 +38,55 @@ class JsonExtension(Extension):
     def _identifiable_data_type_aggregator(self):
         return IdentifiableDataTypeAggregator()
 
+    @Extension.service()
+    def _subschema_deduplicator(self):
+        return SubschemaDeduplicator()
+
+    @Extension.service()
+    def _codec(self) -> JsonCodec:
+        for codec in App.current.services(tag='json_codec'):
+            if codec.is_available():
+                return codec
+        raise RuntimeError('No JSON codec is available.')
+
+    @Extension.service(tags=('json_codec',))
+    def _stdlib_codec(self):
+        return StdlibJsonCodec()
+
+    @Extension.service(tags=('json_codec',), weight=-10)
+    def _orjson_codec(self):
+        return OrjsonJsonCodec()
+
+    @Extension.service()
+    def _msgpack_codec(self):
+        return MsgpackCodec()
+
+    @Extension.service()
+    def _cbor_codec(self):
+        return CborCodec()
+
+    @Extension.service()
+    def _stream_encoder(self):
+        return JsonStreamEncoder(App.current.service('json', 'codec'))
+
+    @Extension.service()
+    def _stream_decoder(self):
+        return JsonStreamDecoder()
+
+    @Extension.service()
+    def _serializers(self):
+        return SerializerCompiler()
+
     @Extension.service()
     def _schemas(self):
-        return SchemaProxy()
+        return SchemaProxy(App.current.service('json', 'schema_cache'))
+
+    @Extension.service()
+    def _schema_cache(self):
+        directory = os.environ.get('ALFRED_CACHE_DIRECTORY', os.path.join(
+            os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache')),
+            'alfred'))
+        return SchemaCache(os.path.join(directory, 'schemas'))
 
     @Extension.service(tags=('json_schema',))
     def _json_schema(self):
@@ -0,0 +1,204 @@
+import struct
+from typing import Dict, List
+
+from alfred_json.codec import JsonCodec, encode_key
+
+_INT8 = struct.Struct('>b')
+_INT16 = struct.Struct('>h')
+_INT32 = struct.Struct('>i')
+_INT64 = struct.Struct('>q')
+_UINT8 = struct.Struct('>B')
+_UINT16 = struct.Struct('>H')
+_UINT32 = struct.Struct('>I')
+_UINT64 = struct.Struct('>Q')
+_FLOAT32 = struct.Struct('>f')
+_FLOAT64 = struct.Struct('>d')
+
+
+class MsgpackCodec(JsonCodec):
+    """
+    Encodes JSON data to, and decodes it from, MessagePack.
+
+    See https://github.com/msgpack/msgpack/blob/master/spec.md.
+    """
+
+    def encode(self, data):
+        encoded = bytearray()
+        self._encode(data, encoded)
+        return bytes(encoded)
+
+    def _encode(self, data, encoded: bytearray):
+        if data is None:
+            encoded.append(0xc0)
+        elif data is True:
+            encoded.append(0xc3)
+        elif data is False:
+            encoded.append(0xc2)
+        elif isinstance(data, int):
+            self._encode_int(data, encoded)
+        elif isinstance(data, float):
+            encoded.append(0xcb)
+            encoded += _FLOAT64.pack(data)
+        elif isinstance(data, str):
+            self._encode_str(data, encoded)
+        elif isinstance(data, (List, tuple)):
+            self._encode_header(len(data), encoded, 0x90, 0xdc, 0xdd)
+            for item in data:
+                self._encode(item, encoded)
+        elif isinstance(data, Dict):
+            self._encode_header(len(data), encoded, 0x80, 0xde, 0xdf)
+            for key, value in data.items():
+                self._encode_str(encode_key(key), encoded)
+                self._encode(value, encoded)
+        else:
+            raise TypeError('%s is not JSON serializable.' % type(data))
+
+    @staticmethod
+    def _encode_int(data: int, encoded: bytearray):
+        if 0 <= data < 0x80:
+            encoded.append(data)
+        elif -0x20 <= data < 0:
+            encoded.append(data & 0xff)
+        elif 0 <= data:
+            for marker, packer in ((0xcc, _UINT8), (0xcd, _UINT16),
+                                   (0xce, _UINT32), (0xcf, _UINT64)):
+                if data < 1 << (packer.size * 8):
+                    encoded.append(marker)
+                    encoded += packer.pack(data)
+                    return
+            raise OverflowError('%d is too big for MessagePack.' % data)
+        else:
+            for marker, packer in ((0xd0, _INT8), (0xd1, _INT16),
+                                   (0xd2, _INT32), (0xd3, _INT64)):
+                if data >= -(1 << (packer.size * 8 - 1)):
+                    encoded.append(marker)
+                    encoded += packer.pack(data)
+                    return
+            raise OverflowError('%d is too small for MessagePack.' % data)
+
+    def _encode_str(self, data: str, encoded: bytearray):
+        data = data.encode('utf-8')
+        length = len(data)
+        if length < 0x20:
+            encoded.append(0xa0 | length)
+        elif length <= 0xff:
+            encoded.append(0xd9)
+            encoded.append(length)
+        else:
+            self._encode_header(length, encoded, None, 0xda, 0xdb)
+        encoded += data
+
+    @staticmethod
+    def _encode_header(length: int, encoded: bytearray, fix_marker,
+                       marker16: int, marker32: int):
+        if fix_marker is not None and length < 0x10:
+            encoded.append(fix_marker | length)
+        elif length <= 0xffff:
+            encoded.append(marker16)
+            encoded += _UINT16.pack(length)
+        else:
+            encoded.append(marker32)
+            encoded += _UINT32.pack(length)
+
+    def decode(self, encoded):
+        if isinstance(encoded, str):
+            raise ValueError('MessagePack data must be bytes.')
+        try:
+            data, position = self._decode(memoryview(encoded), 0)
+        except (IndexError, struct.error):
+            raise ValueError('The MessagePack data ends unexpectedly.')
+        except UnicodeDecodeError as e:
+            raise ValueError(str(e))
+        if position != len(encoded):
+            raise ValueError('Expected the end of the data at byte %d.' %
+                             position)
+        return data
+
+    def _decode(self, encoded: memoryview, position: int):
+        marker = encoded[position]
+        position += 1
+        if marker < 0x80:
+            return marker, position
+        if marker >= 0xe0:
+            return marker - 0x100, position
+        if marker < 0x90:
+            return self._decode_map(encoded, position, marker & 0x0f)
+        if marker < 0xa0:
+            return self._decode_array(encoded, position, marker & 0x0f)
+        if marker < 0xc0:
+            return self._decode_str(encoded, position, marker & 0x1f)
+        if marker == 0xc0:
+            return None, position
+        if marker == 0xc2:
+            return False, position
+        if marker == 0xc3:
+            return True, position
+        if marker in self._NUMBERS:
+            unpacker = self._NUMBERS[marker]
+            return unpacker.unpack_from(encoded, position)[
+                0], position + unpacker.size
+        if marker in self._STRINGS:
+            unpacker = self._STRINGS[marker]
+            length = unpacker.unpack_from(encoded, position)[0]
+            return self._decode_str(encoded, position + unpacker.size, length)
+        if marker in self._ARRAYS:
+            unpacker = self._ARRAYS[marker]
+            length = unpacker.unpack_from(encoded, position)[0]
+            return self._decode_array(encoded, position + unpacker.size,
+                                      length)
+        if marker in self._MAPS:
+            unpacker = self._MAPS[marker]
+            length = unpacker.unpack_from(encoded, position)[0]
+            return self._decode_map(encoded, position + unpacker.size, length)
+        raise ValueError(
+            'Unsupported MessagePack type 0x%02x at byte %d. Binary and extension types cannot be converted to JSON.' % (
+                marker, position - 1))
+
+    _NUMBERS = {
+        0xca: _FLOAT32,
+        0xcb: _FLOAT64,
+        0xcc: _UINT8,
+        0xcd: _UINT16,
+        0xce: _UINT32,
+        0xcf: _UINT64,
+        0xd0: _INT8,
+        0xd1: _INT16,
+        0xd2: _INT32,
+        0xd3: _INT64,
+    }
+    _STRINGS = {
+        0xd9: _UINT8,
+        0xda: _UINT16,
+        0xdb: _UINT32,
+    }
+    _ARRAYS = {
+        0xdc: _UINT16,
+        0xdd: _UINT32,
+    }
+    _MAPS = {
+        0xde: _UINT16,
+        0xdf: _UINT32,
+    }
+
+    @staticmethod
+    def _decode_str(encoded: memoryview, position: int, length: int):
+        end = position + length
+        if end > len(encoded):
+            raise IndexError()
+        return str(encoded[position:end], 'utf-8'), end
+
+    def _decode_array(self, encoded: memoryview, position: int, length: int):
+        data = []
+        for _ in range(length):
+            item, position = self._decode(encoded, position)
+            data.append(item)
+        return data, position
+
+    def _decode_map(self, encoded: memoryview, position: int, length: int):
+        data = {}
+        for _ in range(length):
+            key, position = self._decode(encoded, position)
+            if not isinstance(key, str):
+                raise ValueError('Map keys must be strings.')
+            data[key], position = self._decode(encoded, position)
+        return data, position
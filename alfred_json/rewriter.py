@@ -1,10 +1,11 @@
 import abc
+import hashlib
+import json
 from copy import copy
-from typing import Dict, List, Tuple
+from typing import Dict, List, Callable
 
 from contracts import contract, ContractsMeta, with_metaclass
 
-from alfred_device.resource import DeviceType
 from alfred_json.type import IdentifiableDataType, DataType
 
 
@@ -15,73 +16,363 @@ class Rewriter(with_metaclass(ContractsMeta)):
         pass
 
 
-class IdentifiableDataTypeAggregator(Rewriter):
+class VisitorRewriter(Rewriter):
     """
-    Rewrites a JSON Schema's IdentifiableDataTypes.
+    Rewrites JSON Schemas node by node.
+
+    Visitor rewriters override the hooks for the nodes they rewrite, so that
+    NestedRewriter can apply any number of them in a single traversal.
     """
 
-    @contract
-    def _rewrite_data_type(self, data_type: DataType,
-                           definitions: Dict) -> Tuple:
-        """
-        Rewrites an IdentifiableDataType.
-        """
-        if isinstance(data_type, IdentifiableDataType):
-            definitions.setdefault('data', {})
-            if data_type.name not in definitions['data']:
-                # Set a placeholder definition to avoid infinite loops.
-                definitions['data'][data_type.name] = {}
-                # Rewrite the type itself, because it may contain further
-                # types.
-                schema, definitions = self._rewrite(data_type.get_json_schema(), definitions)
-                definitions['data'][data_type.name] = schema
-            return {
-                       '$ref': '#/definitions/%s/%s' % ('data', data_type.name),
-                   }, definitions
-        else:
-            # Rewrite the type itself, because it may contain further
-            # types.
-            return self._rewrite(data_type.get_json_schema(), definitions)
+    def visit_data_type(self, data_type: DataType, traversal):
+        """
+        Visits a DataType.
+        :param data_type:
+        :param traversal: SchemaTraversal
+        :return: Any. The node to replace the data type with. Non-DataType
+          nodes are traversed, but not visited by any further rewriters'
+          visit_data_type() hooks.
+        """
+        return data_type
 
-    def rewrite(self, schema):
-        schema, definitions = self._rewrite(schema, {})
-        for data_type, data_definitions in definitions.items():
-            for data_name, data_definition in data_definitions.items():
-                # There is no reason we should omit empty definitions,
-                #  except that existing code does not always expect them.
-                schema.setdefault('definitions', {})
-                schema['definitions'].setdefault(data_type, {})
-                schema['definitions'][data_type][data_name] = data_definition
+    def visit_key(self, key, value, traversal):
+        """
+        Visits a dictionary key.
+        :param key:
+        :param value: The key's value, before it is traversed.
+        :param traversal: SchemaTraversal
+        :return: Any. The key's new value.
+        """
+        return value
 
+    def visit_pointer(self, key: str, pointer: str, traversal) -> str:
+        """
+        Visits a JSON pointer in an "id", "$ref", or "$schema" key.
+        :param key:
+        :param pointer:
+        :param traversal: SchemaTraversal
+        :return: The new pointer.
+        """
+        return pointer
+
+    def leave(self, schema: Dict, traversal) -> Dict:
+        """
+        Finishes rewriting a schema, after it has been traversed.
+        :param schema:
+        :param traversal: SchemaTraversal
+        :return: The rewritten schema.
+        """
         return schema
 
+    def rewrite(self, schema):
+        return SchemaTraversal([self]).rewrite(schema)
+
+
+class SchemaTraversal:
+    """
+    Rewrites a JSON Schema through VisitorRewriters in a single traversal.
+
+    Schemas are copied, so the original schemas are left untouched.
+    """
+
+    POINTER_KEYS = ('id', '$ref', '$schema')
+
+    @contract
+    def __init__(self, rewriters: List):
+        self._rewriters = rewriters
+        # Only call hooks that have been overridden.
+        self._data_type_hooks = self._get_hooks('visit_data_type')
+        self._key_hooks = self._get_hooks('visit_key')
+        self._pointer_hooks = self._get_hooks('visit_pointer')
+        self._states = {}
+
+    def _get_hooks(self, name: str) -> List:
+        default = getattr(VisitorRewriter, name)
+        return [getattr(rewriter, name) for rewriter in self._rewriters if
+                getattr(type(rewriter), name) is not default]
+
     @contract
-    def _rewrite(self, data, definitions: Dict):
-        data = copy(data)
-        definitions = copy(definitions)
-        if isinstance(data, DataType):
-            return self._rewrite_data_type(data, definitions)
-        if isinstance(data, List):
-            for index, item in enumerate(data):
-                data[index], definitions = self._rewrite(item, definitions)
-            return data, definitions
-        elif isinstance(data, Dict):
-            for key, item in data.items():
-                data[key], definitions = self._rewrite(item, definitions)
-            return data, definitions
-        return data, definitions
+    def get_state(self, rewriter: VisitorRewriter, factory: Callable):
+        """
+        Gets a rewriter's state for this traversal.
+        :param rewriter:
+        :param factory: Builds the state if the rewriter has none yet.
+        :return: Any
+        """
+        try:
+            return self._states[rewriter]
+        except KeyError:
+            state = factory()
+            self._states[rewriter] = state
+            return state
+
+    def rewrite(self, schema):
+        """
+        Rewrites an entire schema.
+        """
+        schema = self.rewrite_node(schema)
+        for rewriter in self._rewriters:
+            schema = rewriter.leave(schema, self)
+        return schema
+
+    def rewrite_node(self, node):
+        """
+        Rewrites a single node and its children.
+        """
+        if isinstance(node, DataType):
+            for hook in self._data_type_hooks:
+                node = hook(node, self)
+                if not isinstance(node, DataType):
+                    return self.rewrite_node(node)
+            return node
+        if isinstance(node, List):
+            return [self.rewrite_node(item) for item in node]
+        if isinstance(node, Dict):
+            rewritten = {}
+            for key, value in node.items():
+                for hook in self._key_hooks:
+                    value = hook(key, value, self)
+                if key in self.POINTER_KEYS and isinstance(value, str):
+                    for hook in self._pointer_hooks:
+                        value = hook(key, value, self)
+                else:
+                    value = self.rewrite_node(value)
+                rewritten[key] = value
+            return rewritten
+        return node
+
+
+class IdentifiableDataTypeAggregator(VisitorRewriter):
+    """
+    Rewrites a JSON Schema's IdentifiableDataTypes.
+    """
+
+    def visit_data_type(self, data_type, traversal):
+        if not isinstance(data_type, IdentifiableDataType):
+            # Rewrite the type itself, because it may contain further types.
+            return data_type.get_json_schema()
+        definitions = traversal.get_state(self, dict)
+        if data_type.name not in definitions:
+            # Set a placeholder definition to avoid infinite loops.
+            definitions[data_type.name] = {}
+            # Rewrite the type itself, because it may contain further types.
+            definitions[data_type.name] = traversal.rewrite_node(
+                data_type.get_json_schema())
+        return {
+            '$ref': '#/definitions/%s/%s' % ('data', data_type.name),
+        }
+
+    def leave(self, schema, traversal):
+        definitions = traversal.get_state(self, dict)
+        for data_name, data_definition in definitions.items():
+            # There is no reason we should omit empty definitions,
+            #  except that existing code does not always expect them.
+            schema.setdefault('definitions', {})
+            schema['definitions'].setdefault('data', {})
+            schema['definitions']['data'][data_name] = data_definition
+
+        return schema
 
 
 class NestedRewriter(Rewriter):
+    """
+    Applies several rewriters.
+
+    Consecutive VisitorRewriters are applied in a single traversal.
+    """
+
     def __init__(self):
         super().__init__()
         self._rewriters = []
+        self._passes = None
 
     @contract
     def add_rewriter(self, rewriter: Rewriter):
         self._rewriters.append(rewriter)
+        self._passes = None
 
     def rewrite(self, schema):
+        if self._passes is None:
+            self._passes = self._build_passes()
+        for rewriters in self._passes:
+            if isinstance(rewriters, Rewriter):
+                schema = rewriters.rewrite(schema)
+            else:
+                schema = SchemaTraversal(rewriters).rewrite(schema)
+        return schema
+
+    def _build_passes(self) -> List:
+        """
+        Groups consecutive VisitorRewriters, so they can share a traversal.
+        """
+        passes = []
         for rewriter in self._rewriters:
-            schema = rewriter.rewrite(schema)
+            if not isinstance(rewriter, VisitorRewriter):
+                passes.append(rewriter)
+            elif passes and isinstance(passes[-1], List):
+                passes[-1].append(rewriter)
+            else:
+                passes.append([rewriter])
+        return passes
+
+
+class SubschemaDeduplicator(Rewriter):
+    """
+    Moves structurally identical anonymous subschemas to shared definitions.
+
+    Subschemas that occur more than once are replaced with references to
+    #/definitions/subschema/{hash}. Definitions themselves are kept in place,
+    but their subschemas are deduplicated as well. Because this requires the
+    entire schema to be inspected, it is meant for complete documents, such
+    as the Alfred JSON Schema, rather than for every schema that is validated
+    against.
+    """
+
+    DEFINITIONS_GROUP = 'subschema'
+    # Smaller subschemas would grow when replaced with references.
+    MINIMUM_SIZE = 64
+
+    _SCHEMA_KEYWORDS = ('additionalItems', 'additionalProperties', 'items',
+                        'not')
+    _SCHEMA_LIST_KEYWORDS = ('allOf', 'anyOf', 'items', 'oneOf')
+    _SCHEMA_MAP_KEYWORDS = ('dependencies', 'patternProperties',
+                            'properties')
+    _KEYWORDS = ('$ref', 'type', 'enum', 'format', 'title', 'description',
+                 'default', 'properties', 'required', 'items', 'allOf',
+                 'anyOf', 'oneOf', 'not', 'definitions')
+
+    def rewrite(self, schema):
+        counts = {}
+        self._walk(schema, lambda subschema, encoded: counts.__setitem__(
+            encoded, counts.get(encoded, 0) + 1))
+        duplicates = {encoded for encoded, count in counts.items() if
+                      count > 1 and len(encoded) >= self.MINIMUM_SIZE}
+        while duplicates:
+            shared_definitions = {}
+            deduplicated_schema = self._deduplicate_schema(
+                schema, duplicates, shared_definitions)
+            # Subschemas nested in duplicates are counted once per occurrence
+            # of the duplicates, so they may end up being referenced only
+            # once. Inline them again.
+            references = self._encode(deduplicated_schema) + self._encode(
+                shared_definitions)
+            inlined = {encoded for encoded in duplicates if references.count(
+                '"#/definitions/%s/%s"' % (self.DEFINITIONS_GROUP,
+                                           self._get_name(encoded))) < 2}
+            if not inlined:
+                deduplicated_schema.setdefault('definitions', {})
+                deduplicated_schema['definitions'][
+                    self.DEFINITIONS_GROUP] = shared_definitions
+                return deduplicated_schema
+            duplicates -= inlined
         return schema
+
+    @staticmethod
+    def _get_name(encoded: str) -> str:
+        return hashlib.sha256(encoded.encode('utf-8')).hexdigest()[:16]
+
+    @staticmethod
+    def _encode(subschema: Dict) -> str:
+        return json.dumps(subschema, sort_keys=True, separators=(',', ':'))
+
+    def _is_movable(self, subschema) -> bool:
+        # Subschemas that change the resolution scope cannot be moved, and
+        # neither can their own subschemas.
+        return isinstance(subschema, Dict) and not isinstance(
+            subschema.get('id'), str) and '$schema' not in subschema
+
+    def _is_definitions_group(self, definitions) -> bool:
+        return isinstance(definitions, Dict) and all(
+            isinstance(value, Dict) for value in definitions.values()) and \
+            not any(keyword in definitions for keyword in self._KEYWORDS)
+
+    def _walk(self, schema: Dict, visit: Callable):
+        """
+        Visits all anonymous subschemas of a schema.
+        """
+        for subschema in self._get_subschemas(schema):
+            if self._is_movable(subschema):
+                visit(subschema, self._encode(subschema))
+                self._walk(subschema, visit)
+        for definition in self._get_definitions(
+                schema.get('definitions', {})):
+            self._walk(definition, visit)
+
+    def _get_subschemas(self, schema: Dict) -> List:
+        subschemas = []
+        for keyword in self._SCHEMA_KEYWORDS:
+            if isinstance(schema.get(keyword), Dict):
+                subschemas.append(schema[keyword])
+        for keyword in self._SCHEMA_LIST_KEYWORDS:
+            if isinstance(schema.get(keyword), List):
+                subschemas += schema[keyword]
+        for keyword in self._SCHEMA_MAP_KEYWORDS:
+            if isinstance(schema.get(keyword), Dict):
+                subschemas += [subschema for subschema in
+                               schema[keyword].values() if
+                               isinstance(subschema, Dict)]
+        return subschemas
+
+    def _get_definitions(self, definitions: Dict) -> List:
+        named_definitions = []
+        for definition in definitions.values():
+            if self._is_definitions_group(definition):
+                named_definitions += self._get_definitions(definition)
+            elif self._is_movable(definition):
+                named_definitions.append(definition)
+        return named_definitions
+
+    def _deduplicate(self, subschema, duplicates, shared_definitions):
+        if not self._is_movable(subschema):
+            return subschema
+        encoded = self._encode(subschema)
+        if encoded not in duplicates:
+            return self._deduplicate_schema(subschema, duplicates,
+                                            shared_definitions)
+        name = self._get_name(encoded)
+        if name not in shared_definitions:
+            shared_definitions[name] = self._deduplicate_schema(
+                subschema, duplicates, shared_definitions)
+        return {
+            '$ref': '#/definitions/%s/%s' % (self.DEFINITIONS_GROUP, name),
+        }
+
+    def _deduplicate_schema(self, schema: Dict, duplicates, shared_definitions):
+        """
+        Deduplicates a schema's subschemas, but not the schema itself.
+        """
+        schema = copy(schema)
+        for keyword in self._SCHEMA_KEYWORDS:
+            if isinstance(schema.get(keyword), Dict):
+                schema[keyword] = self._deduplicate(
+                    schema[keyword], duplicates, shared_definitions)
+        for keyword in self._SCHEMA_LIST_KEYWORDS:
+            if isinstance(schema.get(keyword), List):
+                schema[keyword] = [
+                    self._deduplicate(subschema, duplicates,
+                                      shared_definitions)
+                    for subschema in schema[keyword]]
+        for keyword in self._SCHEMA_MAP_KEYWORDS:
+            if isinstance(schema.get(keyword), Dict):
+                schema[keyword] = {
+                    name: self._deduplicate(
+                        subschema, duplicates, shared_definitions)
+                    if isinstance(subschema, Dict) else subschema
+                    for name, subschema in schema[keyword].items()}
+        if isinstance(schema.get('definitions'), Dict):
+            schema['definitions'] = self._deduplicate_definitions(
+                schema['definitions'], duplicates, shared_definitions)
+        return schema
+
+    def _deduplicate_definitions(self, definitions: Dict, duplicates,
+                                 shared_definitions):
+        deduplicated_definitions = {}
+        for name, definition in definitions.items():
+            if self._is_definitions_group(definition):
+                definition = self._deduplicate_definitions(
+                    definition, duplicates, shared_definitions)
+            elif self._is_movable(definition):
+                definition = self._deduplicate_schema(
+                    definition, duplicates, shared_definitions)
+            deduplicated_definitions[name] = definition
+        return deduplicated_definitions
@@ -1,5 +1,11 @@
-from typing import Dict, Iterable, Optional
+import hashlib
+import json
+import os
+import stat
+import tempfile
+from typing import Dict, Optional
 
+import jsonschema
 from contracts import contract, ContractsMeta, with_metaclass
 from jsonschema.validators import validator_for
 
@@ -19,6 +25,80 @@ class SchemaNotFound(RuntimeError):
         super().__init__(message)
 
 
+class SchemaCache(with_metaclass(ContractsMeta)):
+    """
+    Stores verified JSON Schemas on disk, so they are verified only once.
+
+    Schemas are stored under the hash of their canonical encoding and the
+    jsonschema library version, which means any change to a schema or the
+    library invalidates its entry. The cache is shared between processes.
+    Failure to write to it is not an error, but means schemas are verified
+    again next time.
+
+    Because cached schemas are not verified again, entries are only trusted if
+    they and the cache directory are owned by the current user, and cannot be
+    written to by anyone else. The directory is created accordingly.
+    """
+
+    @contract
+    def __init__(self, directory: str):
+        self._directory = directory
+
+    @property
+    @contract
+    def directory(self) -> str:
+        return self._directory
+
+    @contract
+    def get_key(self, schema: Dict) -> str:
+        encoded = json.dumps(schema, sort_keys=True, separators=(',', ':'),
+                             ensure_ascii=False).encode('utf-8')
+        return hashlib.sha256(
+            jsonschema.__version__.encode('utf-8') + b'\0' + encoded
+        ).hexdigest()
+
+    @contract
+    def has(self, key: str) -> bool:
+        return _is_private(self._directory, stat.S_ISDIR) and _is_private(
+            self._get_path(key), stat.S_ISREG)
+
+    @contract
+    def add(self, key: str, schema: Dict):
+        path = self._get_path(key)
+        try:
+            os.makedirs(self._directory, 0o700, exist_ok=True)
+            # Write to a temporary file first, so concurrent processes never
+            # find incomplete schemas.
+            descriptor, temporary_path = tempfile.mkstemp(
+                dir=self._directory)
+            with os.fdopen(descriptor, 'w', encoding='utf-8') as f:
+                json.dump(schema, f, ensure_ascii=False)
+            os.replace(temporary_path, path)
+        except OSError:
+            pass
+
+    def _get_path(self, key: str) -> str:
+        return os.path.join(self._directory, '%s.json' % key)
+
+
+def _is_private(path: str, is_file_type) -> bool:
+    """
+    Checks that a path is owned by the current user, and that no one else can
+    write to it.
+    :param is_file_type: Checks the path's file type, such as stat.S_ISREG.
+      Symbolic links are never private.
+    """
+    try:
+        status = os.lstat(path)
+    except OSError:
+        return False
+    if not is_file_type(status.st_mode):
+        return False
+    if hasattr(os, 'getuid') and status.st_uid != os.getuid():
+        return False
+    return not status.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
 class SchemaProxy(with_metaclass(ContractsMeta)):
     """
     Proxies JSON Schemas.
@@ -26,8 +106,10 @@ class SchemaProxy(with_metaclass(ContractsMeta)):
     JSON Schemas may require lazy-loading, because they are computed, for
     instance.
     """
-    def __init__(self):
+    @contract
+    def __init__(self, cache: Optional[SchemaCache] = None):
         self._schemas = None
+        self._cache = cache
 
     def get_schema(self, schema_id: str) -> Optional[Dict]:
         if self._schemas is None:
@@ -55,11 +137,19 @@ class SchemaProxy(with_metaclass(ContractsMeta)):
 
     @contract
     def _add_schema(self, schema: Dict):
-        cls = validator_for(schema)
-        cls.check_schema(schema)
+        self._check_schema(schema)
         assert 'id' in schema
         # Normalize root schemas by appending empty fragments.
         if '#' not in schema['id']:
             schema['id'] += '#'
         assert schema['id'] not in self._schemas
         self._schemas[schema['id']] = schema
+
+    def _check_schema(self, schema: Dict):
+        if self._cache is None:
+            validator_for(schema).check_schema(schema)
+            return
+        key = self._cache.get_key(schema)
+        if not self._cache.has(key):
+            validator_for(schema).check_schema(schema)
+            self._cache.add(key, schema)
@@ -0,0 +1,126 @@
+from typing import Callable, Optional, AbstractSet, Dict
+from weakref import WeakKeyDictionary
+
+from contracts import contract
+
+from alfred.cache import LruCache
+from alfred_json.type import OutputDataType, ScalarType, \
+    get_described_properties
+
+
+class SerializerCompiler:
+    """
+    Compiles OutputDataTypes into specialized serializers.
+
+    Composed types, such as devices, usually build their JSON objects by
+    merging the partial objects of all the types they extend. Types that
+    describe their properties (see get_described_properties()) are
+    compiled into a single function instead, which reads all attributes
+    directly into a single dictionary. Compiled serializers produce the same
+    output as OutputDataType.to_json(), and are cached per type.
+
+    Serializers can be compiled for sparse fieldsets, in which case they only
+    output the requested top-level object properties. The attributes of other
+    described properties are never read. Fieldsets are reduced to the
+    properties a type describes, and only the most recently used serializers
+    are cached, because clients can request any fieldset.
+    """
+
+    MAXIMUM_SIZE = 64
+
+    @contract
+    def __init__(self, maximum_size: Optional[int] = None):
+        """
+
+        :param maximum_size: The maximum number of serializers to cache per
+          type.
+        """
+        self._maximum_size = maximum_size if maximum_size is not None else \
+            self.MAXIMUM_SIZE
+        self._serializers = WeakKeyDictionary()
+
+    @contract
+    def get_serializer(self, data_type: OutputDataType,
+                       fields: Optional[AbstractSet] = None) -> Callable:
+        """
+        Gets a serializer for a data type.
+        :param data_type:
+        :param fields: Optional[AbstractSet[str]]. The names of the object
+          properties to output, or None to output all properties. The fields
+          apply to the objects of lists, and to the concrete types of
+          OneOfComplexTypes.
+        :return: Callable
+        """
+        if fields is not None:
+            fields = frozenset(fields)
+            properties = get_described_properties(data_type)
+            if properties is not None:
+                fields &= {json_property.name for json_property in
+                           properties}
+        serializers = self._serializers.get(data_type)
+        if serializers is None:
+            serializers = self._serializers.setdefault(
+                data_type, LruCache(self._maximum_size))
+        serializer = serializers.get(fields)
+        if serializer is None:
+            serializer = self._compile(data_type, fields)
+            serializers.set(fields, serializer)
+        return serializer
+
+    def _compile(self, data_type: OutputDataType,
+                 fields: Optional[frozenset]) -> Callable:
+        properties = get_described_properties(data_type)
+        if properties is None:
+            if fields is None:
+                return data_type.compile_serializer(self)
+            # Let the type compile the serializers of the types it wraps for
+            # the same fields, and remove any other fields from its own output.
+            return _filter_fields(data_type.compile_serializer(
+                _SparseSerializerCompiler(self, fields)), fields)
+        if fields is not None:
+            properties = [json_property for json_property in properties if
+                          json_property.name in fields]
+        return self._compile_properties(data_type, properties)
+
+    def _compile_properties(self, data_type, properties) -> Callable:
+        namespace = {}
+        values = []
+        for index, json_property in enumerate(properties):
+            value = 'data.%s' % json_property.attribute
+            # Scalar values are output as they are, so we can inline them.
+            if json_property.data_type is not None and not isinstance(
+                    json_property.data_type, ScalarType):
+                serializer_name = '_serialize_%d' % index
+                namespace[serializer_name] = self.get_serializer(
+                    json_property.data_type)
+                value = '%s(%s)' % (serializer_name, value)
+            values.append('%r: %s' % (json_property.name, value))
+        source = 'def _serialize(data):\n    return {%s}\n' % ', '.join(values)
+        code = compile(source, '<serializer for %s>' % type(data_type).__qualname__, 'exec')
+        exec(code, namespace)
+        return namespace['_serialize']
+
+
+class _SparseSerializerCompiler:
+    """
+    Compiles serializers for the same sparse fieldset.
+    """
+
+    def __init__(self, compiler: SerializerCompiler, fields: frozenset):
+        self._compiler = compiler
+        self._fields = fields
+
+    def get_serializer(self, data_type: OutputDataType,
+                       fields: Optional[AbstractSet] = None) -> Callable:
+        return self._compiler.get_serializer(
+            data_type, self._fields if fields is None else fields)
+
+
+def _filter_fields(serializer: Callable, fields: frozenset) -> Callable:
+    def _serialize(data):
+        json_data = serializer(data)
+        if isinstance(json_data, Dict):
+            return {name: value for name, value in json_data.items() if
+                    name in fields}
+        return json_data
+    return _serialize
@@ -0,0 +1,238 @@
+import codecs
+import json
+import re
+from typing import Iterable, Callable, Iterator
+
+from contracts import contract
+
+from alfred_json.codec import JsonCodec
+
+
+class JsonStreamEncoder:
+    """
+    Encodes iterables to JSON arrays, item by item.
+
+    Items are consumed lazily, and encoded items are yielded in chunks of
+    roughly chunk_size bytes, so memory usage does not grow with the number of
+    items.
+    """
+
+    @contract
+    def __init__(self, codec: JsonCodec, chunk_size: int = 16384):
+        self._codec = codec
+        self._chunk_size = chunk_size
+
+    @contract
+    def iterencode(self, items: Iterable, serializer: Callable) -> Iterator:
+        """
+        Encodes items to a JSON array.
+        :param items: The items to encode.
+        :param serializer: Converts a single item to JSON data.
+        :return: Iterator[bytes]
+        """
+        encode = self._codec.encode
+        return self.splice(encode(serializer(item)) for item in items)
+
+    @contract
+    def iterencode_lines(self, items: Iterable,
+                         serializer: Callable) -> Iterator:
+        """
+        Encodes items to newline-delimited JSON, one item per line.
+        :param items: The items to encode.
+        :param serializer: Converts a single item to JSON data.
+        :return: Iterator[bytes]
+        """
+        encode = self._codec.encode
+        return self.splice_lines(encode(serializer(item)) for item in items)
+
+    @contract
+    def splice(self, encoded_items: Iterable) -> Iterator:
+        """
+        Joins items that were encoded already to a JSON array.
+        :param encoded_items: Iterable[bytes]
+        :return: Iterator[bytes]
+        """
+        chunk_size = self._chunk_size
+        chunk = bytearray(b'[')
+        separator = b''
+        for encoded_item in encoded_items:
+            chunk += separator
+            chunk += encoded_item
+            separator = b','
+            if len(chunk) >= chunk_size:
+                yield bytes(chunk)
+                chunk = bytearray()
+        chunk += b']'
+        yield bytes(chunk)
+
+    @contract
+    def splice_lines(self, encoded_items: Iterable) -> Iterator:
+        """
+        Joins items that were encoded already to newline-delimited JSON.
+        :param encoded_items: Iterable[bytes]
+        :return: Iterator[bytes]
+        """
+        chunk_size = self._chunk_size
+        chunk = bytearray()
+        for encoded_item in encoded_items:
+            chunk += encoded_item
+            chunk += b'\n'
+            if len(chunk) >= chunk_size:
+                yield bytes(chunk)
+                chunk = bytearray()
+        if chunk:
+            yield bytes(chunk)
+
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+class JsonStreamDecoder:
+    """
+    Decodes JSON arrays from chunks of UTF-8 encoded bytes, item by item.
+
+    Chunks are consumed lazily, and only the item that is being decoded is
+    buffered, so memory usage is bounded by the size of the largest item
+    rather than that of the entire array.
+    """
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+
+    @contract
+    def iterdecode(self, chunks: Iterable) -> Iterator:
+        """
+        Decodes a JSON array.
+        :param chunks: Iterable[Union[bytes, str]]
+        :return: Iterator. The array's decoded items.
+        :raises ValueError: Raised (lazily) if the chunks do not form a valid
+          JSON array.
+        """
+        reader = _JsonArrayReader(self._decoder, chunks)
+        try:
+            yield from reader.read_items()
+        except UnicodeDecodeError as e:
+            raise ValueError(str(e))
+
+    @staticmethod
+    @contract
+    def iterlines(chunks: Iterable) -> Iterator:
+        """
+        Splits newline-delimited JSON into lines.
+
+        Only the line that is being read is buffered. Lines are not decoded,
+        so that callers can handle invalid lines individually.
+        :param chunks: Iterable[Union[bytes, str]]
+        :return: Iterator[Tuple[int, bytes]]. The 1-based line numbers and
+          contents of all non-blank lines.
+        """
+        # The parts of the current line.
+        parts = []
+        line_number = 0
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            lines = chunk.split(b'\n')
+            for line in lines[:-1]:
+                parts.append(line)
+                line = b''.join(parts)
+                parts = []
+                line_number += 1
+                if line.strip():
+                    yield line_number, line
+            if lines[-1]:
+                parts.append(lines[-1])
+        line = b''.join(parts)
+        if line.strip():
+            yield line_number + 1, line
+
+
+class _JsonArrayReader:
+    def __init__(self, decoder: json.JSONDecoder, chunks: Iterable):
+        self._decoder = decoder
+        self._chunks = iter(chunks)
+        self._utf8_decoder = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._position = 0
+        # The number of characters that were discarded from the buffer.
+        self._offset = 0
+        self._exhausted = False
+
+    def read_items(self):
+        self._expect('[')
+        if self._peek() == ']':
+            self._position += 1
+        else:
+            while True:
+                yield self._read_item()
+                if self._expect(',]') == ']':
+                    break
+        if self._peek() is not None:
+            raise ValueError('Expected the end of the array at character %d.'
+                             % (self._offset + self._position))
+
+    def _read_item(self):
+        self._peek()
+        while True:
+            try:
+                item, end = self._decoder.raw_decode(self._buffer,
+                                                     self._position)
+            except json.JSONDecodeError as e:
+                if self._exhausted:
+                    raise ValueError(
+                        'Invalid array item at character %d: %s.' % (
+                            self._offset + self._position, e.msg))
+                self._read()
+                continue
+            # Numbers and literals may continue in the next chunk, so only
+            # accept values that are followed by more data.
+            if end == len(self._buffer) and not self._exhausted:
+                self._read()
+                continue
+            self._position = end
+            return item
+
+    def _read(self):
+        """
+        Reads chunks until the unread part of the buffer has doubled in size.
+
+        Growing the buffer geometrically prevents large items from being
+        re-parsed for every single chunk.
+        """
+        buffer = [self._buffer[self._position:]]
+        size = len(buffer[0])
+        target_size = max(2 * size, 1)
+        while size < target_size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                self._exhausted = True
+                buffer.append(self._utf8_decoder.decode(b'', final=True))
+                break
+            if isinstance(chunk, bytes):
+                chunk = self._utf8_decoder.decode(chunk)
+            buffer.append(chunk)
+            size += len(chunk)
+        self._buffer = ''.join(buffer)
+        self._offset += self._position
+        self._position = 0
+
+    def _peek(self):
+        """
+        Skips whitespace, and returns the next character, if there is any.
+        """
+        while True:
+            self._position = _WHITESPACE.match(self._buffer,
+                                               self._position).end()
+            if self._position < len(self._buffer):
+                return self._buffer[self._position]
+            if self._exhausted:
+                return None
+            self._read()
+
+    def _expect(self, characters: str) -> str:
+        character = self._peek()
+        if character is None or character not in characters:
+            raise ValueError('Expected one of "%s" at character %d.' % (
+                characters, self._offset + self._position))
+        self._position += 1
+        return character
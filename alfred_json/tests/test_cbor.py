@@ -0,0 +1,68 @@
+from math import isnan
+from unittest import TestCase
+
+from alfred_json.cbor import CborCodec
+
+DATA = {
+    'id': 'stage_1',
+    'label': 'Café',
+    'powered': True,
+    'dimmed': False,
+    'scene': None,
+    'luminosity': 0.5,
+    'channels': [0, 23, 24, 255, 256, 65536, 4294967296, -1, -24, -25],
+    'description': 'x' * 300,
+}
+
+
+class CborCodecTest(TestCase):
+    def testEncode(self):
+        # See RFC 7049, appendix A.
+        sut = CborCodec()
+        self.assertEqual(sut.encode({'a': 1, 'b': [2, 3]}),
+                         bytes.fromhex('a26161016162820203'))
+
+    def testEncodeShouldConvertKeysToStrings(self):
+        sut = CborCodec()
+        self.assertEqual(sut.decode(sut.encode({200: 'OK'})), {'200': 'OK'})
+
+    def testIterencode(self):
+        sut = CborCodec()
+        encoded = b''.join(sut.iterencode(range(3), lambda x: {'n': x}))
+        self.assertEqual(encoded[:1], b'\x9f')
+        self.assertEqual(sut.decode(encoded),
+                         [{'n': 0}, {'n': 1}, {'n': 2}])
+
+    def testDecode(self):
+        sut = CborCodec()
+        self.assertEqual(sut.decode(sut.encode(DATA)), DATA)
+
+    def testDecodeWithIndefiniteLengthItems(self):
+        # See RFC 7049, appendix A.
+        sut = CborCodec()
+        self.assertEqual(sut.decode(bytes.fromhex(
+            'bf6346756ef563416d7421ff')), {'Fun': True, 'Amt': -2})
+        self.assertEqual(sut.decode(bytes.fromhex('7f657374726561646d696e67ff')),
+                         'streaming')
+
+    def testDecodeWithHalfPrecisionFloat(self):
+        sut = CborCodec()
+        # See RFC 7049, appendix A.
+        for encoded, data in (('f90000', 0.0), ('f93c00', 1.0),
+                              ('f93e00', 1.5), ('f97bff', 65504.0),
+                              ('f90001', 5.960464477539063e-08),
+                              ('f90400', 6.103515625e-05),
+                              ('f9c400', -4.0), ('f97c00', float('inf')),
+                              ('f9fc00', float('-inf'))):
+            with self.subTest(encoded=encoded):
+                self.assertEqual(sut.decode(bytes.fromhex(encoded)), data)
+        self.assertTrue(isnan(sut.decode(bytes.fromhex('f97e00'))))
+
+    def testDecodeWithInvalidDataShouldRaiseValueError(self):
+        sut = CborCodec()
+        encoded = sut.encode(DATA)
+        for invalid in (b'', encoded[:-1], encoded + b'\xf6', b'\x41a',
+                        b'\xa1\x01\x01', b'\xff', '{}'):
+            with self.subTest(invalid=invalid):
+                with self.assertRaises(ValueError):
+                    sut.decode(invalid)
@@ -0,0 +1,60 @@
+from unittest import TestCase, skipUnless
+
+from alfred_json.codec import StdlibJsonCodec, OrjsonJsonCodec, JsonCodec
+from alfred_json.tests import JsonTestCase
+
+DATA = {
+    'id': 'stage_1',
+    'label': 'Café',
+    'powered': True,
+    'luminosity': 0.5,
+    'color': '#123456',
+    'tags': ['foo', 'bar'],
+}
+
+
+class StdlibJsonCodecTest(TestCase):
+    def testEncodeShouldReturnCompactUtf8Bytes(self):
+        sut = StdlibJsonCodec()
+        encoded = sut.encode(['Café', {'foo': 1}])
+        self.assertEqual(encoded, '["Café",{"foo":1}]'.encode('utf-8'))
+
+    def testDecodeWithBytes(self):
+        sut = StdlibJsonCodec()
+        self.assertEqual(sut.decode(sut.encode(DATA)), DATA)
+
+    def testDecodeWithString(self):
+        sut = StdlibJsonCodec()
+        self.assertEqual(sut.decode('{"foo":"Café"}'), {'foo': 'Café'})
+
+    def testDecodeWithInvalidJsonShouldRaiseValueError(self):
+        sut = StdlibJsonCodec()
+        with self.assertRaises(ValueError):
+            sut.decode(b'{"foo":')
+
+
+@skipUnless(OrjsonJsonCodec.is_available(), 'orjson is not installed.')
+class OrjsonJsonCodecTest(TestCase):
+    def testEncodeShouldMatchStdlibJsonCodec(self):
+        sut = OrjsonJsonCodec()
+        self.assertEqual(sut.encode(DATA), StdlibJsonCodec().encode(DATA))
+
+    def testEncodeWithNonStringKeys(self):
+        sut = OrjsonJsonCodec()
+        self.assertEqual(sut.encode({200: 'OK'}), b'{"200":"OK"}')
+
+    def testDecode(self):
+        sut = OrjsonJsonCodec()
+        self.assertEqual(sut.decode(sut.encode(DATA)), DATA)
+
+    def testDecodeWithInvalidJsonShouldRaiseValueError(self):
+        sut = OrjsonJsonCodec()
+        with self.assertRaises(ValueError):
+            sut.decode(b'{"foo":')
+
+
+class JsonExtensionCodecTest(JsonTestCase):
+    def testCodecShouldBeAvailable(self):
+        sut = self._app.service('json', 'codec')
+        self.assertIsInstance(sut, JsonCodec)
+        self.assertTrue(sut.is_available())
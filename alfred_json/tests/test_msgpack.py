@@ -0,0 +1,43 @@
+from unittest import TestCase
+
+from alfred_json.msgpack import MsgpackCodec
+
+DATA = {
+    'id': 'stage_1',
+    'label': 'Café',
+    'powered': True,
+    'dimmed': False,
+    'scene': None,
+    'luminosity': 0.5,
+    'channels': [0, 127, 128, 255, 256, 65536, 4294967296, -1, -32, -33,
+                 -129, -32769, -2147483649],
+    'description': 'x' * 300,
+}
+
+
+class MsgpackCodecTest(TestCase):
+    def testEncode(self):
+        sut = MsgpackCodec()
+        self.assertEqual(sut.encode({'compact': True, 'schema': 0}),
+                         b'\x82\xa7compact\xc3\xa6schema\x00')
+
+    def testEncodeShouldConvertKeysToStrings(self):
+        sut = MsgpackCodec()
+        self.assertEqual(sut.decode(sut.encode({200: 'OK'})), {'200': 'OK'})
+
+    def testEncodeShouldConvertTuplesToArrays(self):
+        sut = MsgpackCodec()
+        self.assertEqual(sut.decode(sut.encode((1, 2, 3))), [1, 2, 3])
+
+    def testDecode(self):
+        sut = MsgpackCodec()
+        self.assertEqual(sut.decode(sut.encode(DATA)), DATA)
+
+    def testDecodeWithInvalidDataShouldRaiseValueError(self):
+        sut = MsgpackCodec()
+        encoded = sut.encode(DATA)
+        for invalid in (b'', encoded[:-1], encoded + b'\xc0', b'\xc4\x01a',
+                        b'\x81\x01\x01', '{}'):
+            with self.subTest(invalid=invalid):
+                with self.assertRaises(ValueError):
+                    sut.decode(invalid)
@@ -2,7 +2,7 @@ from copy import copy
 from unittest import TestCase
 
 from alfred_json.rewriter import IdentifiableDataTypeAggregator, Rewriter, \
-    NestedRewriter
+    NestedRewriter, VisitorRewriter, SubschemaDeduplicator
 from alfred_json.type import IdentifiableDataType
 from alfred_rest.tests import RestTestCase
 
@@ -312,3 +312,156 @@ class NestedRewriterTest(RestTestCase):
         }
         rewritten_schema = sut.rewrite(original_schema)
         self.assertEqual(rewritten_schema, expected_schema)
+
+    class KeyCountingRewriter(VisitorRewriter):
+        def __init__(self):
+            self.keys = []
+
+        def visit_key(self, key, value, traversal):
+            self.keys.append(key)
+            return value
+
+    class PointerRewriter(VisitorRewriter):
+        def visit_pointer(self, key, pointer, traversal):
+            return pointer.replace('example.com', 'example.org')
+
+    def testRewriteWithVisitorRewritersShouldTraverseOnce(self):
+        class FooDataType(IdentifiableDataType):
+            def __init__(self):
+                super().__init__('Foo')
+
+            def get_json_schema(self):
+                return {
+                    '$ref': 'https://example.com/foo',
+                }
+        counting_rewriter = self.KeyCountingRewriter()
+        sut = NestedRewriter()
+        sut.add_rewriter(IdentifiableDataTypeAggregator())
+        sut.add_rewriter(counting_rewriter)
+        sut.add_rewriter(self.PointerRewriter())
+        original_schema = {
+            'id': 'https://example.com/schema',
+            'foo': FooDataType(),
+        }
+        expected_schema = {
+            'id': 'https://example.org/schema',
+            'foo': {
+                '$ref': '#/definitions/data/Foo',
+            },
+            'definitions': {
+                'data': {
+                    'Foo': {
+                        '$ref': 'https://example.org/foo',
+                    },
+                },
+            },
+        }
+        rewritten_schema = sut.rewrite(original_schema)
+        self.assertEqual(rewritten_schema, expected_schema)
+        self.assertCountEqual(counting_rewriter.keys,
+                              ['id', 'foo', '$ref', '$ref'])
+
+    def testRewriteWithVisitorAndOtherRewriters(self):
+        sut = NestedRewriter()
+        sut.add_rewriter(self.PointerRewriter())
+        sut.add_rewriter(self.DogRewriter())
+        sut.add_rewriter(self.PointerRewriter())
+        original_schema = {
+            '$ref': 'https://example.com/schema',
+            'required': [],
+        }
+        expected_schema = {
+            '$ref': 'https://example.org/schema',
+            'required': ['woof'],
+        }
+        rewritten_schema = sut.rewrite(original_schema)
+        self.assertEqual(rewritten_schema, expected_schema)
+        # Visitor rewriters copy schemas.
+        self.assertEqual(original_schema['$ref'], 'https://example.com/schema')
+
+
+class SubschemaDeduplicatorTest(TestCase):
+    COLOR_SCHEMA = {
+        'type': 'array',
+        'items': {
+            'type': 'number',
+            'title': 'A color value.',
+            'minimum': 0,
+            'maximum': 255,
+        },
+    }
+
+    def testRewriteWithoutDuplicates(self):
+        original_schema = {
+            'type': 'object',
+            'properties': {
+                'color': self.COLOR_SCHEMA,
+            },
+        }
+        sut = SubschemaDeduplicator()
+        self.assertEqual(sut.rewrite(original_schema), original_schema)
+
+    def testRewriteWithDuplicates(self):
+        original_schema = {
+            'type': 'object',
+            'properties': {
+                'foreground': self.COLOR_SCHEMA,
+                'background': self.COLOR_SCHEMA,
+            },
+            'definitions': {
+                'data': {
+                    'Color': {
+                        'oneOf': [
+                            self.COLOR_SCHEMA,
+                        ],
+                    },
+                },
+            },
+        }
+        sut = SubschemaDeduplicator()
+        rewritten_schema = sut.rewrite(original_schema)
+        shared_definitions = rewritten_schema['definitions']['subschema']
+        # Nested duplicates that are referenced once only must be inlined.
+        self.assertEqual(list(shared_definitions.values()),
+                         [self.COLOR_SCHEMA])
+        reference = {
+            '$ref': '#/definitions/subschema/%s' % list(shared_definitions)[0],
+        }
+        self.assertEqual(rewritten_schema['properties'], {
+            'foreground': reference,
+            'background': reference,
+        })
+        self.assertEqual(rewritten_schema['definitions']['data'], {
+            'Color': {
+                'oneOf': [
+                    reference,
+                ],
+            },
+        })
+
+    def testRewriteShouldNotMoveSchemasWithIds(self):
+        color_schema = dict(self.COLOR_SCHEMA, id='https://example.com/color')
+        original_schema = {
+            'type': 'object',
+            'properties': {
+                'foreground': color_schema,
+                'background': color_schema,
+            },
+        }
+        sut = SubschemaDeduplicator()
+        self.assertEqual(sut.rewrite(original_schema), original_schema)
+
+    def testRewriteShouldNotMoveSmallSchemas(self):
+        original_schema = {
+            'type': 'object',
+            'properties': {
+                'foreground': {
+                    'type': 'string',
+                },
+                'background': {
+                    'type': 'string',
+                },
+            },
+        }
+        sut = SubschemaDeduplicator()
+        self.assertEqual(sut.rewrite(original_schema), original_schema)
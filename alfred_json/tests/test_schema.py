@@ -1,4 +1,11 @@
-from alfred_json.schema import SchemaProxy, SchemaNotFound
+import json
+import os
+import stat
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from alfred_json.schema import SchemaProxy, SchemaNotFound, SchemaCache
 from alfred_json.tests import JsonTestCase
 
 
@@ -24,3 +31,83 @@ class SchemaProxyTest(JsonTestCase):
         schema_id = 'http://json-schema.org/draft-04/schema#'
         sut = SchemaProxy()
         self.assertIn(schema_id, sut.get_schemas())
+
+
+class SchemaCacheTest(TestCase):
+    SCHEMA = {
+        'id': 'https://example.com/schema#',
+        'type': 'string',
+    }
+
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def testGetKeyShouldIgnoreKeyOrder(self):
+        sut = SchemaCache(self._directory.name)
+        reordered_schema = {
+            'type': 'string',
+            'id': 'https://example.com/schema#',
+        }
+        self.assertEqual(sut.get_key(self.SCHEMA),
+                         sut.get_key(reordered_schema))
+
+    def testGetKeyShouldChangeWithSchema(self):
+        sut = SchemaCache(self._directory.name)
+        changed_schema = dict(self.SCHEMA, type='number')
+        self.assertNotEqual(sut.get_key(self.SCHEMA),
+                            sut.get_key(changed_schema))
+
+    def testAdd(self):
+        sut = SchemaCache(os.path.join(self._directory.name, 'schemas'))
+        key = sut.get_key(self.SCHEMA)
+        self.assertFalse(sut.has(key))
+        sut.add(key, self.SCHEMA)
+        self.assertTrue(sut.has(key))
+        with open(os.path.join(sut.directory, '%s.json' % key)) as f:
+            self.assertEqual(json.load(f), self.SCHEMA)
+
+    def testAddShouldCreatePrivateDirectory(self):
+        sut = SchemaCache(os.path.join(self._directory.name, 'schemas'))
+        sut.add(sut.get_key(self.SCHEMA), self.SCHEMA)
+        self.assertEqual(stat.S_IMODE(os.stat(sut.directory).st_mode), 0o700)
+
+    def testHasShouldNotTrustEntriesOthersCanWrite(self):
+        sut = SchemaCache(os.path.join(self._directory.name, 'schemas'))
+        key = sut.get_key(self.SCHEMA)
+        sut.add(key, self.SCHEMA)
+        path = os.path.join(sut.directory, '%s.json' % key)
+        os.chmod(path, 0o666)
+        self.assertFalse(sut.has(key))
+        os.chmod(path, 0o600)
+        os.chmod(sut.directory, 0o777)
+        self.assertFalse(sut.has(key))
+
+    def testHasShouldNotTrustSymbolicLinks(self):
+        sut = SchemaCache(os.path.join(self._directory.name, 'schemas'))
+        key = sut.get_key(self.SCHEMA)
+        sut.add(key, self.SCHEMA)
+        path = os.path.join(sut.directory, '%s.json' % key)
+        os.rename(path, path + '.target')
+        os.symlink(path + '.target', path)
+        self.assertFalse(sut.has(key))
+
+
+class CachedSchemaProxyTest(JsonTestCase):
+    def setUp(self):
+        super().setUp()
+        self._directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        super().tearDown()
+        self._directory.cleanup()
+
+    def testGetSchemasShouldVerifySchemasOnce(self):
+        cache = SchemaCache(self._directory.name)
+        SchemaProxy(cache).get_schemas()
+        self.assertTrue(os.listdir(self._directory.name))
+        with patch('alfred_json.schema.validator_for') as validator_for:
+            SchemaProxy(cache).get_schemas()
+            validator_for.assert_not_called()
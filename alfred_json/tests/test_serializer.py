@@ -0,0 +1,202 @@
+from unittest import TestCase
+
+from alfred_json.serializer import SerializerCompiler
+from alfred_json.type import OutputDataType, Property, ListType, ScalarType, \
+    OneOfComplexType, IdentifiableDataType
+
+
+class Fruit:
+    def __init__(self, name, kind, color):
+        self.name = name
+        self.kind = kind
+        self.color = color
+
+
+class ColorType(OutputDataType):
+    def get_json_schema(self):
+        return {
+            'type': 'string',
+        }
+
+    def to_json(self, data):
+        return '#%s' % data
+
+
+class FruitType(IdentifiableDataType, OutputDataType):
+    def __init__(self, name='fruit'):
+        super().__init__(name)
+        self._color_type = ColorType()
+
+    def get_json_schema(self):
+        return {
+            'type': 'object',
+            'properties': {
+                'name': {
+                    'type': 'string',
+                },
+                'kind': {
+                    'type': 'string',
+                },
+                'color': self._color_type,
+            },
+            'required': ['name', 'kind'],
+        }
+
+    def to_json(self, data):
+        return {
+            'name': data.name,
+            'kind': data.kind,
+            'color': self._color_type.to_json(data.color),
+        }
+
+    def get_properties(self):
+        return [
+            Property('name'),
+            Property('kind', ScalarType({
+                'type': 'string',
+            })),
+            Property('color', self._color_type),
+        ]
+
+
+class UndescribedFruitType(FruitType):
+    def get_properties(self):
+        return None
+
+
+class RipenessType(OutputDataType):
+    def get_json_schema(self):
+        return {
+            'type': 'object',
+            'properties': {
+                'ripe': {
+                    'type': 'boolean',
+                },
+            },
+        }
+
+    def to_json(self, data):
+        return {
+            'ripe': data.ripe,
+        }
+
+
+class RipeFruitType(FruitType, RipenessType):
+    """
+    Overrides to_json() without describing its additional properties.
+    """
+
+    def to_json(self, data):
+        json_data = FruitType.to_json(self, data)
+        json_data.update(RipenessType.to_json(self, data))
+        return json_data
+
+
+class SerializerCompilerTest(TestCase):
+    def testGetSerializerWithProperties(self):
+        data_type = FruitType()
+        data = Fruit('Apple', 'fruit', 'FF0000')
+        sut = SerializerCompiler()
+        self.assertEqual(sut.get_serializer(data_type)(data),
+                         data_type.to_json(data))
+
+    def testGetSerializerWithInheritedProperties(self):
+        data_type = RipeFruitType()
+        data = Fruit('Apple', 'fruit', 'FF0000')
+        data.ripe = True
+        sut = SerializerCompiler()
+        self.assertEqual(sut.get_serializer(data_type)(data),
+                         data_type.to_json(data))
+
+    def testGetSerializerWithoutProperties(self):
+        data_type = ColorType()
+        sut = SerializerCompiler()
+        self.assertEqual(sut.get_serializer(data_type)('00FF00'), '#00FF00')
+
+    def testGetSerializerWithListType(self):
+        data_type = ListType(FruitType())
+        data = [Fruit('Apple', 'fruit', 'FF0000'),
+                Fruit('Banana', 'fruit', 'FFFF00')]
+        sut = SerializerCompiler()
+        self.assertEqual(sut.get_serializer(data_type)(data),
+                         data_type.to_json(data))
+
+    def testGetSerializerWithOneOfComplexType(self):
+        data_type = OneOfComplexType(FruitType(), 'kind', lambda x: x.kind)
+        data_type.add_concrete_type(FruitType('fruit'))
+        sut = SerializerCompiler()
+        serializer = sut.get_serializer(data_type)
+        # Add a concrete type after compilation.
+        data_type.add_concrete_type(FruitType('berry'))
+        data = Fruit('Strawberry', 'berry', 'FF0000')
+        self.assertEqual(serializer(data), data_type.to_json(data))
+
+    def testGetSerializerShouldCachePerType(self):
+        data_type = FruitType()
+        sut = SerializerCompiler()
+        self.assertIs(sut.get_serializer(data_type),
+                      sut.get_serializer(data_type))
+        self.assertIsNot(sut.get_serializer(data_type),
+                         sut.get_serializer(FruitType()))
+
+    def testGetSerializerWithFields(self):
+        data_type = FruitType()
+        # The color is never read.
+        data = Fruit('Apple', 'fruit', None)
+        sut = SerializerCompiler()
+        self.assertEqual(sut.get_serializer(data_type, {'name'})(data), {
+            'name': 'Apple',
+        })
+
+    def testGetSerializerWithFieldsShouldApplyToListItems(self):
+        data_type = ListType(FruitType())
+        data = [Fruit('Apple', 'fruit', None)]
+        sut = SerializerCompiler()
+        self.assertEqual(sut.get_serializer(data_type, {'kind'})(data), [{
+            'kind': 'fruit',
+        }])
+
+    def testGetSerializerWithFieldsShouldApplyToConcreteTypes(self):
+        data_type = OneOfComplexType(FruitType(), 'kind', lambda x: x.kind)
+        data_type.add_concrete_type(FruitType('berry'))
+        data = Fruit('Strawberry', 'berry', None)
+        sut = SerializerCompiler()
+        self.assertEqual(sut.get_serializer(data_type, {'name'})(data), {
+            'name': 'Strawberry',
+        })
+
+    def testGetSerializerWithFieldsWithoutProperties(self):
+        data_type = UndescribedFruitType()
+        data = Fruit('Apple', 'fruit', 'FF0000')
+        sut = SerializerCompiler()
+        self.assertEqual(sut.get_serializer(data_type, {'color'})(data), {
+            'color': '#FF0000',
+        })
+
+    def testGetSerializerShouldCachePerFields(self):
+        data_type = FruitType()
+        sut = SerializerCompiler()
+        self.assertIs(sut.get_serializer(data_type, {'name'}),
+                      sut.get_serializer(data_type, frozenset(['name'])))
+        self.assertIsNot(sut.get_serializer(data_type, {'name'}),
+                         sut.get_serializer(data_type))
+
+    def testGetSerializerShouldIgnoreUnknownFields(self):
+        data_type = FruitType()
+        sut = SerializerCompiler()
+        serializer = sut.get_serializer(data_type, {'name'})
+        self.assertIs(sut.get_serializer(data_type, {'name', 'foo'}),
+                      serializer)
+        self.assertEqual(serializer(Fruit('Apple', 'fruit', None)), {
+            'name': 'Apple',
+        })
+
+    def testGetSerializerShouldCacheMostRecentlyUsedFields(self):
+        data_type = UndescribedFruitType()
+        sut = SerializerCompiler(2)
+        serializer = sut.get_serializer(data_type, {'name'})
+        sut.get_serializer(data_type, {'kind'})
+        self.assertIs(sut.get_serializer(data_type, {'name'}), serializer)
+        sut.get_serializer(data_type, {'color'})
+        sut.get_serializer(data_type, {'kind'})
+        self.assertIsNot(sut.get_serializer(data_type, {'name'}), serializer)
@@ -0,0 +1,111 @@
+import json
+from unittest import TestCase
+
+from alfred_json.codec import StdlibJsonCodec
+from alfred_json.stream import JsonStreamEncoder, JsonStreamDecoder
+
+
+class JsonStreamEncoderTest(TestCase):
+    def testIterencodeWithoutItems(self):
+        sut = JsonStreamEncoder(StdlibJsonCodec())
+        self.assertEqual(list(sut.iterencode([], str)), [b'[]'])
+
+    def testIterencodeShouldEncodeArray(self):
+        sut = JsonStreamEncoder(StdlibJsonCodec())
+        chunks = sut.iterencode(range(3), lambda x: {'number': x})
+        self.assertEqual(json.loads(b''.join(chunks).decode('utf-8')), [
+            {'number': 0},
+            {'number': 1},
+            {'number': 2},
+        ])
+
+    def testIterencodeShouldYieldChunks(self):
+        sut = JsonStreamEncoder(StdlibJsonCodec(), chunk_size=1)
+        chunks = list(sut.iterencode(['foo', 'bar'], str))
+        self.assertEqual(chunks, [b'["foo"', b',"bar"', b']'])
+
+    def testIterencodeShouldConsumeItemsLazily(self):
+        consumed = []
+
+        def _items():
+            for item in range(3):
+                consumed.append(item)
+                yield item
+        sut = JsonStreamEncoder(StdlibJsonCodec(), chunk_size=1)
+        chunks = sut.iterencode(_items(), str)
+        next(chunks)
+        self.assertEqual(consumed, [0])
+
+    def testIterencodeLines(self):
+        sut = JsonStreamEncoder(StdlibJsonCodec(), chunk_size=1)
+        chunks = list(sut.iterencode_lines(['foo', 'bar'], str))
+        self.assertEqual(chunks, [b'"foo"\n', b'"bar"\n'])
+
+    def testSplice(self):
+        sut = JsonStreamEncoder(StdlibJsonCodec(), chunk_size=1)
+        chunks = list(sut.splice([b'{"id":"foo"}', b'1']))
+        self.assertEqual(chunks, [b'[{"id":"foo"}', b',1', b']'])
+
+    def testSpliceLines(self):
+        sut = JsonStreamEncoder(StdlibJsonCodec())
+        self.assertEqual(list(sut.splice_lines([b'"foo"', b'1'])),
+                         [b'"foo"\n1\n'])
+
+
+class JsonStreamDecoderTest(TestCase):
+    ITEMS = [
+        {'id': 'foo', 'label': 'Café', 'tags': ['bar', None]},
+        123456789,
+        12.5,
+        'baz',
+        True,
+        None,
+        [],
+    ]
+
+    def testIterdecodeWithoutItems(self):
+        sut = JsonStreamDecoder()
+        self.assertEqual(list(sut.iterdecode([b' [ ] '])), [])
+
+    def testIterdecodeWithSingleChunk(self):
+        sut = JsonStreamDecoder()
+        chunks = [json.dumps(self.ITEMS).encode('utf-8')]
+        self.assertEqual(list(sut.iterdecode(chunks)), self.ITEMS)
+
+    def testIterdecodeWithSplitChunks(self):
+        # Split numbers, literals, and multibyte characters across chunks.
+        encoded = json.dumps(self.ITEMS, ensure_ascii=False).encode('utf-8')
+        sut = JsonStreamDecoder()
+        for chunk_size in range(1, 8):
+            chunks = [encoded[i:i + chunk_size]
+                      for i in range(0, len(encoded), chunk_size)]
+            self.assertEqual(list(sut.iterdecode(chunks)), self.ITEMS)
+
+    def testIterdecodeShouldConsumeChunksLazily(self):
+        consumed = []
+
+        def _chunks():
+            for chunk in (b'["foo",', b'"bar",', b'"baz"', b']'):
+                consumed.append(chunk)
+                yield chunk
+        sut = JsonStreamDecoder()
+        items = sut.iterdecode(_chunks())
+        self.assertEqual(next(items), 'foo')
+        self.assertNotIn(b']', consumed)
+
+    def testIterdecodeWithInvalidJsonShouldRaiseValueError(self):
+        sut = JsonStreamDecoder()
+        for encoded in (b'', b'{}', b'["foo"', b'["foo",]', b'["foo" 1]',
+                        b'["foo"]1', b'["\xff"]'):
+            with self.subTest(encoded=encoded):
+                with self.assertRaises(ValueError):
+                    list(sut.iterdecode([encoded]))
+
+    def testIterlinesWithSplitChunks(self):
+        sut = JsonStreamDecoder()
+        chunks = [b'{"foo"', b': 1}\n\n  \n[]', '\n"bar"']
+        self.assertEqual(list(sut.iterlines(chunks)), [
+            (1, b'{"foo": 1}'),
+            (4, b'[]'),
+            (5, b'"bar"'),
+        ])
@@ -2,7 +2,7 @@ from unittest import TestCase
 
 from alfred.tests import data_provider
 from alfred_json.type import ListType, ScalarType, OutputDataType, \
-    InputDataType
+    InputDataType, build_sparse_json_schema
 
 SCHEMA = {
     'type': 'object',
@@ -103,3 +103,40 @@ class ScalarTypeTest(TestCase):
         })
         data = 3
         self.assertEquals(sut.from_json(data), 3)
+
+
+class BuildSparseJsonSchemaTest(TestCase):
+    class FruitsType(OutputDataType):
+        def get_json_schema(self):
+            return {
+                'allOf': [
+                    SCHEMA,
+                    {
+                        'oneOf': [SCHEMA],
+                    },
+                ],
+            }
+
+        def to_json(self, data):
+            return data
+
+    def testBuildSparseJsonSchema(self):
+        data_type = ListType(self.FruitsType())
+        sparse_schema = dict(SCHEMA)
+        del sparse_schema['required']
+        self.assertEqual(build_sparse_json_schema(data_type), {
+            'type': 'array',
+            'items': {
+                'allOf': [
+                    sparse_schema,
+                    {
+                        'allOf': [
+                            {
+                                'anyOf': [sparse_schema],
+                            },
+                        ],
+                    },
+                ],
+            },
+        })
+        self.assertIn('required', SCHEMA)
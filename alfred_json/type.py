@@ -1,5 +1,5 @@
 import abc
-from typing import Dict, Callable
+from typing import Dict, Callable, AbstractSet
 
 from contracts import contract
 
@@ -11,11 +11,93 @@ class DataType:
         pass
 
 
+class Property:
+    """
+    Describes a JSON object property, and the attribute its value is read from.
+    """
+
+    @contract
+    def __init__(self, name: str, data_type=None, attribute=None):
+        """
+
+        :param name: The JSON property name.
+        :param data_type: Optional[OutputDataType]. The type of the property's
+          value, or None for scalar values, which are output as they are.
+        :param attribute: Optional[str]. The name of the attribute to read the
+          value from. Defaults to the property name.
+        """
+        assert data_type is None or isinstance(data_type, OutputDataType)
+        self._name = name
+        self._data_type = data_type
+        self._attribute = attribute if attribute is not None else name
+        assert self._attribute.isidentifier()
+
+    @property
+    @contract
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def data_type(self):
+        """
+        :return: Optional[OutputDataType]
+        """
+        return self._data_type
+
+    @property
+    @contract
+    def attribute(self) -> str:
+        return self._attribute
+
+
 class OutputDataType(DataType):
     @abc.abstractmethod
     def to_json(self, data):
         pass
 
+    def get_properties(self):
+        """
+        Describes the properties of the JSON objects this type outputs.
+
+        Types that output objects by reading attributes from their data SHOULD
+        describe these properties, so they can be serialized by compiled
+        serializers. See alfred_json.serializer.SerializerCompiler.
+        :return: Optional[Iterable[Property]]. None if the type cannot describe
+          its output as properties.
+        """
+        return None
+
+    def compile_serializer(self, compiler) -> Callable:
+        """
+        Compiles a specialized equivalent of self.to_json().
+
+        This is only called for types that do not describe their properties.
+        :param compiler: alfred_json.serializer.SerializerCompiler
+        :return: Callable
+        """
+        return self.to_json
+
+
+@contract
+def get_described_properties(data_type: OutputDataType):
+    """
+    Gets the properties a type describes, if they describe its output.
+
+    Types inherit get_properties() along with to_json(), so a type that
+    overrides to_json() without also overriding get_properties() would
+    otherwise describe the output of the type it extends, rather than its own.
+    :return: Optional[Iterable[Property]]
+    """
+    mro = type(data_type).__mro__
+
+    def _get_defining_class_index(method_name: str) -> int:
+        return next(index for index, cls in enumerate(mro) if
+                    method_name in vars(cls))
+    if _get_defining_class_index('get_properties') > \
+            _get_defining_class_index('to_json'):
+        return None
+    return data_type.get_properties()
+
 
 class InputDataType(DataType):
     @abc.abstractmethod
@@ -34,6 +116,33 @@ class UpdateInputDataType(DataType):
         """
         pass
 
+    def update_properties_from_json(self, json_data, instance,
+                                    names: AbstractSet):
+        """
+        Returns the instance, with some of its properties updated from
+        json_data.
+
+        Types that update instances property by property SHOULD override this,
+        so that the properties that did not change are not set again.
+        Otherwise, the other properties are read from the instance, if this
+        type can serialize it.
+        :param json_data: The instance's JSON object, with at least the
+          properties to update. Properties that are to be updated but are
+          absent are removed.
+        :param names: AbstractSet[str]. The names of the top-level properties
+          to update.
+        :return:
+        """
+        if isinstance(self, OutputDataType):
+            updated_json_data = self.to_json(instance)
+            for name in names:
+                if name in json_data:
+                    updated_json_data[name] = json_data[name]
+                else:
+                    updated_json_data.pop(name, None)
+            json_data = updated_json_data
+        return self.update_from_json(json_data, instance)
+
 
 class IdentifiableDataType(DataType):
     """
@@ -66,6 +175,9 @@ class ScalarType(OutputDataType, InputDataType):
     def to_json(self, data):
         return data
 
+    def compile_serializer(self, compiler):
+        return _identity
+
     @staticmethod
     @contract
     def _assert_valid_scalar_type(schema: Dict):
@@ -130,11 +242,24 @@ class OneOfComplexType(InputDataType, UpdateInputDataType, OutputDataType):
         return concrete_type.from_json(json_data)
 
     def update_from_json(self, json_data, instance):
-        concrete_type_name = json_data[self._concrete_type_name_key]
+        return self._get_concrete_update_type(
+            json_data[self._concrete_type_name_key]).update_from_json(
+            json_data, instance)
+
+    def update_properties_from_json(self, json_data, instance, names):
+        # The JSON data may lack the concrete type name, so take it from the
+        # instance being updated.
+        return self._get_concrete_update_type(
+            self._concrete_type_name_extractor(
+                instance)).update_properties_from_json(json_data, instance,
+                                                       names)
+
+    def _get_concrete_update_type(self,
+                                  concrete_type_name) -> UpdateInputDataType:
         concrete_type = self._concrete_types[concrete_type_name]
         if not isinstance(concrete_type, UpdateInputDataType):
             raise RuntimeError('%s must extend %s.' % (concrete_type.__class__, UpdateInputDataType))
-        return concrete_type.update_from_json(json_data, instance)
+        return concrete_type
 
     def to_json(self, data):
         concrete_type_name = self._concrete_type_name_extractor(data)
@@ -143,6 +268,26 @@ class OneOfComplexType(InputDataType, UpdateInputDataType, OutputDataType):
             raise RuntimeError('%s must extend %s.' % (concrete_type.__class__, OutputDataType))
         return concrete_type.to_json(data)
 
+    def compile_serializer(self, compiler):
+        extractor = self._concrete_type_name_extractor
+        concrete_types = self._concrete_types
+        serializers = {}
+
+        def _serialize(data):
+            concrete_type_name = extractor(data)
+            try:
+                serializer = serializers[concrete_type_name]
+            except KeyError:
+                # Compile concrete types lazily, because they may be added
+                # after this type was compiled.
+                concrete_type = concrete_types[concrete_type_name]
+                if not isinstance(concrete_type, OutputDataType):
+                    raise RuntimeError('%s must extend %s.' % (concrete_type.__class__, OutputDataType))
+                serializer = compiler.get_serializer(concrete_type)
+                serializers[concrete_type_name] = serializer
+            return serializer(data)
+        return _serialize
+
 
 class ListType(InputDataType, OutputDataType):
     @contract
@@ -153,6 +298,11 @@ class ListType(InputDataType, OutputDataType):
         }
         self._item_type = item_type
 
+    @property
+    @contract
+    def item_type(self) -> DataType:
+        return self._item_type
+
     def get_json_schema(self):
         return self._schema
 
@@ -163,3 +313,49 @@ class ListType(InputDataType, OutputDataType):
     def to_json(self, data):
         assert isinstance(self._item_type, OutputDataType)
         return list(map(self._item_type.to_json, data))
+
+    def compile_serializer(self, compiler):
+        assert isinstance(self._item_type, OutputDataType)
+        item_serializer = compiler.get_serializer(self._item_type)
+
+        def _serialize(data):
+            return [item_serializer(item) for item in data]
+        return _serialize
+
+
+def _identity(data):
+    return data
+
+
+@contract
+def build_sparse_json_schema(data_type: DataType) -> Dict:
+    """
+    Builds the schema of a data type's sparse fieldsets.
+
+    Sparse fieldsets are JSON objects that contain only some of their top-level
+    properties (see alfred_json.serializer.SerializerCompiler), so none of
+    these properties are required. Objects in lists, and in subschemas that
+    are combined through "allOf", "anyOf", or "oneOf" are sparse as well.
+    Because sparse objects may match more than one of the subschemas of
+    "oneOf", these are relaxed to "anyOf".
+    """
+    return _build_sparse_json_schema(data_type.get_json_schema())
+
+
+def _build_sparse_json_schema(schema) -> Dict:
+    if isinstance(schema, DataType):
+        schema = schema.get_json_schema()
+    schema = dict(schema)
+    schema.pop('required', None)
+    if 'array' == schema.get('type') and 'items' in schema:
+        schema['items'] = _build_sparse_json_schema(schema['items'])
+    for keyword in ('allOf', 'anyOf'):
+        if keyword in schema:
+            schema[keyword] = list(map(_build_sparse_json_schema,
+                                       schema[keyword]))
+    if 'oneOf' in schema:
+        schema['allOf'] = schema.get('allOf', []) + [{
+            'anyOf': list(map(_build_sparse_json_schema,
+                              schema.pop('oneOf'))),
+        }]
+    return schema
@@ -0,0 +1,135 @@
+"""
+Benchmarks the serialization of large device lists.
+
+Run this module through ./bin/benchmark.
+"""
+import json
+import sys
+import timeit
+from typing import Callable
+
+from contracts import contract
+
+from alfred.app import App
+from alfred_json.type import ListType
+from alfred_maison.device import Ola
+from alfred_maison.extension import MaisonExtension
+from alfred_rest.endpoints import JsonResponsePayloadType
+
+DEVICE_COUNT = 10000
+REPEAT = 5
+
+
+@contract
+def measure(subject: Callable, repeat: int = REPEAT) -> float:
+    """
+    Measures the fastest execution time of a callable, in seconds.
+    """
+    return min(timeit.repeat(subject, number=1, repeat=repeat))
+
+
+def build_devices(count: int):
+    # Share the same DMX channels, because we never change the devices' state.
+    return [Ola('stage_%d' % index, 1, 2, 3, 4, label='Stage %d' % index)
+            for index in range(count)]
+
+
+def format_result(name: str, size: int, seconds: float, count: int) -> str:
+    return '%-40s %10d bytes %8.2f ms %8.1f MB/s %10d devices/s' % (
+        name, size, seconds * 1000, size / seconds / 1000000,
+        count / seconds)
+
+
+def benchmark_json_codecs(app: App, count: int = DEVICE_COUNT):
+    devices = build_devices(count)
+    list_type = ListType(app.service('device', 'device_resources').get_type())
+    json_data = list_type.to_json(devices)
+
+    encoders = [
+        ('json.dumps() (legacy)', lambda: json.dumps(json_data).encode('utf-8')),
+    ]
+    for codec in app.services(tag='json_codec'):
+        if codec.is_available():
+            encoders.append((type(codec).__name__,
+                             lambda codec=codec: codec.encode(json_data)))
+
+    yield 'Encoding %d devices:' % count
+    for name, encode in encoders:
+        yield format_result(name, len(encode()), measure(encode), count)
+
+    codec = app.service('json', 'codec')
+    serializer = app.service('json', 'serializers').get_serializer(list_type)
+    serializers = [
+        ('to_json()', list_type.to_json),
+        ('compiled serializer', serializer),
+    ]
+    yield 'Serializing and encoding %d devices with %s:' % (
+        count, type(codec).__name__)
+    for name, serialize in serializers:
+        yield format_result(
+            '%s and encode()' % name,
+            len(codec.encode(serialize(devices))),
+            measure(lambda: codec.encode(serialize(devices))), count)
+
+
+def benchmark_payload_formats(app: App, count: int = DEVICE_COUNT):
+    devices = build_devices(count)
+    list_type = ListType(app.service('device', 'device_resources').get_type())
+    json_data = list_type.to_json(devices)
+    codecs = [
+        ('JSON (%s)' % type(app.service('json', 'codec')).__name__,
+         app.service('json', 'codec')),
+        ('MessagePack', app.service('json', 'msgpack_codec')),
+        ('CBOR', app.service('json', 'cbor_codec')),
+    ]
+    for name, data, data_count in (
+            ('a single device', json_data[0], 1),
+            ('%d devices' % count, json_data, count)):
+        yield 'Encoding and decoding %s:' % name
+        for codec_name, codec in codecs:
+            encoded = codec.encode(data)
+            yield format_result('%s encode()' % codec_name, len(encoded),
+                                measure(lambda: codec.encode(data)),
+                                data_count)
+            yield format_result('%s decode()' % codec_name, len(encoded),
+                                measure(lambda: codec.decode(encoded)),
+                                data_count)
+
+
+def benchmark_encoded_resources(app: App, count: int = DEVICE_COUNT):
+    devices = build_devices(count)
+    list_type = ListType(app.service('device', 'device_resources').get_type())
+    payload_type = JsonResponsePayloadType(list_type)
+    encoded_resources = app.service('rest', 'encoded_resources')
+
+    def _encode():
+        return b''.join(payload_type.to_http_response_body(
+            devices, 'application/json').content)
+
+    def _encode_uncached():
+        encoded_resources.representations.clear()
+        return _encode()
+
+    yield 'Encoding %d devices as a JSON response body:' % count
+    size = len(_encode())
+    yield format_result('Uncached representations', size,
+                        measure(_encode_uncached), count)
+    yield format_result('Cached representations', size, measure(_encode),
+                        count)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else DEVICE_COUNT
+    app = App()
+    app.add_extension(MaisonExtension)
+    with app:
+        for line in benchmark_json_codecs(app, count):
+            print(line)
+        for line in benchmark_payload_formats(app, count):
+            print(line)
+        for line in benchmark_encoded_resources(app, count):
+            print(line)
+
+
+if __name__ == '__main__':
+    main()
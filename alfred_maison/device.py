@@ -6,6 +6,7 @@ from alfred_device.device import Rgb24Colorable, Powerable, Device, \
 from alfred_device.resource import PowerableType, DeviceType, \
     Rgb24ColorableType, IlluminativeType
 from alfred_json.type import InputDataType, UpdateInputDataType
+from alfred_rest.patch import get_changed_properties
 
 
 class OlaType(DeviceType, PowerableType, Rgb24ColorableType, IlluminativeType,
@@ -27,11 +28,14 @@ class OlaType(DeviceType, PowerableType, Rgb24ColorableType, IlluminativeType,
     def from_json(self, json_data):
         # We cannot really replace the entire resource, because it depends on
         #  internal, real-world factors, such as the DMX panel configuration.
-        #  Therefore we load the original resource and simply apply updates.
+        #  Therefore we load the original resource and simply apply updates
+        #  to the properties that changed, so unchanged values are not sent
+        #  to the DMX panel again.
         device_id = json_data['id']
         ola = App.current.service('device', 'devices').get_device(device_id)
         assert isinstance(ola, Ola)
-        return self.update_from_json(json_data, ola)
+        return self.update_properties_from_json(
+            json_data, ola, get_changed_properties(self, ola, json_data))
 
     def update_from_json(self, json_data, instance):
         assert isinstance(instance, Ola)
@@ -42,6 +46,14 @@ class OlaType(DeviceType, PowerableType, Rgb24ColorableType, IlluminativeType,
         instance = IlluminativeType.update_from_json(self, json_data, instance)
         return instance
 
+    def update_properties_from_json(self, json_data, instance, names):
+        assert isinstance(instance, Ola)
+        for data_type in (DeviceType, PowerableType, Rgb24ColorableType,
+                          IlluminativeType):
+            instance = data_type.update_properties_from_json(
+                self, json_data, instance, names)
+        return instance
+
     def to_json(self, data):
         json_data = {}
         json_data.update(DeviceType.to_json(self, data))
@@ -50,6 +62,12 @@ class OlaType(DeviceType, PowerableType, Rgb24ColorableType, IlluminativeType,
         json_data.update(IlluminativeType.to_json(self, data))
         return json_data
 
+    def get_properties(self):
+        return DeviceType.get_properties(self) + \
+            PowerableType.get_properties(self) + \
+            Rgb24ColorableType.get_properties(self) + \
+            IlluminativeType.get_properties(self)
+
 
 class Ola(Device, Powerable, Rgb24Colorable, Illuminative):
     def __init__(self, device_id, red_channel: int, green_channel: int,
@@ -84,6 +102,7 @@ class Ola(Device, Powerable, Rgb24Colorable, Illuminative):
         if not self.powered:
             luminosity = 0
         self._dmx.set(self._luminosity_channel, round(luminosity * 255))
+        self._changed()
 
     @property
     def color(self):
@@ -99,3 +118,4 @@ class Ola(Device, Powerable, Rgb24Colorable, Illuminative):
             self._green_channel: color.green,
             self._blue_channel: color.blue,
         })
+        self._changed()
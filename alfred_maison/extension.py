@@ -5,6 +5,7 @@ from alfred_device.resource import DeviceResourceRepository
 from alfred_maison.device import Ola, OlaType
 from alfred_maison.ola import DmxPanel
 from alfred_openapi.extension import OpenApiExtension
+from alfred_rest.index import HashIndex, SortedIndex
 from alfred_rest.extension import RestExtension
 
 
@@ -28,7 +29,13 @@ class MaisonExtension(Extension):
 
     @Extension.service(tags=('device_resources',))
     def _ola_device_resources(self):
-        return DeviceResourceRepository(OlaType(), App.current.service('maison', 'ola_devices'))
+        return DeviceResourceRepository(
+            OlaType(), App.current.service('maison', 'ola_devices'), (
+                HashIndex('label'),
+                HashIndex('powered'),
+                SortedIndex('luminosity'),
+                SortedIndex('label'),
+            ))
 
     @Extension.service()
     def _dmx_panel(self):
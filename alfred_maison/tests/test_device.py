@@ -0,0 +1,11 @@
+from alfred_maison.device import OlaType
+from alfred_maison.tests import MaisonTestCase
+
+
+class OlaTypeTest(MaisonTestCase):
+    def testCompiledSerializerShouldMatchToJson(self):
+        data_type = OlaType()
+        ola = self._app.service('device', 'devices').get_device('stage_1')
+        serializer = self._app.service(
+            'json', 'serializers').get_serializer(data_type)
+        self.assertEqual(serializer(ola), data_type.to_json(ola))
@@ -1,7 +1,12 @@
 import json
+from itertools import islice
 from unittest.mock import patch
 
+from alfred_device.resource import DeviceResourceRepository
+from alfred_maison.device import OlaType
 from alfred_maison.tests import MaisonTestCase
+from alfred_rest.endpoints import GetResourceEndpoint, \
+    GetResourcesEndpoint, JsonResponsePayloadType
 
 
 class GetStageLightEndpointTest(MaisonTestCase):
@@ -63,3 +68,225 @@ class AlterStageLightEndpointTest(MaisonTestCase):
         self.assertEqual(data['powered'], powered)
         self.assertEqual(data['color'], color)
         self.assertAlmostEqual(data['luminosity'], luminosity, places=0)
+
+    @patch('subprocess.call')
+    def testEndpointShouldOnlySetAlteredProperties(self, mock_call):
+        resource_id = 'stage_1'
+        label = 'Television'
+        response = self.request('device-alter', parameters={
+            'id': resource_id,
+        }, body=json.dumps([
+            {
+                'op': 'replace',
+                'path': '/label',
+                'value': label,
+            },
+        ]), headers={
+            'Content-Type': 'application/json-patch+json',
+            'Accept': 'application/json',
+        })
+        self.assertResponseStatus(200, response)
+        data = json.loads(response.body.content)
+        self.assertEqual(data['label'], label)
+        mock_call.assert_not_called()
+
+    @patch('subprocess.call')
+    def testEndpointShouldSkipUnchangedResource(self, mock_call):
+        resource_id = 'stage_1'
+        response = self.request('device', parameters={
+            'id': resource_id,
+        })
+        data = json.loads(response.body.content)
+        response = self.request('device-alter', parameters={
+            'id': resource_id,
+        }, body=json.dumps([
+            {
+                'op': 'replace',
+                'path': '/powered',
+                'value': data['powered'],
+            },
+        ]), headers={
+            'Content-Type': 'application/json-patch+json',
+        })
+        self.assertResponseStatus(200, response)
+        self.assertEqual(response.headers['X-Unchanged-Resources'], '1')
+        mock_call.assert_not_called()
+
+
+class ReplaceStageLightEndpointTest(MaisonTestCase):
+    @patch('subprocess.call')
+    def testEndpointShouldSkipUnchangedResource(self, mock_call):
+        resource_id = 'stage_1'
+        response = self.request('device', parameters={
+            'id': resource_id,
+        })
+        data = json.loads(response.body.content)
+        response = self.request('device-replace', parameters={
+            'id': resource_id,
+        }, body=json.dumps(data), headers={
+            'Content-Type': 'application/json',
+        })
+        self.assertResponseStatus(200, response)
+        self.assertEqual(response.headers['X-Unchanged-Resources'], '1')
+        mock_call.assert_not_called()
+
+
+class GetStageLightsEndpointTest(MaisonTestCase):
+    @patch('alfred_maison.ola.DmxPanel.get_multiple')
+    def testEndpointShouldNotReadUnrequestedFields(self, mock_get_multiple):
+        response = self.request('devices', parameters={
+            'fields': 'id,label,powered',
+        })
+        self.assertResponseStatus(200, response)
+        data = json.loads(response.body.content)
+        self.assertTrue(data)
+        for device_data in data:
+            self.assertCountEqual(device_data.keys(),
+                                  ['id', 'label', 'powered'])
+        mock_get_multiple.assert_not_called()
+
+    def testEndpointShouldNotReturnCachedResponsesForChangedDevices(self):
+        parameters = {
+            'fields': 'id,label',
+        }
+        response = self.request('devices', parameters=parameters)
+        self.assertResponseStatus(200, response)
+        cache = self._app.service('http', 'response_cache')
+        hits = cache.hits
+        self.assertEqual(response.body.content,
+                         self.request('devices',
+                                      parameters=parameters).body.content)
+        self.assertEqual(cache.hits, hits + 1)
+        self._app.service('device', 'devices').get_device(
+            'stage_1').label = 'Television'
+        response = self.request('devices', parameters=parameters)
+        data = json.loads(response.body.content)
+        self.assertIn({
+            'id': 'stage_1',
+            'label': 'Television',
+        }, data)
+
+    @patch('subprocess.call')
+    def testEndpointShouldFilterDirectlyChangedDevices(self, mock_call):
+        parameters = {
+            'fields': 'id',
+            'filter[powered]': 'true',
+        }
+        response = self.request('devices', parameters=parameters)
+        self.assertResponseStatus(200, response)
+        self.assertEqual(json.loads(response.body.content), [])
+        self._app.service('device', 'devices').get_device(
+            'stage_1').powered = True
+        response = self.request('devices', parameters=parameters)
+        self.assertResponseStatus(200, response)
+        self.assertEqual(json.loads(response.body.content), [{
+            'id': 'stage_1',
+        }])
+
+    def testEndpointShouldReturnDirectlyChangedDevices(self):
+        response = self.request('devices', parameters={
+            'since': '0',
+        })
+        self.assertResponseStatus(200, response)
+        sequence = response.headers['X-Sequence']
+        self._app.service('device', 'devices').get_device(
+            'stage_2').label = 'Television'
+        response = self.request('devices', parameters={
+            'since': sequence,
+        })
+        self.assertResponseStatus(200, response)
+        data = json.loads(response.body.content)
+        self.assertEqual([change['id'] for change in data], ['stage_2'])
+        self.assertEqual(data[0]['resource']['label'], 'Television')
+
+
+class GetStageLightsEncodedResourcesTest(MaisonTestCase):
+    @patch('subprocess.call')
+    def testEndpointShouldEncodeAlteredResourcesAgain(self, mock_call):
+        encoded_resources = self._app.service('rest', 'encoded_resources')
+        self.assertResponseStatus(200, self.request('devices'))
+        # Bypass the response cache, so resources are encoded again.
+        self._app.service('http', 'response_cache').clear()
+        hits = encoded_resources.representations.hits
+        self.assertResponseStatus(200, self.request('devices'))
+        self.assertEqual(encoded_resources.representations.hits, hits + 4)
+        response = self.request('device-alter', parameters={
+            'id': 'stage_2',
+        }, body=json.dumps([
+            {
+                'op': 'replace',
+                'path': '/label',
+                'value': 'Door',
+            },
+        ]), headers={
+            'Content-Type': 'application/json-patch+json',
+        })
+        self.assertResponseStatus(200, response)
+        data = json.loads(self.request('devices').body.content)
+        self.assertIn('Door', [device['label'] for device in data])
+
+
+class UnpublishedResourcesTest(MaisonTestCase):
+    def setUp(self):
+        super().setUp()
+        # Changes to these resources are not published.
+        self._resources = DeviceResourceRepository(
+            OlaType(), self._app.service('maison', 'ola_devices'))
+
+    def testEndpointsShouldNotCacheResponses(self):
+        self.assertIsNone(
+            GetResourceEndpoint(self._resources).get_cache_dependencies())
+        self.assertIsNone(
+            GetResourcesEndpoint(self._resources).get_cache_dependencies())
+        self.assertEqual(GetResourcesEndpoint(self._app.service(
+            'device', 'device_resources')).get_cache_dependencies(),
+            ('device',))
+
+    def testPayloadTypeShouldNotCacheEncodedResources(self):
+        representations = self._app.service(
+            'rest', 'encoded_resources').representations
+        ola = self._app.service('device', 'devices').get_device('stage_1')
+        body = JsonResponsePayloadType(OlaType()).to_http_response_body(
+            ola, 'application/json')
+        self.assertEqual(json.loads(body.content)['id'], 'stage_1')
+        self.assertEqual(representations.hits + representations.misses, 0)
+
+
+class DeviceEventsEndpointTest(MaisonTestCase):
+    def _open_stream(self, headers=None):
+        url = self._app.service('http', 'urls').build('device-events')
+        headers = dict(headers or {}, Accept='text/event-stream')
+        response = self._flask_app.get(url, headers=headers, buffered=False)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        self.assertEqual(next(response.response), b'retry: 1000\n\n')
+        return response
+
+    def testEndpointShouldStreamDeviceChanges(self):
+        response = self._open_stream()
+        try:
+            device = self._app.service('device', 'devices').get_device(
+                'stage_1')
+            device.label = 'Television'
+            event = next(response.response).decode('utf-8')
+        finally:
+            response.close()
+        lines = event.splitlines()
+        self.assertRegex(lines[0], '^id: [0-9a-f]+:[1-9][0-9]*$')
+        self.assertEqual(lines[1], 'event: device')
+        data = json.loads(lines[2][len('data: '):])
+        self.assertEqual(data['id'], 'stage_1')
+        self.assertEqual(data['label'], 'Television')
+
+    def testEndpointShouldResumeFromLastEventId(self):
+        response = self._open_stream({
+            'Last-Event-ID': '0',
+        })
+        try:
+            events = list(islice(response.response, 4))
+        finally:
+            response.close()
+        self.assertCountEqual(
+            [json.loads(event.decode('utf-8').splitlines()[2][6:])['id']
+             for event in events],
+            ['stage_1', 'stage_2', 'stage_3', 'stage_4'])
@@ -55,5 +55,8 @@ class OpenApiEndpoint(Endpoint):
                          OpenApiResponseType())
         self._openapi = App.current.service('openapi', 'openapi')
 
+    def get_cache_dependencies(self):
+        return ()
+
     def handle(self, request):
         return OpenApiResponse(self._openapi.get())
@@ -0,0 +1,285 @@
+import time
+from threading import Lock
+from typing import AbstractSet, Callable, Iterable, Optional, Tuple
+
+from contracts import contract
+
+from alfred.cache import LruCache
+from alfred_rest.filter import filter_resources
+from alfred_rest.resource import ResourceRepository, ResourceNotFound, \
+    ExpandableResourceRepository, ShrinkableResourceRepository, \
+    UpdateableResourceRepository, SyncableResourceRepository, paginate, \
+    unique_ids
+
+
+class EncodedResourceCache:
+    """
+    Caches the encoded representations of resources.
+
+    Representations are cached per resource version, which changes whenever
+    the resource is invalidated, so changed resources are encoded again and
+    stale representations are eventually discarded as the least recently used.
+    """
+
+    MAXIMUM_SIZE = 10000
+
+    @contract
+    def __init__(self, maximum_size: Optional[int] = None):
+        self._representations = LruCache(
+            maximum_size if maximum_size is not None else self.MAXIMUM_SIZE)
+        # The versions of the resources that were invalidated, keyed by
+        # resource type name and resource ID. Versions are never reset, so
+        # that representations of deleted resources are never returned for
+        # new resources with the same IDs.
+        self._versions = {}
+        self._lock = Lock()
+
+    @property
+    @contract
+    def representations(self) -> LruCache:
+        return self._representations
+
+    @contract
+    def invalidate(self, resource_type_name: str, resource_ids: Iterable):
+        """
+        Invalidates the representations of resources.
+        :param resource_ids: Iterable[str]
+        """
+        with self._lock:
+            for resource_id in resource_ids:
+                version_key = resource_type_name, resource_id
+                self._versions[version_key] = self._versions.get(
+                    version_key, 0) + 1
+
+    @contract
+    def encode(self, resource_type_name: str, resource, content_type: str,
+               fields: Optional[AbstractSet], encode: Callable) -> bytes:
+        """
+        Encodes a resource, or gets its cached representation.
+        :param fields: Optional[AbstractSet[str]]. The names of the properties
+          the representation contains, or None if it contains all properties.
+        :param encode: Encodes the resource, if it is not cached.
+        """
+        version_key = resource_type_name, resource.id
+        # Get the version before encoding the resource, so representations of
+        # resources that change meanwhile are cached under their old version.
+        version = self._versions.get(version_key, 0)
+        key = version_key + (content_type, fields, version)
+        encoded = self._representations.get(key)
+        if encoded is None:
+            encoded = encode(resource)
+            self._representations.set(key, encoded)
+        return encoded
+
+
+# Marks resources that are known not to exist.
+_NOT_FOUND = object()
+
+
+class CachingResourceRepository(ResourceRepository):
+    """
+    Caches the resources of another repository by their IDs.
+
+    Resources are cached for a limited time, and the least recently used are
+    discarded once the cache is full. Unknown IDs are cached as well, for a
+    shorter time. Resources that are added or updated through this repository
+    are cached immediately, after they have been written to the other
+    repository.
+
+    Other repositories may change their resources without this repository
+    noticing, in which case stale resources are returned until they expire.
+    Use build_caching_resource_repository() to wrap repositories, so that the
+    wrapper supports the same operations as the repository it wraps.
+    """
+
+    TTL = 60.0
+    NEGATIVE_TTL = 5.0
+    MAXIMUM_SIZE = 1000
+
+    @contract
+    def __init__(self, resources: ResourceRepository,
+                 ttl: Optional[float] = None,
+                 negative_ttl: Optional[float] = None,
+                 maximum_size: Optional[int] = None,
+                 clock: Callable = time.monotonic):
+        """
+
+        :param resources: The repository to cache the resources of.
+        :param ttl: The number of seconds to cache resources for.
+        :param negative_ttl: The number of seconds to cache unknown IDs for.
+        :param maximum_size: The maximum number of cached IDs.
+        :param clock: Returns the current time in seconds.
+        """
+        self._resources = resources
+        self._negative_ttl = negative_ttl if negative_ttl is not None else self.NEGATIVE_TTL
+        self._cache = LruCache(
+            maximum_size if maximum_size is not None else self.MAXIMUM_SIZE,
+            ttl if ttl is not None else self.TTL, clock)
+
+    @property
+    @contract
+    def resources(self) -> ResourceRepository:
+        """
+        Gets the repository whose resources are cached.
+        """
+        return self._resources
+
+    @property
+    @contract
+    def hits(self) -> int:
+        return self._cache.hits
+
+    @property
+    @contract
+    def misses(self) -> int:
+        return self._cache.misses
+
+    def _remember(self, resources: Iterable):
+        for resource in resources:
+            self._cache.set(resource.id, resource)
+
+    def _forget(self, resource_ids: Iterable):
+        for resource_id in resource_ids:
+            self._cache.set(resource_id, _NOT_FOUND, self._negative_ttl)
+
+    def get_type(self):
+        return self._resources.get_type()
+
+    def get_resource(self, resource_id):
+        resource = self._cache.get(resource_id)
+        if resource is _NOT_FOUND:
+            raise ResourceNotFound(resource_id)
+        if resource is not None:
+            return resource
+        try:
+            resource = self._resources.get_resource(resource_id)
+        except ResourceNotFound:
+            self._forget((resource_id,))
+            raise
+        self._remember((resource,))
+        return resource
+
+    def get_resources(self, ids=None, filters=(), page=None):
+        if ids is None:
+            resources = list(self._resources.get_resources(None, filters,
+                                                           page))
+            self._remember(resources)
+            return resources
+        ids = unique_ids(ids)
+        resources, missing_ids = self._get_cached_resources(ids)
+        if missing_ids:
+            fetched_resources = {
+                resource.id: resource for resource in
+                self._resources.get_resources(missing_ids)}
+            self._remember(fetched_resources.values())
+            self._forget(resource_id for resource_id in missing_ids
+                         if resource_id not in fetched_resources)
+            resources.update(fetched_resources)
+        resource_type = self.get_type()
+        return list(paginate(filter_resources(
+            [resources[resource_id] for resource_id in ids
+             if resource_id in resources], filters, resource_type), page,
+            resource_type))
+
+    def _get_cached_resources(self, ids: Iterable) -> Tuple:
+        """
+        :return: Tuple[Dict[str, Any], List[str]]. The cached resources by
+          their IDs, and the IDs that are not cached.
+        """
+        resources = {}
+        missing_ids = []
+        for resource_id in ids:
+            resource = self._cache.get(resource_id)
+            if resource is None:
+                missing_ids.append(resource_id)
+            elif resource is not _NOT_FOUND:
+                resources[resource_id] = resource
+        return resources, missing_ids
+
+    def explain(self, ids=None, filters=(), page=None):
+        return self._resources.explain(ids, filters, page)
+
+
+class CachingExpandableResourceRepository(CachingResourceRepository,
+                                          ExpandableResourceRepository):
+    def get_add_type(self):
+        return self._resources.get_add_type()
+
+    def add_resource(self, resource):
+        added_resource = self._resources.add_resource(resource)
+        self._remember((added_resource,))
+        return added_resource
+
+    def add_resources(self, resources):
+        added_resources = list(self._resources.add_resources(list(resources)))
+        self._remember(added_resources)
+        return added_resources
+
+
+class CachingShrinkableResourceRepository(CachingResourceRepository,
+                                          ShrinkableResourceRepository):
+    def delete_resource(self, resource):
+        self._resources.delete_resource(resource)
+        self._forget((resource.id,))
+
+    def delete_resources(self, resources):
+        resources = list(resources)
+        self._resources.delete_resources(resources)
+        self._forget(resource.id for resource in resources)
+
+
+class CachingUpdateableResourceRepository(CachingResourceRepository,
+                                          UpdateableResourceRepository):
+    def get_update_type(self):
+        return self._resources.get_update_type()
+
+    def update_resource(self, resource):
+        updated_resource = self._resources.update_resource(resource)
+        self._remember((updated_resource,))
+        return updated_resource
+
+    def update_resources(self, resources):
+        updated_resources = list(self._resources.update_resources(
+            list(resources)))
+        self._remember(updated_resources)
+        return updated_resources
+
+
+class CachingSyncableResourceRepository(CachingResourceRepository,
+                                        SyncableResourceRepository):
+    def get_changes(self, since):
+        return self._resources.get_changes(since)
+
+
+_CACHING_RESOURCE_REPOSITORY_CLASSES = (
+    (ExpandableResourceRepository, CachingExpandableResourceRepository),
+    (ShrinkableResourceRepository, CachingShrinkableResourceRepository),
+    (UpdateableResourceRepository, CachingUpdateableResourceRepository),
+    (SyncableResourceRepository, CachingSyncableResourceRepository),
+)
+
+# The classes built by build_caching_resource_repository(), keyed by their
+# base classes.
+_caching_resource_repository_classes = {}
+
+
+@contract
+def build_caching_resource_repository(resources: ResourceRepository,
+                                      **kwargs) -> CachingResourceRepository:
+    """
+    Wraps a repository in a CachingResourceRepository that supports the same
+    operations.
+    :param kwargs: Passed on to CachingResourceRepository.
+    """
+    bases = tuple(caching_class for interface, caching_class in
+                  _CACHING_RESOURCE_REPOSITORY_CLASSES
+                  if isinstance(resources, interface))
+    if not bases:
+        return CachingResourceRepository(resources, **kwargs)
+    try:
+        caching_class = _caching_resource_repository_classes[bases]
+    except KeyError:
+        caching_class = type(CachingResourceRepository)(
+            'CachingResourceRepository', bases, {})
+        _caching_resource_repository_classes[bases] = caching_class
+    return caching_class(resources, **kwargs)
@@ -0,0 +1,280 @@
+import re
+from collections import OrderedDict
+from threading import Lock
+from typing import Iterable, List, Callable, Optional, Tuple
+from uuid import uuid4
+
+from contracts import contract
+
+from alfred_http.cache import DependenciesChanged
+
+
+class ChangesExpired(RuntimeError):
+    """
+    Raised if changes can no longer be retrieved, because they were discarded.
+    """
+
+    def __init__(self, since: str):
+        super().__init__(
+            'Changes since %s are no longer available. Get all resources with since=0 instead.' % since)
+
+
+_SYNC_TOKEN_PATTERN = re.compile('^(?:0|([0-9a-f]+):(0|[1-9][0-9]*))$')
+
+
+@contract
+def format_sync_token(epoch: str, sequence: int) -> str:
+    """
+    Formats a sync token, which clients pass on to get the changes since.
+    """
+    return '%s:%d' % (epoch, sequence)
+
+
+@contract
+def parse_sync_token(token: str) -> Tuple:
+    """
+    Parses a sync token.
+
+    Sync token "0" is that of clients without any resources.
+    :return: Tuple[Optional[str], int]. The epoch of the ChangeLog the token
+      was issued by, or None for "0", and the sequence number.
+    :raises ValueError: Raised if the token is invalid.
+    """
+    match = _SYNC_TOKEN_PATTERN.match(token)
+    if match is None:
+        raise ValueError('Invalid sync token "%s".' % token)
+    if match.group(1) is None:
+        return None, 0
+    return match.group(1), int(match.group(2))
+
+
+class ResourceChange:
+    """
+    Describes the latest change to a single resource.
+    """
+
+    @contract
+    def __init__(self, resource_id: str, sequence: int, resource=None):
+        """
+
+        :param resource_id:
+        :param sequence: The sequence number of the change.
+        :param resource: The resource, or None if it was deleted.
+        """
+        self._resource_id = resource_id
+        self._sequence = sequence
+        self._resource = resource
+
+    @property
+    @contract
+    def resource_id(self) -> str:
+        return self._resource_id
+
+    @property
+    @contract
+    def sequence(self) -> int:
+        return self._sequence
+
+    @property
+    def resource(self):
+        return self._resource
+
+    @property
+    @contract
+    def deleted(self) -> bool:
+        return self._resource is None
+
+
+class ResourceChanges:
+    """
+    Describes the resources that changed since a sequence number.
+    """
+
+    @contract
+    def __init__(self, epoch: str, sequence: int, changes: List):
+        """
+
+        :param epoch: The epoch of the ChangeLog the changes were recorded in.
+        :param sequence: The sequence number to get the next changes since.
+        :param changes: List[ResourceChange]. The changes, in order.
+        """
+        self._epoch = epoch
+        self._sequence = sequence
+        self._changes = changes
+
+    @property
+    @contract
+    def sequence(self) -> int:
+        return self._sequence
+
+    @property
+    @contract
+    def token(self) -> str:
+        """
+        Gets the sync token to get the next changes since.
+        """
+        return format_sync_token(self._epoch, self._sequence)
+
+    @property
+    @contract
+    def changes(self) -> List:
+        return self._changes
+
+    def __iter__(self):
+        return iter(self._changes)
+
+
+class ChangeLog:
+    """
+    Records the changes to resources under a monotonic sequence number.
+
+    Only the latest change to each resource is kept, including deletions, so
+    that clients can find the resources that changed since they last synced,
+    without getting all resources. The oldest changes are discarded once the
+    log is full, after which clients that synced before them must get all
+    resources again.
+
+    Sequence numbers restart every time the log is created. Sequence number 0
+    is that of clients without any resources, so changes since 0 are all
+    existing resources. Sequence number 1 is that of the resources that
+    existed when the log was created.
+
+    Clients sync through sync tokens, which combine a sequence number with
+    the log's random epoch. Tokens that were issued by another log, such as
+    one from before the application restarted, have expired. See
+    format_sync_token() and parse_sync_token().
+    """
+
+    MAXIMUM_SIZE = 10000
+
+    @contract
+    def __init__(self, maximum_size: Optional[int] = None):
+        self._maximum_size = maximum_size if maximum_size is not None else self.MAXIMUM_SIZE
+        assert self._maximum_size > 0
+        self._epoch = uuid4().hex[:8]
+        self._sequence = 1
+        # The sequence numbers of the latest change to each resource, and
+        # whether it deleted the resource, in the order of the changes.
+        self._changes = OrderedDict()
+        # The sequence number of the latest discarded change.
+        self._horizon = 0
+        self._lock = Lock()
+
+    @property
+    @contract
+    def epoch(self) -> str:
+        return self._epoch
+
+    @property
+    @contract
+    def sequence(self) -> int:
+        """
+        Gets the sequence number of the latest change.
+        """
+        return self._sequence
+
+    @contract
+    def record(self, resource_ids: Iterable, deleted: bool = False):
+        """
+        Records that resources were added, updated, or deleted.
+        :param resource_ids: Iterable[str]
+        """
+        with self._lock:
+            for resource_id in resource_ids:
+                self._sequence += 1
+                self._changes[resource_id] = self._sequence, deleted
+                self._changes.move_to_end(resource_id)
+            while len(self._changes) > self._maximum_size:
+                _, (self._horizon, _) = self._changes.popitem(last=False)
+
+    @contract
+    def get_changes(self, since_token: str,
+                    get_resources: Callable) -> ResourceChanges:
+        """
+        Gets the changes since a sync token.
+        :param since_token: The sync token of the last change the client has.
+          If its sequence number is 0, all resources are returned.
+        :param get_resources: A function that gets resources by their IDs, or
+          all resources if the IDs are None, such as
+          alfred_rest.resource.ResourceRepository.get_resources().
+        :raises ValueError: Raised if the sync token is invalid.
+        :raises ChangesExpired: Raised if changes since the sync token were
+          discarded, or if the sync token is unknown.
+        """
+        epoch, since = parse_sync_token(since_token)
+        with self._lock:
+            sequence = self._sequence
+            if since and epoch != self._epoch or since > sequence or \
+                    0 < since < self._horizon:
+                raise ChangesExpired(since_token)
+            if 0 == since:
+                recorded_changes = None
+            else:
+                recorded_changes = []
+                # The latest changes come last, so visit only those after the
+                # sequence number.
+                for resource_id, (change_sequence, deleted) in reversed(
+                        self._changes.items()):
+                    if change_sequence <= since:
+                        break
+                    recorded_changes.append(
+                        (resource_id, change_sequence, deleted))
+                recorded_changes.reverse()
+        if recorded_changes is None:
+            return ResourceChanges(self._epoch, sequence, [
+                ResourceChange(resource.id, sequence, resource) for resource
+                in get_resources(None)])
+        resources = {resource.id: resource for resource in get_resources(
+            [resource_id for resource_id, _, deleted in recorded_changes
+             if not deleted])}
+        # Resources that were deleted after the changes were retrieved are
+        # reported as such.
+        return ResourceChanges(self._epoch, sequence, [
+            ResourceChange(resource_id, change_sequence,
+                           None if deleted else resources.get(resource_id))
+            for resource_id, change_sequence, deleted in recorded_changes])
+
+
+class ResourcesChanged(DependenciesChanged):
+    """
+    Published on the app's event bus when resources were added, updated, or
+    deleted.
+
+    Cached responses that depend on the resources' type are invalidated.
+    """
+
+    @contract
+    def __init__(self, resource_type_name: str, resource_ids: Iterable,
+                 deleted: bool = False):
+        """
+
+        :param resource_type_name: The name of the resources' type.
+        :param resource_ids: Iterable[str]
+        :param deleted: Whether the resources were deleted.
+        """
+        self._resource_type_name = resource_type_name
+        self._resource_ids = tuple(resource_ids)
+        self._deleted = deleted
+
+    @property
+    @contract
+    def resource_type_name(self) -> str:
+        return self._resource_type_name
+
+    @property
+    @contract
+    def resource_ids(self) -> Tuple:
+        return self._resource_ids
+
+    @property
+    @contract
+    def deleted(self) -> bool:
+        return self._deleted
+
+    @property
+    def coalescing_key(self):
+        return self._resource_type_name, self._resource_ids, self._deleted
+
+    @property
+    def dependencies(self):
+        return self._resource_type_name,
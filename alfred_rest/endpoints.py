@@ -1,6 +1,9 @@
+import base64
 import json
-from json import JSONDecodeError
-from typing import Dict, Iterable, Union
+import logging
+from itertools import chain, islice
+from typing import Dict, Iterable, Union, Iterator, Callable, List, Tuple, \
+    Optional, AbstractSet
 
 from contracts import contract
 from jsonpatch import JsonPatch
@@ -13,15 +16,23 @@ from alfred_http.endpoints import Endpoint, EndpointRepository, \
     NonConfigurableRequest, RequestType, Request, NotFoundError, \
     ResponseType, PayloadType, RequestPayloadType, ResponsePayloadType, \
     RequestParameter, ErrorResponseType, EmptyResponseType, BadRequestError, \
-    PayloadedMessage, Error
-from alfred_http.http import HttpRequest, HttpBody
+    PayloadedMessage, Error, GoneError, ConflictError, InternalServerError
+from alfred_http.http import HttpRequest, HttpBody, HttpResponseBuilder
 from alfred_json import RESOURCE_PATH
+from alfred_json.codec import JsonCodec
 from alfred_json.schema import SchemaNotFound
 from alfred_json.type import IdentifiableDataType, ListType, \
-    IdentifiableScalarType, InputDataType, OutputDataType
+    IdentifiableScalarType, InputDataType, OutputDataType, \
+    build_sparse_json_schema
 from alfred_rest.resource import ResourceRepository, ResourceIdType, \
     ResourceNotFound, ShrinkableResourceRepository, \
-    ExpandableResourceRepository, UpdateableResourceRepository
+    ExpandableResourceRepository, UpdateableResourceRepository, Page, \
+    SyncableResourceRepository, ResourceType
+from alfred_rest.changes import ResourceChanges, ResourceChange, \
+    ChangesExpired, ResourcesChanged, parse_sync_token
+from alfred_rest.filter import parse_filters
+from alfred_rest.patch import patch_resource, get_changed_properties
+from alfred_rest.sort import parse_sort
 
 
 class JsonPayloadType(PayloadType):
@@ -30,10 +41,21 @@ class JsonPayloadType(PayloadType):
 
 
 class JsonRequestPayloadType(JsonPayloadType, RequestPayloadType):
+    """
+    A JSON request payload type.
+
+    Lists are decoded, validated, and deserialized item by item while the
+    request body is read, so their memory usage does not grow with their
+    length. Their payloads are iterators, which raise BadRequestError once they
+    encounter invalid items.
+    """
+
     @contract
     def __init__(self, data_type: InputDataType):
         self._data_type = data_type
         self._validator = App.current.service('json', 'validator')
+        self._codec = App.current.service('json', 'codec')
+        self._stream_decoder = App.current.service('json', 'stream_decoder')
 
     @property
     @contract
@@ -41,9 +63,14 @@ class JsonRequestPayloadType(JsonPayloadType, RequestPayloadType):
         return self._data_type
 
     def from_http_request_body(self, http_request_body):
+        if isinstance(self._data_type, ListType):
+            return self._from_http_request_body_items(http_request_body)
+        content = http_request_body.content
+        if http_request_body.streamed:
+            content = b''.join(content)
         try:
-            json_data = json.loads(http_request_body.content)
-        except JSONDecodeError as e:
+            json_data = self._codec.decode(content)
+        except ValueError as e:
             raise BadRequestError(description=str(e))
         try:
             self._validator.validate(
@@ -52,11 +79,91 @@ class JsonRequestPayloadType(JsonPayloadType, RequestPayloadType):
             raise BadRequestError(description=str(e))
         return self._data_type.from_json(json_data)
 
+    def _iterdecode(self, chunks: Iterable) -> Iterator:
+        """
+        Decodes the items of a list payload.
+        :param chunks: Iterable[Union[bytes, str]]
+        :return: Iterator
+        :raises ValueError: Raised (lazily) if the chunks do not form a list.
+        """
+        return self._stream_decoder.iterdecode(chunks)
+
+    def _from_http_request_body_items(self, http_request_body):
+        content = http_request_body.content
+        if not http_request_body.streamed:
+            content = [content]
+        item_type = self._data_type.item_type
+        items = self._iterdecode(content)
+        index = 0
+        while True:
+            try:
+                json_data = next(items)
+            except StopIteration:
+                return
+            except ValueError as e:
+                raise BadRequestError(description=str(e))
+            try:
+                self._validator.validate(json_data,
+                                         item_type.get_json_schema())
+            except ValidationError as e:
+                raise BadRequestError(description='Item %d: %s' % (
+                    index, str(e)))
+            yield item_type.from_json(json_data)
+            index += 1
+
+
+class SparsePayload:
+    """
+    A response payload of which only some object properties must be output.
+    """
+
+    @contract
+    def __init__(self, payload, fields: AbstractSet):
+        """
+
+        :param payload:
+        :param fields: AbstractSet[str]. The names of the properties to output.
+        """
+        self._payload = payload
+        self._fields = frozenset(fields)
+
+    @property
+    def payload(self):
+        return self._payload
+
+    @property
+    @contract
+    def fields(self) -> AbstractSet:
+        return self._fields
+
 
 class JsonResponsePayloadType(JsonPayloadType, ResponsePayloadType):
+    """
+    A JSON response payload type.
+
+    Lists are streamed item by item, so their memory usage does not grow with
+    their length. This means the HTTP response status has been sent by the
+    time any items fail to serialize.
+
+    SparsePayloads are serialized with sparse fieldsets, so that the
+    attributes of unrequested properties are never read.
+
+    Resources of which all changes are published are encoded through the
+    rest.encoded_resources cache, so that unchanged resources are not
+    serialized and encoded again. See
+    alfred_rest.resource.ResourceRepository.
+    """
+
     @contract
     def __init__(self, data_type: OutputDataType):
         self._data_type = data_type
+        self._codec = App.current.service('json', 'codec')
+        self._stream_encoder = App.current.service('json', 'stream_encoder')
+        self._serializers = App.current.service('json', 'serializers')
+        self._encoded_resources = App.current.service('rest',
+                                                      'encoded_resources')
+        self._published_resource_type_names = App.current.service(
+            'rest', 'published_resource_type_names')
 
     @property
     @contract
@@ -64,8 +171,516 @@ class JsonResponsePayloadType(JsonPayloadType, ResponsePayloadType):
         return self._data_type
 
     def to_http_response_body(self, payload, content_type):
-        json_data = self._data_type.to_json(payload)
-        return HttpBody(json.dumps(json_data), content_type)
+        payload, fields = self._unwrap(payload)
+        # Get serializers lazily, because data types may still change after
+        # this payload type was created.
+        if isinstance(self._data_type, ListType):
+            item_type = self._data_type.item_type
+            item_serializer = self._serializers.get_serializer(item_type,
+                                                               fields)
+            return HttpBody(self._iterencode(
+                payload, item_serializer,
+                self._build_encoder(item_type, item_serializer, content_type,
+                                    fields)), content_type)
+        serializer = self._serializers.get_serializer(self._data_type, fields)
+        return HttpBody(self._build_encoder(
+            self._data_type, serializer, content_type, fields)(payload),
+            content_type)
+
+    def _build_encoder(self, data_type: OutputDataType, serializer: Callable,
+                       content_type: str,
+                       fields: Optional[AbstractSet]) -> Callable:
+        """
+        Builds a function to encode a single value with this payload type's
+        codec.
+        """
+        encode = self._codec.encode
+
+        def _encode(data) -> bytes:
+            return encode(serializer(data))
+
+        if not isinstance(data_type, ResourceType) or \
+                data_type.name not in self._published_resource_type_names:
+            return _encode
+
+        resource_type_name = data_type.name
+        encoded_resources = self._encoded_resources
+
+        def _encode_resource(resource) -> bytes:
+            return encoded_resources.encode(resource_type_name, resource,
+                                            content_type, fields, _encode)
+        return _encode_resource
+
+    @staticmethod
+    def _unwrap(payload) -> Tuple:
+        """
+        :return: Tuple[Any, Optional[AbstractSet[str]]]. The payload and its
+          fields.
+        """
+        if isinstance(payload, SparsePayload):
+            return payload.payload, payload.fields
+        return payload, None
+
+    def _iterencode(self, items: Iterable, serializer: Callable,
+                    encode: Callable):
+        """
+        Encodes the items of a list payload.
+        :param serializer: Converts a single item to JSON data.
+        :param encode: Encodes a single item with this payload type's codec.
+        :return: Union[bytes, Iterable[bytes]]
+        """
+        return self._stream_encoder.splice(map(encode, items))
+
+
+class MsgpackPayloadType(PayloadType):
+    def get_content_types(self):
+        return ['application/msgpack', 'application/x-msgpack']
+
+
+class MsgpackRequestPayloadType(MsgpackPayloadType, JsonRequestPayloadType):
+    """
+    A MessagePack request payload type.
+
+    Payloads are validated and deserialized as if they were JSON.
+    """
+
+    def __init__(self, data_type: InputDataType):
+        super().__init__(data_type)
+        self._codec = App.current.service('json', 'msgpack_codec')
+
+    def _iterdecode(self, chunks):
+        # MessagePack arrays cannot be read incrementally by our codec.
+        yield from _decode_list(self._codec, chunks)
+
+
+class MsgpackResponsePayloadType(MsgpackPayloadType, JsonResponsePayloadType):
+    """
+    A MessagePack response payload type.
+
+    Lists are not streamed, because MessagePack arrays start with their
+    length.
+    """
+
+    def __init__(self, data_type: OutputDataType):
+        super().__init__(data_type)
+        self._codec = App.current.service('json', 'msgpack_codec')
+
+    def _iterencode(self, items, serializer, encode):
+        return self._codec.encode([serializer(item) for item in items])
+
+
+class CborPayloadType(PayloadType):
+    def get_content_types(self):
+        return ['application/cbor']
+
+
+class CborRequestPayloadType(CborPayloadType, JsonRequestPayloadType):
+    """
+    A CBOR request payload type.
+
+    Payloads are validated and deserialized as if they were JSON.
+    """
+
+    def __init__(self, data_type: InputDataType):
+        super().__init__(data_type)
+        self._codec = App.current.service('json', 'cbor_codec')
+
+    def _iterdecode(self, chunks):
+        yield from _decode_list(self._codec, chunks)
+
+
+class CborResponsePayloadType(CborPayloadType, JsonResponsePayloadType):
+    """
+    A CBOR response payload type.
+
+    Lists are streamed as indefinite-length arrays.
+    """
+
+    def __init__(self, data_type: OutputDataType):
+        super().__init__(data_type)
+        self._codec = App.current.service('json', 'cbor_codec')
+
+    def _iterencode(self, items, serializer, encode):
+        return self._codec.iterencode(items, serializer)
+
+
+class NdjsonPayloadType(PayloadType):
+    CONTENT_TYPE = 'application/x-ndjson'
+
+    def get_content_types(self):
+        return [self.CONTENT_TYPE]
+
+
+class NdjsonResponsePayloadType(NdjsonPayloadType, JsonResponsePayloadType):
+    """
+    A newline-delimited JSON response payload type.
+
+    Lists are streamed with one item per line. Other data is returned as a
+    single line.
+    """
+
+    def to_http_response_body(self, payload, content_type):
+        if isinstance(self._data_type, ListType):
+            return super().to_http_response_body(payload, content_type)
+        payload, fields = self._unwrap(payload)
+        serializer = self._serializers.get_serializer(self._data_type, fields)
+        return HttpBody(self._iterencode(
+            (payload,), serializer,
+            self._build_encoder(self._data_type, serializer, content_type,
+                                fields)), content_type)
+
+    def _iterencode(self, items, serializer, encode):
+        return self._stream_encoder.splice_lines(map(encode, items))
+
+
+class ResourceBatchItem:
+    """
+    Describes a single item of a batch of resources.
+    """
+
+    @contract
+    def __init__(self, index: int, resource=None,
+                 error: Optional[Error] = None):
+        """
+
+        :param index: The position of the item in its batch, such as its
+          zero-based index, or its line number in an import.
+        :param resource: The resource, if the item was processed successfully
+          so far.
+        :param error: The error, if the item could not be processed.
+        """
+        assert (resource is None) != (error is None)
+        self._index = index
+        self._resource = resource
+        self._error = error
+
+    @property
+    @contract
+    def index(self) -> int:
+        return self._index
+
+    @property
+    def resource(self):
+        return self._resource
+
+    @property
+    @contract
+    def error(self) -> Optional[Error]:
+        return self._error
+
+    @property
+    @contract
+    def status(self) -> int:
+        if self._error is not None:
+            return self._error.http_response_status_code
+        return 200
+
+    @contract
+    def with_result(self, resource=None, error: Optional[Error] = None):
+        return type(self)(self._index, resource, error)
+
+
+class ResourceBatch:
+    """
+    Provides the items of a batch of resources, lazily.
+    """
+
+    @contract
+    def __init__(self, items: Iterable):
+        """
+        :param items: Iterable[ResourceBatchItem]
+        """
+        self._items = items
+
+    def __iter__(self):
+        return iter(self._items)
+
+
+@contract
+def split_batches(items: Iterable, size: int) -> Iterator:
+    """
+    Splits items into batches, without reading ahead of the current batch.
+    :param items: Iterable
+    :param size: The maximum number of items per batch.
+    :return: Iterator[List]
+    """
+    items = iter(items)
+    while True:
+        batch = list(islice(items, size))
+        if not batch:
+            return
+        yield batch
+
+
+class ResourceBatchItemType(OutputDataType):
+    @contract
+    def __init__(self, resource_type: OutputDataType,
+                 position_name: str = 'index',
+                 position_title: str = 'The zero-based position of the resource in the batch.'):
+        """
+
+        :param resource_type:
+        :param position_name: The name of the property that contains the
+          item's position, as given by ResourceBatchItem.index.
+        :param position_title: The title of the position property.
+        """
+        self._resource_type = resource_type
+        self._position_name = position_name
+        self._position_title = position_title
+        self._error_type = ErrorType()
+
+    def get_json_schema(self):
+        return {
+            'title': 'The result of processing a single resource of a batch',
+            'type': 'object',
+            'properties': {
+                self._position_name: {
+                    'title': self._position_title,
+                    'type': 'integer',
+                },
+                'status': {
+                    'title': 'The HTTP status code for this resource.',
+                    'type': 'integer',
+                },
+                'resource': self._resource_type,
+                'error': self._error_type,
+            },
+            'required': [self._position_name, 'status'],
+        }
+
+    def to_json(self, data):
+        assert isinstance(data, ResourceBatchItem)
+        json_data = {
+            self._position_name: data.index,
+            'status': data.status,
+        }
+        if data.error is not None:
+            json_data['error'] = self._error_type.to_json(data.error)
+        else:
+            json_data['resource'] = self._resource_type.to_json(data.resource)
+        return json_data
+
+
+class ResourceImport(ResourceBatch):
+    """
+    Provides the items of a resource import, lazily.
+
+    The items' indexes are their line numbers.
+    """
+
+
+class NdjsonRequestPayloadType(NdjsonPayloadType, JsonRequestPayloadType):
+    """
+    A newline-delimited JSON request payload type for resource imports.
+
+    Each line is decoded, validated, and deserialized through the data type
+    while the request body is read. Payloads are ResourceImports, in which
+    invalid lines are reported as errors, rather than rejecting the entire
+    request.
+    """
+
+    def from_http_request_body(self, http_request_body):
+        content = http_request_body.content
+        if not http_request_body.streamed:
+            content = [content]
+        return ResourceImport(self._import(content))
+
+    def _import(self, chunks: Iterable):
+        schema = self._data_type.get_json_schema()
+        for line_number, line in self._stream_decoder.iterlines(chunks):
+            try:
+                json_data = self._codec.decode(line)
+                self._validator.validate(json_data, schema)
+            except (ValueError, ValidationError) as e:
+                yield ResourceBatchItem(line_number, error=BadRequestError(
+                    description=str(e)))
+                continue
+            resource, error = _from_json_item(self._data_type, json_data)
+            yield ResourceBatchItem(line_number, resource, error)
+
+
+class ResourceBatchType(InputDataType):
+    """
+    Describes batches of resources, optionally alongside single resources.
+    """
+
+    @contract
+    def __init__(self, resource_type: InputDataType, single: bool = False):
+        """
+
+        :param resource_type:
+        :param single: Whether single resources are accepted as well.
+        """
+        self._resource_type = resource_type
+        self._single = single
+
+    @property
+    @contract
+    def resource_type(self) -> InputDataType:
+        return self._resource_type
+
+    @property
+    @contract
+    def single(self) -> bool:
+        return self._single
+
+    def get_json_schema(self):
+        schema = {
+            'type': 'array',
+            'items': self._resource_type,
+        }
+        if self._single:
+            return {
+                'anyOf': [self._resource_type, schema],
+            }
+        return schema
+
+    def from_json(self, json_data):
+        if isinstance(json_data, List):
+            return ResourceBatch([ResourceBatchItem(
+                index, self._resource_type.from_json(item_json_data)) for
+                index, item_json_data in enumerate(json_data)])
+        return self._resource_type.from_json(json_data)
+
+
+class JsonBatchRequestPayloadType(JsonRequestPayloadType):
+    """
+    A JSON request payload type for batches of resources.
+
+    Arrays are decoded, validated, and deserialized item by item while the
+    request body is read. Their payloads are ResourceBatches, in which invalid
+    items are reported as errors, rather than rejecting the entire request. If
+    the data type accepts single resources, these are returned as they are.
+    """
+
+    @contract
+    def __init__(self, data_type: ResourceBatchType):
+        super().__init__(data_type)
+
+    def from_http_request_body(self, http_request_body):
+        chunks = http_request_body.content
+        if not http_request_body.streamed:
+            chunks = [chunks]
+        head, chunks = _peek_chunks(chunks)
+        if head.startswith(b'['):
+            return ResourceBatch(self._get_items(chunks))
+        if not self._data_type.single:
+            raise BadRequestError(
+                description='The payload must be an array of resources.')
+        # Single resources are small, so they are decoded in one go.
+        try:
+            json_data = self._codec.decode(b''.join(chunks))
+        except ValueError as e:
+            raise BadRequestError(description=str(e))
+        resource_type = self._data_type.resource_type
+        try:
+            self._validator.validate(json_data,
+                                     resource_type.get_json_schema())
+        except ValidationError as e:
+            raise BadRequestError(description=str(e))
+        return resource_type.from_json(json_data)
+
+    def _get_items(self, chunks: Iterable) -> Iterator:
+        """
+        Decodes, validates, and deserializes the items of an array while it is
+        read.
+
+        If the array itself is invalid, the error is reported as the item at
+        which it was encountered, and no further items are read.
+        :param chunks: Iterable[bytes]
+        :return: Iterator[ResourceBatchItem]
+        """
+        resource_type = self._data_type.resource_type
+        schema = resource_type.get_json_schema()
+        items = self._iterdecode(chunks)
+        index = 0
+        while True:
+            try:
+                item_json_data = next(items)
+            except StopIteration:
+                return
+            except ValueError as e:
+                yield ResourceBatchItem(index, error=BadRequestError(
+                    description=str(e)))
+                return
+            try:
+                self._validator.validate(item_json_data, schema)
+            except ValidationError as e:
+                yield ResourceBatchItem(index, error=BadRequestError(
+                    description=str(e)))
+            else:
+                resource, error = _from_json_item(resource_type,
+                                                  item_json_data)
+                yield ResourceBatchItem(index, resource, error)
+            index += 1
+
+
+@contract
+def _peek_chunks(chunks: Iterable) -> Tuple:
+    """
+    Reads a request body up to its first non-whitespace byte.
+    :param chunks: Iterable[Union[bytes, str]]
+    :return: Tuple[bytes, Iterator[bytes]]. The first non-whitespace byte, or
+      an empty string if the body is blank, and all of the body's chunks,
+      including the ones that were read.
+    """
+    chunks = iter(chunks)
+    head = []
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        head.append(chunk)
+        if chunk.strip():
+            return chunk.lstrip()[:1], chain(head, chunks)
+    return b'', iter(head)
+
+
+@contract
+def _from_json_item(data_type: InputDataType, json_data) -> Tuple:
+    """
+    Deserializes a single resource of a batch or import.
+    :return: Tuple[Any, Optional[Error]]. The resource, or the error if the
+      resource could not be deserialized.
+    """
+    try:
+        return data_type.from_json(json_data), None
+    except Error as e:
+        return None, e
+    except Exception as e:
+        return None, BadRequestError(description=str(e))
+
+
+@contract
+def _decode_list(codec: JsonCodec, chunks: Iterable) -> List:
+    chunks = list(chunks)
+    data = codec.decode(b''.join(chunks) if len(chunks) != 1 else chunks[0])
+    if not isinstance(data, List):
+        raise ValueError('Expected an array.')
+    return data
+
+
+@contract
+def build_request_payload_types(data_type: InputDataType) -> Tuple:
+    """
+    Builds the payload types for requests with resources.
+
+    JSON comes first, so it is preferred in content negotiation.
+    """
+    return (JsonRequestPayloadType(data_type),
+            MsgpackRequestPayloadType(data_type),
+            CborRequestPayloadType(data_type))
+
+
+@contract
+def build_response_payload_types(data_type: OutputDataType) -> Tuple:
+    """
+    Builds the payload types for responses with resources.
+
+    JSON comes first, so it is preferred in content negotiation.
+    """
+    return (JsonResponsePayloadType(data_type),
+            MsgpackResponsePayloadType(data_type),
+            CborResponsePayloadType(data_type))
 
 
 class ErrorType(IdentifiableDataType, OutputDataType):
@@ -162,6 +777,35 @@ class JsonSchemaResponse(SuccessResponse, PayloadedMessage):
         return self._schema
 
 
+@contract
+def build_response_schema_url(response_type_name: str) -> str:
+    """
+    Builds the URL to the schema of a response type's JSON responses.
+    """
+    return '%s#/definitions/response/%s' % (
+        App.current.service('http', 'urls').build('schema'),
+        response_type_name)
+
+
+class SparseResponseType(ResponseType):
+    """
+    A response type of which responses may contain sparse fieldsets.
+
+    Sparse fieldsets may lack properties that are required by this response
+    type's schema, so they are described by a separate schema, which responses
+    SHOULD link to through the HTTP Link header, with rel="describedby".
+    """
+
+    @property
+    @contract
+    def sparse_name(self) -> str:
+        return '%s-sparse' % self.name
+
+    @contract
+    def get_sparse_schema_url(self) -> str:
+        return build_response_schema_url(self.sparse_name)
+
+
 class JsonSchemaResponseType(ResponseType):
     def __init__(self):
         super().__init__('schema',
@@ -177,6 +821,9 @@ class JsonSchemaEndpoint(Endpoint):
         self._urls = App.current.service('http', 'urls')
         self._error_response_type = ErrorResponseType()
 
+    def get_cache_dependencies(self):
+        return ()
+
     def handle(self, request):
         assert isinstance(request, NonConfigurableRequest)
 
@@ -198,13 +845,22 @@ class JsonSchemaEndpoint(Endpoint):
                         request_type.name,
                         request_payload_type.data_type.get_json_schema())
 
-            response_type = endpoint.response_type
-            for response_payload_type in response_type.get_payload_types():
-                if isinstance(response_payload_type, JsonResponsePayloadType):
+            response_types = [endpoint.response_type] + list(
+                endpoint.response_type.get_linked_response_types())
+            for response_type in response_types:
+                for response_payload_type in response_type.get_payload_types():
+                    if not isinstance(response_payload_type,
+                                      JsonResponsePayloadType):
+                        continue
                     schema['definitions'].setdefault('response', {})
                     schema['definitions']['response'].setdefault(
                         response_type.name,
                         response_payload_type.data_type.get_json_schema())
+                    if isinstance(response_type, SparseResponseType):
+                        schema['definitions']['response'].setdefault(
+                            response_type.sparse_name,
+                            build_sparse_json_schema(
+                                response_payload_type.data_type))
 
         for error_response_payload_type in self._error_response_type.get_payload_types():
             if isinstance(error_response_payload_type,
@@ -238,56 +894,535 @@ class ExternalJsonSchemaRequestType(RequestType):
         return ExternalJsonSchemaRequest(
             base64_decodes(http_request.arguments['id']))
 
-    def get_parameters(self):
-        return RequestParameter(JsonSchemaId(), name='id'),
+    def get_parameters(self):
+        return RequestParameter(JsonSchemaId(), name='id'),
+
+
+class ExternalJsonSchemaRequest(Request):
+    @contract
+    def __init__(self, schema_url: str):
+        self._schema_url = schema_url
+
+    @property
+    def schema_url(self):
+        return self._schema_url
+
+
+class ExternalJsonSchemaEndpoint(Endpoint):
+    """
+    Provides an endpoint that serves an external JSON Schema. This circumvents
+    Cross-Origin Resource Sharing (CORS) problems, by not requiring API clients
+    to load external resources themselves, and allows us to fix incorrect
+    headers, such as Content-Type.
+
+    The {id} parameter is the base64-encoded URL of the schema to load.
+    """
+
+    def __init__(self):
+        super().__init__('external-schema', '/about/json/external-schema/{id}',
+                         ExternalJsonSchemaRequestType(),
+                         JsonSchemaResponseType())
+        self._urls = App.current.service('http', 'urls')
+        self._schemas = App.current.service('json', 'schemas')
+
+    def get_cache_dependencies(self):
+        return ()
+
+    def handle(self, request):
+        assert isinstance(request, ExternalJsonSchemaRequest)
+        schema_url = request.schema_url
+        try:
+            schema = self._schemas.get_schema(schema_url)
+            return JsonSchemaResponse(schema)
+        except SchemaNotFound:
+            raise NotFoundError()
+
+
+class ResourcesPageLimitType(IdentifiableScalarType):
+    def __init__(self):
+        super().__init__('resources-page-limit')
+
+    def get_json_schema(self):
+        return {
+            'title': 'The maximum number of resources to return.',
+            'type': 'string',
+            'pattern': '^[1-9][0-9]*$',
+        }
+
+
+class ResourcesPageCursorType(IdentifiableScalarType):
+    def __init__(self):
+        super().__init__('resources-page-cursor')
+
+    def get_json_schema(self):
+        return {
+            'title': 'The opaque cursor of the page to return, as linked to by the previous page.',
+            'type': 'string',
+        }
+
+
+class ResourcesFilterType(IdentifiableScalarType):
+    def __init__(self):
+        super().__init__('resources-filter')
+
+    def get_json_schema(self):
+        return {
+            'title': 'Filters resources by their properties, e.g. filter[type]=ola, filter[type][in]=ola,hue, or filter[luminosity][gte]=0.5.',
+            'type': 'string',
+        }
+
+
+class ResourcesFieldsType(IdentifiableScalarType):
+    def __init__(self):
+        super().__init__('resources-fields')
+
+    def get_json_schema(self):
+        return {
+            'title': 'The comma-separated names of the resource properties to return, e.g. fields=id,label. Defaults to all properties.',
+            'type': 'string',
+        }
+
+
+class ResourcesSortType(IdentifiableScalarType):
+    def __init__(self):
+        super().__init__('resources-sort')
+
+    def get_json_schema(self):
+        return {
+            'title': 'The property to sort resources by, prefixed by "-" for descending order, e.g. sort=label or sort=-luminosity.',
+            'type': 'string',
+            'pattern': '^-?[^,-][^,]*$',
+        }
+
+
+class ResourcesExplainType(IdentifiableScalarType):
+    def __init__(self):
+        super().__init__('resources-explain')
+
+    def get_json_schema(self):
+        return {
+            'title': 'Whether to describe how resources are selected, in the X-Query-Plan response header.',
+            'type': 'boolean',
+        }
+
+
+class ResourcesSinceType(IdentifiableScalarType):
+    def __init__(self):
+        super().__init__('resources-since')
+
+    def get_json_schema(self):
+        return {
+            'title': 'The sync token of the last change the client has, as returned in the X-Sequence response header. 0 gets all resources.',
+            'type': 'string',
+            'pattern': '^(0|[0-9a-f]+:(0|[1-9][0-9]*))$',
+        }
+
+
+@contract
+def encode_cursor(cursor: Dict) -> str:
+    """
+    Encodes a pagination cursor, so it can be passed on as an opaque string.
+    """
+    encoded = json.dumps(cursor, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(encoded).decode('utf-8').rstrip('=')
+
+
+@contract
+def decode_cursor(cursor: str) -> Dict:
+    """
+    Decodes a pagination cursor.
+    :raises BadRequestError: Raised if the cursor is invalid.
+    """
+    try:
+        decoded = json.loads(base64.urlsafe_b64decode(
+            cursor + '=' * (-len(cursor) % 4)).decode('utf-8'))
+    except ValueError:
+        raise BadRequestError(description='Invalid cursor "%s".' % cursor)
+    if not isinstance(decoded, Dict):
+        raise BadRequestError(description='Invalid cursor "%s".' % cursor)
+    return decoded
+
+
+@contract
+def build_deep_object_query(name: str, argument: Dict) -> Dict:
+    """
+    Converts a "deep object" query argument back to query parameters.
+    """
+    query = {}
+    for key, value in argument.items():
+        key = '%s[%s]' % (name, key)
+        if isinstance(value, Dict):
+            query.update(build_deep_object_query(key, value))
+        else:
+            query[key] = value
+    return query
+
+
+@contract
+def get_query_argument(http_request: HttpRequest, name: str) -> Optional[str]:
+    """
+    Gets the value of an optional, single-value query parameter.
+    :raises BadRequestError: Raised if the parameter was given more than once.
+    """
+    value = http_request.arguments.get(name)
+    # Absent query parameters are passed on as empty lists.
+    if not value:
+        return None
+    if not isinstance(value, str):
+        raise BadRequestError(
+            description='Query parameter "%s" can only be given once.' % name)
+    return value
+
+
+@contract
+def get_fields_argument(http_request: HttpRequest) -> Optional[AbstractSet]:
+    """
+    Gets the sparse fieldset from the "fields" query parameter.
+
+    Fields are separated by commas, and the parameter may be given more than
+    once.
+    :return: Optional[AbstractSet[str]]. The names of the requested
+      properties, or None if all properties are requested.
+    :raises BadRequestError: Raised if the parameter is not a list of fields.
+    """
+    value = http_request.arguments.get('fields')
+    # Absent query parameters are passed on as empty lists.
+    if not value:
+        return None
+    if isinstance(value, Dict):
+        raise BadRequestError(
+            description='Fields must be given as fields=property,property.')
+    values = [value] if isinstance(value, str) else value
+    fields = frozenset(field for value in values for field in value.split(',')
+                       if field)
+    return fields if fields else None
+
+
+class ResourcesRequestType(RequestType):
+    """
+    Requests all resources, or a page of them.
+
+    Pagination is enabled by the "limit" and "cursor" query parameters. Pages
+    link to the next page through the HTTP Link header. Resources can be
+    filtered through the "filter" query parameter. See
+    alfred_rest.filter.parse_filters(). If the "explain" query parameter is
+    "true", the X-Query-Plan response header describes how the repository
+    selected the resources. The "fields" query parameter limits the resource
+    properties that are returned. See get_fields_argument(). The "id" query
+    parameter, which may be given more than once, limits the resources to
+    those with these IDs. See get_ids_argument().
+
+    Resources are sorted through the "sort" query parameter. See
+    alfred_rest.sort.parse_sort(). Sorted resources are always paginated, so
+    repositories never have to sort all of them at once.
+
+    If the "since" query parameter is given, only the changes to resources
+    since that sync token are returned. See
+    alfred_rest.changes.ChangeLog. It cannot be combined with the other
+    parameters, because those could hide changes.
+    """
+
+    DEFAULT_PAGE_LIMIT = 100
+    MAXIMUM_PAGE_LIMIT = 1000
+
+    def __init__(self):
+        super().__init__('resources', 'GET')
+
+    def get_parameters(self):
+        return (
+            RequestParameter(ResourcesPageLimitType(), name='limit',
+                             required=False),
+            RequestParameter(ResourcesPageCursorType(), name='cursor',
+                             required=False),
+            RequestParameter(ResourcesFilterType(), name='filter',
+                             required=False),
+            RequestParameter(ResourcesSortType(), name='sort',
+                             required=False),
+            RequestParameter(ResourcesExplainType(), name='explain',
+                             required=False),
+            RequestParameter(ResourcesFieldsType(), name='fields',
+                             required=False),
+            RequestParameter(ResourceIdType(), name='id', required=False),
+            RequestParameter(ResourcesSinceType(), name='since',
+                             required=False),
+        )
+
+    def from_http_request(self, http_request: HttpRequest):
+        filter_argument = http_request.arguments.get('filter')
+        if not filter_argument:
+            filter_argument = {}
+        elif not isinstance(filter_argument, Dict):
+            raise BadRequestError(
+                description='Filters must be given as filter[property]=value.')
+        request = ResourcesRequest(self._get_page(http_request),
+                                   parse_filters(filter_argument),
+                                   filter_argument,
+                                   'true' == get_query_argument(http_request,
+                                                                'explain'),
+                                   get_fields_argument(http_request),
+                                   get_ids_argument(http_request),
+                                   self._get_since(http_request))
+        if request.since is not None and any((
+                request.page is not None, request.filter_argument,
+                request.fields is not None, request.ids is not None)):
+            raise BadRequestError(
+                description='The "since" query parameter cannot be combined with pagination, sorting, filters, sparse fieldsets, or IDs.')
+        return request
+
+    @staticmethod
+    def _get_since(http_request: HttpRequest) -> Optional[str]:
+        since = get_query_argument(http_request, 'since')
+        if since is None:
+            return None
+        try:
+            parse_sync_token(since)
+        except ValueError:
+            raise BadRequestError(
+                description='The "since" query parameter must be a sync token from the X-Sequence response header, or 0.')
+        return since
+
+    def _get_page(self, http_request: HttpRequest) -> Optional[Page]:
+        limit = get_query_argument(http_request, 'limit')
+        cursor = get_query_argument(http_request, 'cursor')
+        sort = get_query_argument(http_request, 'sort')
+        if sort is not None:
+            sort = parse_sort(sort)
+        if limit is None and cursor is None and sort is None:
+            return None
+        if limit is None:
+            limit = self.DEFAULT_PAGE_LIMIT
+        else:
+            try:
+                limit = int(limit)
+            except ValueError:
+                limit = 0
+            if not 0 < limit <= self.MAXIMUM_PAGE_LIMIT:
+                raise BadRequestError(
+                    description='The limit must be an integer from 1 through %d.' % self.MAXIMUM_PAGE_LIMIT)
+        after = None
+        after_value = None
+        if cursor is not None:
+            decoded_cursor = decode_cursor(cursor)
+            after = decoded_cursor.get('after')
+            if not isinstance(after, str):
+                raise BadRequestError(
+                    description='Invalid cursor "%s".' % cursor)
+            if decoded_cursor.get('sort') != (
+                    None if sort is None else str(sort)):
+                raise BadRequestError(
+                    description='Cursor "%s" belongs to a different sort.' % cursor)
+            after_value = decoded_cursor.get('value')
+        return Page(limit, after, sort, after_value)
+
+
+class ResourcesRequest(Request):
+    @contract
+    def __init__(self, page: Optional[Page] = None, filters: Iterable = (),
+                 filter_argument: Optional[Dict] = None,
+                 explain: bool = False,
+                 fields: Optional[AbstractSet] = None,
+                 ids: Optional[List] = None, since: Optional[str] = None):
+        """
+
+        :param page:
+        :param filters: Iterable[alfred_rest.filter.Filter]
+        :param filter_argument: The "filter" query argument the filters were
+          parsed from, so they can be passed on to other pages.
+        :param explain: Whether to explain how resources are selected.
+        :param fields: Optional[AbstractSet[str]]. The names of the resource
+          properties to return, or None to return all properties.
+        :param ids: Optional[List[str]]. The IDs of the resources to return,
+          or None to return resources regardless of their IDs.
+        :param since: The sync token to return the changes since, or None
+          to return resources rather than changes.
+        """
+        self._page = page
+        self._filters = filters
+        self._filter_argument = filter_argument if filter_argument is not None else {}
+        self._explain = explain
+        self._fields = fields
+        self._ids = ids
+        self._since = since
+
+    @property
+    @contract
+    def page(self) -> Optional[Page]:
+        return self._page
+
+    @property
+    @contract
+    def filters(self) -> Iterable:
+        return self._filters
+
+    @property
+    @contract
+    def filter_argument(self) -> Dict:
+        return self._filter_argument
+
+    @property
+    @contract
+    def explain(self) -> bool:
+        return self._explain
+
+    @property
+    @contract
+    def fields(self) -> Optional[AbstractSet]:
+        return self._fields
+
+    @property
+    @contract
+    def ids(self) -> Optional[List]:
+        return self._ids
+
+    @property
+    @contract
+    def since(self) -> Optional[str]:
+        return self._since
+
+
+# The response header with the number of resources that write requests left
+# unchanged.
+UNCHANGED_RESOURCES_HEADER = 'X-Unchanged-Resources'
+
+
+class ResourcesResponse(SuccessResponse, PayloadedMessage):
+    @contract
+    def __init__(self, resources: Iterable, next_url: Optional[str] = None,
+                 query_plan: Optional[Dict] = None,
+                 fields: Optional[AbstractSet] = None,
+                 schema_url: Optional[str] = None, unchanged: int = 0):
+        """
+
+        :param resources:
+        :param next_url: The URL to the next page of resources, if there is
+          one.
+        :param query_plan: How the resources were selected, if this was
+          requested.
+        :param fields: Optional[AbstractSet[str]]. The names of the resource
+          properties to return, or None to return all properties.
+        :param schema_url: The URL to the schema of the sparse fieldsets, if
+          fields are given.
+        :param unchanged: The number of resources a write request left
+          unchanged, because they already were as requested.
+        """
+        super().__init__()
+        assert fields is None or schema_url is not None
+        self._resources = resources
+        self._next_url = next_url
+        self._query_plan = query_plan
+        self._fields = fields
+        self._schema_url = schema_url
+        self._unchanged = unchanged
+
+    @property
+    def payload(self):
+        if self._fields is not None:
+            return SparsePayload(self._resources, self._fields)
+        return self._resources
+
+    @property
+    def http_response_headers(self):
+        headers = {}
+        links = []
+        if self._next_url is not None:
+            links.append('<%s>; rel="next"' % self._next_url)
+        if self._fields is not None:
+            links.append('<%s>; rel="describedby"' % self._schema_url)
+        if links:
+            headers['Link'] = ', '.join(links)
+        if self._query_plan is not None:
+            headers['X-Query-Plan'] = json.dumps(self._query_plan,
+                                                 sort_keys=True)
+        if self._unchanged:
+            headers[UNCHANGED_RESOURCES_HEADER] = str(self._unchanged)
+        return headers
+
+
+class ResourceChangeType(OutputDataType):
+    @contract
+    def __init__(self, resource_type: OutputDataType):
+        self._resource_type = resource_type
+
+    def get_json_schema(self):
+        return {
+            'title': 'The latest change to a resource',
+            'type': 'object',
+            'properties': {
+                'id': {
+                    'title': 'The ID of the resource.',
+                    'type': 'string',
+                },
+                'sequence': {
+                    'title': 'The sequence number of the change.',
+                    'type': 'integer',
+                },
+                'deleted': {
+                    'title': 'Whether the resource was deleted.',
+                    'type': 'boolean',
+                },
+                'resource': self._resource_type,
+            },
+            'required': ['id', 'sequence', 'deleted'],
+        }
+
+    def to_json(self, data):
+        assert isinstance(data, ResourceChange)
+        json_data = {
+            'id': data.resource_id,
+            'sequence': data.sequence,
+            'deleted': data.deleted,
+        }
+        if not data.deleted:
+            json_data['resource'] = self._resource_type.to_json(data.resource)
+        return json_data
 
 
-class ExternalJsonSchemaRequest(Request):
+class ResourceChangesResponse(SuccessResponse, PayloadedMessage):
     @contract
-    def __init__(self, schema_url: str):
+    def __init__(self, changes: ResourceChanges,
+                 schema_url: Optional[str] = None):
+        """
+
+        :param changes:
+        :param schema_url: The URL to the schema of the changes, if this
+          response is converted by another response type than their own.
+        """
+        super().__init__()
+        self._changes = changes
         self._schema_url = schema_url
 
     @property
-    def schema_url(self):
-        return self._schema_url
-
-
-class ExternalJsonSchemaEndpoint(Endpoint):
-    """
-    Provides an endpoint that serves an external JSON Schema. This circumvents
-    Cross-Origin Resource Sharing (CORS) problems, by not requiring API clients
-    to load external resources themselves, and allows us to fix incorrect
-    headers, such as Content-Type.
+    def payload(self):
+        return self._changes.changes
 
-    The {id} parameter is the base64-encoded URL of the schema to load.
-    """
+    @property
+    def http_response_headers(self):
+        headers = {
+            'X-Sequence': self._changes.token,
+        }
+        if self._schema_url is not None:
+            headers['Link'] = '<%s>; rel="describedby"' % self._schema_url
+        return headers
 
-    def __init__(self):
-        super().__init__('external-schema', '/about/json/external-schema/{id}',
-                         ExternalJsonSchemaRequestType(),
-                         JsonSchemaResponseType())
-        self._urls = App.current.service('http', 'urls')
-        self._schemas = App.current.service('json', 'schemas')
 
-    def handle(self, request):
-        assert isinstance(request, ExternalJsonSchemaRequest)
-        schema_url = request.schema_url
-        try:
-            schema = self._schemas.get_schema(schema_url)
-            return JsonSchemaResponse(schema)
-        except SchemaNotFound:
-            raise NotFoundError()
+def build_resource_changes_response_type_class(
+        resource_type: Union[OutputDataType, IdentifiableDataType]):
+    assert isinstance(resource_type, OutputDataType)
+    assert isinstance(resource_type, IdentifiableDataType)
 
+    class ResourceChangesResponseType(ResponseType):
+        """
+        Responds with the changes to resources since a sync token.
+        """
+        _resource_type = resource_type
+        _type = ListType(ResourceChangeType(resource_type))
 
-class ResourcesResponse(SuccessResponse, PayloadedMessage):
-    @contract
-    def __init__(self, resources: Iterable):
-        super().__init__()
-        self._resources = resources
+        def __init__(self):
+            super().__init__('%ss-changes' % self._resource_type.name,
+                             build_response_payload_types(self._type) + (
+                                 NdjsonResponsePayloadType(self._type),))
 
-    @property
-    def payload(self):
-        return self._resources
+    return ResourceChangesResponseType
 
 
 def build_resources_response_type_class(
@@ -295,13 +1430,34 @@ def build_resources_response_type_class(
     assert isinstance(resource_type, OutputDataType)
     assert isinstance(resource_type, IdentifiableDataType)
 
-    class ResourcesResponseType(ResponseType):
+    class ResourcesResponseType(SparseResponseType):
+        """
+        Responds with resources, or with the changes to them, which are
+        converted by self.changes_response_type.
+        """
         _resource_type = resource_type
         _type = ListType(resource_type)
 
         def __init__(self):
             super().__init__('%ss' % self._resource_type.name,
-                             (JsonResponsePayloadType(self._type),))
+                             build_response_payload_types(self._type) + (
+                                 NdjsonResponsePayloadType(self._type),))
+            self._changes_response_type = \
+                build_resource_changes_response_type_class(
+                    self._resource_type)()
+
+        @property
+        def changes_response_type(self) -> ResponseType:
+            return self._changes_response_type
+
+        def get_linked_response_types(self):
+            return self._changes_response_type,
+
+        def to_http_response(self, response, content_type):
+            if isinstance(response, ResourceChangesResponse):
+                return self._changes_response_type.to_http_response(
+                    response, content_type)
+            return super().to_http_response(response, content_type)
 
     return ResourcesResponseType
 
@@ -312,46 +1468,165 @@ class GetResourcesEndpoint(Endpoint):
         resource_name = resources.get_type().name
         super().__init__('%ss' % resource_name,
                          '/%ss' % resource_name,
-                         NonConfigurableGetRequestType(),
+                         ResourcesRequestType(),
                          build_resources_response_type_class(
                              resources.get_type())())
         self._resources = resources
+        self._published = resources.get_type().name in App.current.service(
+            'rest', 'published_resource_type_names')
+
+    def get_cache_dependencies(self):
+        if not self._published:
+            return None
+        return self._resources.get_type().name,
 
     def handle(self, request: Request):
-        return ResourcesResponse(self._resources.get_resources())
+        assert isinstance(request, ResourcesRequest)
+        if request.since is not None:
+            return self._get_changes(request.since)
+        page = request.page
+        # Get one more resource than requested, to find out if there is a next
+        # page.
+        repository_page = None if page is None else Page(
+            page.limit + 1, page.after, page.sort, page.after_value)
+        query_plan = None
+        if request.explain:
+            query_plan = self._resources.explain(request.ids, request.filters,
+                                                 repository_page)
+        fields = request.fields
+        schema_url = None
+        if fields is not None:
+            schema_url = self.response_type.get_sparse_schema_url()
+        resources = self._resources.get_resources(request.ids,
+                                                  request.filters,
+                                                  repository_page)
+        if page is None:
+            return ResourcesResponse(resources, query_plan=query_plan,
+                                     fields=fields, schema_url=schema_url)
+        resources = list(resources)
+        if len(resources) <= page.limit:
+            return ResourcesResponse(resources, query_plan=query_plan,
+                                     fields=fields, schema_url=schema_url)
+        resources = resources[:page.limit]
+        next_parameters = build_deep_object_query('filter',
+                                                  request.filter_argument)
+        cursor = {
+            'after': resources[-1].id,
+        }
+        if page.sort is not None:
+            cursor['sort'] = str(page.sort)
+            cursor['value'] = page.sort.get_value_getter(
+                self._resources.get_type())(resources[-1])
+            next_parameters['sort'] = str(page.sort)
+        next_parameters.update({
+            'limit': str(page.limit),
+            'cursor': encode_cursor(cursor),
+        })
+        if fields is not None:
+            next_parameters['fields'] = ','.join(sorted(fields))
+        if request.ids is not None:
+            next_parameters['id'] = request.ids
+        next_url = App.current.service('http', 'urls').build(
+            self.name, next_parameters)
+        return ResourcesResponse(resources, next_url, query_plan, fields,
+                                 schema_url)
+
+    def _get_changes(self, since: str) -> ResourceChangesResponse:
+        if not isinstance(self._resources, SyncableResourceRepository):
+            raise BadRequestError(
+                description='These resources cannot be synced through the "since" query parameter.')
+        try:
+            changes = self._resources.get_changes(since)
+        except ChangesExpired as e:
+            raise GoneError(description=str(e))
+        return ResourceChangesResponse(changes, build_response_schema_url(
+            self.response_type.changes_response_type.name))
 
 
 class ResourceRequest(Request):
     @contract
-    def __init__(self, resource_id: str):
+    def __init__(self, resource_id: str, fields: Optional[AbstractSet] = None):
+        """
+
+        :param resource_id:
+        :param fields: Optional[AbstractSet[str]]. The names of the resource
+          properties to return, or None to return all properties.
+        """
         self._id = resource_id
+        self._fields = fields
 
     @property
     @contract
     def id(self) -> str:
         return self._id
 
+    @property
+    @contract
+    def fields(self) -> Optional[AbstractSet]:
+        return self._fields
+
 
 class ResourceResponse(SuccessResponse, PayloadedMessage):
-    def __init__(self, resource):
+    @contract
+    def __init__(self, resource, fields: Optional[AbstractSet] = None,
+                 schema_url: Optional[str] = None, unchanged: bool = False):
+        """
+
+        :param resource:
+        :param fields: Optional[AbstractSet[str]]. The names of the resource
+          properties to return, or None to return all properties.
+        :param schema_url: The URL to the schema of the sparse fieldset, if
+          fields are given.
+        :param unchanged: Whether a write request left the resource unchanged,
+          because it already was as requested.
+        """
         super().__init__()
         assert resource is not None
+        assert fields is None or schema_url is not None
         self._resource = resource
+        self._fields = fields
+        self._schema_url = schema_url
+        self._unchanged = unchanged
 
     @property
     def payload(self):
+        if self._fields is not None:
+            return SparsePayload(self._resource, self._fields)
         return self._resource
 
+    @property
+    def http_response_headers(self):
+        headers = {}
+        if self._fields is not None:
+            headers['Link'] = '<%s>; rel="describedby"' % self._schema_url
+        if self._unchanged:
+            headers[UNCHANGED_RESOURCES_HEADER] = '1'
+        return headers
+
 
 class ResourceRequestType(RequestType):
+    """
+    Requests a single resource.
+
+    The "fields" query parameter of GET requests limits the resource
+    properties that are returned. See get_fields_argument().
+    """
+
     def __init__(self, method='GET', payload_types=()):
         super().__init__('resource', method, payload_types)
 
     def get_parameters(self):
-        return RequestParameter(ResourceIdType(), name='id'),
+        parameters = RequestParameter(ResourceIdType(), name='id'),
+        if 'GET' == self.method:
+            parameters += RequestParameter(ResourcesFieldsType(),
+                                           name='fields', required=False),
+        return parameters
 
     def from_http_request(self, http_request: HttpRequest):
-        return ResourceRequest(http_request.arguments['id'])
+        fields = None
+        if 'GET' == self.method:
+            fields = get_fields_argument(http_request)
+        return ResourceRequest(http_request.arguments['id'], fields)
 
 
 def build_resource_response_type_class(
@@ -359,12 +1634,13 @@ def build_resource_response_type_class(
     assert isinstance(resource_type, OutputDataType)
     assert isinstance(resource_type, IdentifiableDataType)
 
-    class ResourceResponseType(ResponseType):
+    class ResourceResponseType(SparseResponseType):
         _resource_type = resource_type
 
         def __init__(self):
             super().__init__('%s' % self._resource_type.name,
-                             (JsonResponsePayloadType(self._resource_type),))
+                             build_response_payload_types(
+                                 self._resource_type))
 
     return ResourceResponseType
 
@@ -378,13 +1654,24 @@ class GetResourceEndpoint(Endpoint):
                          build_resource_response_type_class(
                              resources.get_type())())
         self._resources = resources
+        self._published = resources.get_type().name in App.current.service(
+            'rest', 'published_resource_type_names')
+
+    def get_cache_dependencies(self):
+        if not self._published:
+            return None
+        return self._resources.get_type().name,
 
     def handle(self, request: Request):
         assert isinstance(request, ResourceRequest)
         try:
-            return ResourceResponse(self._resources.get_resource(request.id))
+            resource = self._resources.get_resource(request.id)
         except ResourceNotFound:
             raise NotFoundError()
+        if request.fields is None:
+            return ResourceResponse(resource)
+        return ResourceResponse(resource, request.fields,
+                                self.response_type.get_sparse_schema_url())
 
 
 def build_add_resource_request_type_class(
@@ -396,8 +1683,13 @@ def build_add_resource_request_type_class(
         _type = resource_type
 
         def __init__(self):
-            super().__init__('%s' % self._type.name, 'POST',
-                             (JsonRequestPayloadType(self._type),))
+            super().__init__('%s' % self._type.name, 'POST', (
+                JsonBatchRequestPayloadType(
+                    ResourceBatchType(self._type, True)),
+                MsgpackRequestPayloadType(self._type),
+                CborRequestPayloadType(self._type),
+                NdjsonRequestPayloadType(self._type),
+            ))
 
         def from_http_request(self, http_request):
             return AddResourceRequest(
@@ -408,6 +1700,11 @@ def build_add_resource_request_type_class(
 
 class AddResourceRequest(Request, PayloadedMessage):
     def __init__(self, resource):
+        """
+
+        :param resource: Any. The resource, a ResourceBatch, or a
+          ResourceImport.
+        """
         self._resource = resource
 
     @property
@@ -415,23 +1712,251 @@ class AddResourceRequest(Request, PayloadedMessage):
         return self._resource
 
 
+class ResourceImportResponse(SuccessResponse, PayloadedMessage):
+    @contract
+    def __init__(self, items: Iterable):
+        """
+
+        :param items: Iterable[ResourceBatchItem]
+        """
+        super().__init__()
+        self._items = items
+
+    @property
+    def payload(self):
+        return self._items
+
+
+class ResourceBatchResponse(SuccessResponse, PayloadedMessage):
+    @contract
+    def __init__(self, items: Iterable, schema_url: Optional[str] = None):
+        """
+
+        :param items: Iterable[ResourceBatchItem]
+        :param schema_url: The URL to the schema of this response, if it is
+          not described by the endpoint's response type.
+        """
+        super().__init__()
+        self._items = items
+        self._schema_url = schema_url
+
+    @property
+    def payload(self):
+        return self._items
+
+    @property
+    def http_response_headers(self):
+        if self._schema_url is None:
+            return {}
+        return {
+            'Link': '<%s>; rel="describedby"' % self._schema_url,
+        }
+
+
+def build_resource_batch_response_type_class(
+        resource_type: Union[OutputDataType, IdentifiableDataType]):
+    assert isinstance(resource_type, OutputDataType)
+    assert isinstance(resource_type, IdentifiableDataType)
+
+    class ResourceBatchResponseType(ResponseType):
+        """
+        Responds with the results of processing each resource of a batch.
+        """
+        _resource_type = resource_type
+        _type = ListType(ResourceBatchItemType(resource_type))
+
+        def __init__(self):
+            super().__init__('%ss-batch' % self._resource_type.name,
+                             build_response_payload_types(self._type) + (
+                                 NdjsonResponsePayloadType(self._type),))
+
+    return ResourceBatchResponseType
+
+
+def build_add_resource_response_type_class(
+        resource_type: Union[OutputDataType, IdentifiableDataType]):
+    assert isinstance(resource_type, OutputDataType)
+    assert isinstance(resource_type, IdentifiableDataType)
+
+    class AddResourceResponseType(ResponseType):
+        """
+        Responds with added resources, or with reports of resource batches and
+        imports.
+
+        Batches are reported by self.batch_response_type. Imports are always
+        reported as newline-delimited JSON, with one line per imported line.
+        """
+        _resource_type = resource_type
+
+        def __init__(self):
+            super().__init__('%s' % self._resource_type.name,
+                             build_response_payload_types(
+                                 self._resource_type) + (
+                                 NdjsonResponsePayloadType(
+                                     self._resource_type),))
+            self._import_payload_type = NdjsonResponsePayloadType(
+                ListType(ResourceBatchItemType(
+                    self._resource_type, 'line',
+                    'The line number of the resource in the import.')))
+            self._batch_response_type = \
+                build_resource_batch_response_type_class(
+                    self._resource_type)()
+
+        @property
+        def batch_response_type(self) -> ResponseType:
+            return self._batch_response_type
+
+        def get_linked_response_types(self):
+            return self._batch_response_type,
+
+        def to_http_response(self, response, content_type):
+            if isinstance(response, ResourceBatchResponse):
+                return self._batch_response_type.to_http_response(
+                    response, content_type)
+            if isinstance(response, ResourceImportResponse):
+                content_type = NdjsonPayloadType.CONTENT_TYPE
+                http_response = HttpResponseBuilder()
+                http_response.body = \
+                    self._import_payload_type.to_http_response_body(
+                        response.payload, content_type)
+                http_response.status = response.http_response_status_code
+                http_response.headers.update(response.http_response_headers)
+                return http_response.to_response()
+            return super().to_http_response(response, content_type)
+
+    return AddResourceResponseType
+
+
+@contract
+def publish_resources_changed(resources: ResourceRepository,
+                              changed_resources: Iterable,
+                              deleted: bool = False):
+    """
+    Publishes that resources changed on the app's event bus.
+    :param resources: The repository the resources belong to.
+    :param changed_resources: The resources that were added, updated, or
+      deleted.
+    """
+    resource_ids = [resource.id for resource in changed_resources]
+    if resource_ids:
+        App.current.events.publish(ResourcesChanged(
+            resources.get_type().name, resource_ids, deleted))
+
+
 class AddResourceEndpoint(Endpoint):
+    """
+    Adds a single resource, a JSON array of resources, or imports
+    newline-delimited JSON resources.
+
+    Arrays and imported resources are added in batches as the request body is
+    read. Both are reported per resource, and only once all resources have
+    been added, so that clients that disconnect early do not abort imports
+    midway.
+    """
+
+    BATCH_SIZE = 100
+
     @contract
     def __init__(self, resources: ExpandableResourceRepository):
         resource_name = resources.get_type().name
         super().__init__('%s-add' % resource_name, '/%ss' % resource_name,
                          build_add_resource_request_type_class(
                              resources.get_add_type())(),
-                         build_resource_response_type_class(
+                         build_add_resource_response_type_class(
                              resources.get_type())())
         self._resources = resources
 
     def handle(self, request: Request):
         assert isinstance(request, AddResourceRequest)
+        if isinstance(request.payload, ResourceImport):
+            return ResourceImportResponse(
+                list(self._add_batches(request.payload)))
+        if isinstance(request.payload, ResourceBatch):
+            return ResourceBatchResponse(
+                list(self._add_batches(request.payload)),
+                build_response_schema_url(
+                    self.response_type.batch_response_type.name))
         resource = request.payload
         # @todo How to handle validation?
-        resources = self._resources.add_resources((resource,))
-        return ResourceResponse(list(resources)[0])
+        resources = list(self._resources.add_resources((resource,)))
+        publish_resources_changed(self._resources, resources)
+        return ResourceResponse(resources[0])
+
+    def _add_batches(self, resource_batch: ResourceBatch):
+        for batch in split_batches(resource_batch, self.BATCH_SIZE):
+            yield from self._add_batch(batch)
+
+    def _add_batch(self, batch: List):
+        """
+        Adds the valid items of a batch.
+
+        The items are added in a single call to the repository. If that fails,
+        they are added one by one instead, so each is reported with its own
+        result.
+        :param batch: List[ResourceBatchItem]
+        :return: Iterable[ResourceBatchItem]
+        """
+        items = [item for item in batch if item.error is None]
+        if not items:
+            return batch
+        try:
+            added_resources = list(self._resources.add_resources(
+                [item.resource for item in items]))
+        except Exception:
+            results = {item.index: self._add_item(item) for item in items}
+        else:
+            results = {item.index: item.with_result(resource) for
+                       item, resource in zip(items, added_resources)}
+        publish_resources_changed(self._resources, [
+            result.resource for result in results.values() if
+            result.error is None])
+        return [results.get(item.index, item) for item in batch]
+
+    def _add_item(self, item: ResourceBatchItem) -> ResourceBatchItem:
+        """
+        Adds a single item, after adding its batch failed.
+        """
+        resource_id = item.resource.id
+        try:
+            existing_resource = self._resources.get_resource(resource_id)
+        except ResourceNotFound:
+            pass
+        else:
+            # The batch may have added the resource before it failed.
+            if existing_resource is item.resource:
+                return item.with_result(existing_resource)
+            return item.with_result(error=ConflictError(
+                description='Resource "%s" already exists.' % resource_id))
+        try:
+            return item.with_result(list(self._resources.add_resources(
+                (item.resource,)))[0])
+        except Error as e:
+            return item.with_result(error=e)
+        except Exception as e:
+            logging.getLogger(__name__).exception(
+                'Could not add resource "%s".', resource_id)
+            return item.with_result(error=InternalServerError(
+                description=str(e)))
+
+
+class ReplacementType(InputDataType):
+    """
+    Validates resources that replace others, but leaves deserializing them to
+    the endpoint, so it can first compare them with the resources they
+    replace.
+
+    Payloads are the resources' JSON data.
+    """
+
+    @contract
+    def __init__(self, resource_type: InputDataType):
+        self._resource_type = resource_type
+
+    def get_json_schema(self):
+        return self._resource_type.get_json_schema()
+
+    def from_json(self, json_data):
+        return json_data
 
 
 def build_replace_resource_request_type_class(
@@ -444,7 +1969,8 @@ def build_replace_resource_request_type_class(
 
         def __init__(self):
             super().__init__('%s' % self._resource_type.name, 'PUT',
-                             (JsonRequestPayloadType(self._resource_type),))
+                             build_request_payload_types(
+                                 ReplacementType(self._resource_type)))
 
         def from_http_request(self, http_request: HttpRequest):
             return ReplaceResourceRequest(http_request.arguments['id'],
@@ -459,18 +1985,20 @@ def build_replace_resource_request_type_class(
 
 class ReplaceResourceRequest(Request, PayloadedMessage):
     @contract
-    def __init__(self, resource_id: str, resource):
-        assert resource is not None
+    def __init__(self, resource_id: str, resource_data: Dict):
         self._resource_id = resource_id
-        self._resource = resource
+        self._resource_data = resource_data
 
     @property
     def resource_id(self) -> str:
         return self._resource_id
 
     @property
-    def payload(self):
-        return self._resource
+    def payload(self) -> Dict:
+        """
+        Gets the replacement resource's JSON data.
+        """
+        return self._resource_data
 
 
 class ReplaceResourceEndpoint(Endpoint):
@@ -487,13 +2015,123 @@ class ReplaceResourceEndpoint(Endpoint):
 
     def handle(self, request: Request):
         assert isinstance(request, ReplaceResourceRequest)
-        resource = request.payload
+        resource_type = self._resources.get_update_type()
+        resource_data = request.payload
+        if isinstance(resource_type, OutputDataType):
+            try:
+                resource = self._resources.get_resource(request.resource_id)
+            except ResourceNotFound:
+                pass
+            else:
+                if not get_changed_properties(resource_type, resource,
+                                              resource_data):
+                    return ResourceResponse(resource, unchanged=True)
+        resource = resource_type.from_json(resource_data)
         # @todo How to handle validation?
         try:
-            resources = self._resources.update_resources((resource,))
+            resources = list(self._resources.update_resources((resource,)))
         except ResourceNotFound as e:
             raise NotFoundError(description=str(e))
-        return ResourceResponse(list(resources)[0])
+        publish_resources_changed(self._resources, resources)
+        return ResourceResponse(resources[0])
+
+
+def build_replace_resources_request_type_class(
+        resource_type: Union[InputDataType, IdentifiableDataType]):
+    assert isinstance(resource_type, InputDataType)
+    assert isinstance(resource_type, IdentifiableDataType)
+
+    class ReplaceResourcesRequestType(RequestType):
+        _resource_type = resource_type
+
+        def __init__(self):
+            super().__init__('%ss-replace' % self._resource_type.name, 'PUT',
+                             (JsonBatchRequestPayloadType(ResourceBatchType(
+                                 self._resource_type)),))
+
+        def from_http_request(self, http_request: HttpRequest):
+            return ReplaceResourcesRequest(self._from_http_request_payload(
+                http_request.body))
+
+    return ReplaceResourcesRequestType
+
+
+class ReplaceResourcesRequest(Request, PayloadedMessage):
+    @contract
+    def __init__(self, batch: ResourceBatch):
+        self._batch = batch
+
+    @property
+    def payload(self):
+        return self._batch
+
+
+class ReplaceResourcesEndpoint(Endpoint):
+    """
+    Replaces a JSON array of resources.
+
+    Resources are replaced in batches as the request body is read. Those that
+    do not exist are reported as not found.
+    """
+
+    BATCH_SIZE = 100
+
+    @contract
+    def __init__(self, resources: UpdateableResourceRepository):
+        resource_name = resources.get_type().name
+        super().__init__('%ss-replace' % resource_name,
+                         '/%ss' % resource_name,
+                         build_replace_resources_request_type_class(
+                             resources.get_update_type())(),
+                         build_resource_batch_response_type_class(
+                             resources.get_type())())
+        self._resources = resources
+
+    def handle(self, request: Request):
+        assert isinstance(request, ReplaceResourcesRequest)
+        return ResourceBatchResponse(list(self._replace_batches(
+            request.payload)))
+
+    def _replace_batches(self, resource_batch: ResourceBatch):
+        for batch in split_batches(resource_batch, self.BATCH_SIZE):
+            yield from self._replace_batch(batch)
+
+    def _replace_batch(self, batch: List):
+        """
+        Replaces the valid items of a batch that exist.
+        :param batch: List[ResourceBatchItem]
+        :return: Iterable[ResourceBatchItem]
+        """
+        items = [item for item in batch if item.error is None]
+        existing_ids = {resource.id for resource in
+                        self._resources.get_resources(
+                            ids=[item.resource.id for item in items])}
+        results = {}
+        replaceable_items = []
+        for item in items:
+            if item.resource.id in existing_ids:
+                replaceable_items.append(item)
+            else:
+                results[item.index] = item.with_result(error=NotFoundError(
+                    description='Could not find resource "%s".' %
+                                item.resource.id))
+        if replaceable_items:
+            # @todo How to handle validation?
+            try:
+                updated_resources = list(self._resources.update_resources(
+                    [item.resource for item in replaceable_items]))
+                publish_resources_changed(self._resources, updated_resources)
+                for item, resource in zip(replaceable_items,
+                                          updated_resources):
+                    results[item.index] = item.with_result(resource)
+            except ResourceNotFound as e:
+                for item in replaceable_items:
+                    results[item.index] = item.with_result(
+                        error=NotFoundError(description=str(e)))
+            except Error as e:
+                for item in replaceable_items:
+                    results[item.index] = item.with_result(error=e)
+        return [results.get(item.index, item) for item in batch]
 
 
 class JsonPatchPathType(IdentifiableDataType):
@@ -592,6 +2230,7 @@ class AlterResourceEndpoint(Endpoint):
                          build_resource_response_type_class(
                              resource_type)())
         self._resources = resources
+        self._serializers = App.current.service('json', 'serializers')
 
     def handle(self, request: Request):
         assert isinstance(request, AlterResourceRequest)
@@ -602,14 +2241,16 @@ class AlterResourceEndpoint(Endpoint):
             resource = self._resources.get_resource(resource_id)
         except ResourceNotFound:
             raise NotFoundError()
-        resource_data = resource_type.to_json(resource)
-        resource_data = patch.apply(resource_data)
-        resource = resource_type.update_from_json(resource_data, resource)
+        resource, changed_properties = patch_resource(
+            patch, resource, resource_type, self._serializers)
+        if not changed_properties:
+            return ResourceResponse(resource, unchanged=True)
         # @todo How to handle validation?
         try:
             updated_resource = self._resources.update_resource(resource)
         except ResourceNotFound as e:
             raise NotFoundError(description=str(e))
+        publish_resources_changed(self._resources, (updated_resource,))
         return ResourceResponse(updated_resource)
 
 
@@ -648,20 +2289,31 @@ class AlterResourcesEndpoint(Endpoint):
                          build_resources_response_type_class(
                              resource_type)())
         self._resources = resources
+        self._serializers = App.current.service('json', 'serializers')
 
     def handle(self, request: Request):
         assert isinstance(request, AlterResourcesRequest)
         resource_type = self._resources.get_update_type()
         patch = request.payload
-        resources = self._resources.get_resources()
-        updated_resources = []
-        for resource in resources:
-            resource_data = resource_type.to_json(resource)
-            resource_data = patch.apply(resource_data)
-            updated_resources.append(resource_type.from_json(resource_data))
+        resources = []
+        altered_resources = []
+        for resource in self._resources.get_resources():
+            resource, changed_properties = patch_resource(
+                patch, resource, resource_type, self._serializers)
+            resources.append(resource)
+            if changed_properties:
+                altered_resources.append(resource)
         # @todo How to handle validation?
-        updated_resources = self._resources.update_resources(updated_resources)
-        return ResourcesResponse(updated_resources)
+        updated_resources = {}
+        if altered_resources:
+            updated_resources = {
+                resource.id: resource for resource in
+                self._resources.update_resources(altered_resources)}
+        publish_resources_changed(self._resources, updated_resources.values())
+        return ResourcesResponse(
+            [updated_resources.get(resource.id, resource)
+             for resource in resources],
+            unchanged=len(resources) - len(altered_resources))
 
 
 class DeleteResourceEndpoint(Endpoint):
@@ -681,9 +2333,103 @@ class DeleteResourceEndpoint(Endpoint):
         except ResourceNotFound:
             return SuccessResponse()
         self._resources.delete_resources((resource,))
+        publish_resources_changed(self._resources, (resource,), True)
         return SuccessResponse()
 
 
+@contract
+def get_ids_argument(http_request: HttpRequest) -> Optional[List]:
+    """
+    Gets resource IDs from the "id" query parameter, which may be given more
+    than once.
+    :return: Optional[List[str]]. The IDs, or None if none were given.
+    :raises BadRequestError: Raised if the parameter is not a list of IDs.
+    """
+    value = http_request.arguments.get('id')
+    # Absent query parameters are passed on as empty lists.
+    if not value:
+        return None
+    if isinstance(value, Dict):
+        raise BadRequestError(
+            description='IDs must be given as id=foo&id=bar.')
+    return [value] if isinstance(value, str) else list(value)
+
+
+class DeleteResourcesRequestType(RequestType):
+    """
+    Requests resources to be deleted, by the IDs in the "id" query parameter.
+    """
+
+    def __init__(self):
+        super().__init__('resources-delete', 'DELETE')
+
+    def get_parameters(self):
+        return RequestParameter(ResourceIdType(), name='id', required=False),
+
+    def from_http_request(self, http_request: HttpRequest):
+        ids = get_ids_argument(http_request)
+        if ids is None:
+            raise BadRequestError(
+                description='Give the IDs of the resources to delete, e.g. id=foo&id=bar.')
+        return DeleteResourcesRequest(ids)
+
+
+class DeleteResourcesRequest(Request):
+    @contract
+    def __init__(self, ids: List):
+        """
+
+        :param ids: List[str]
+        """
+        self._ids = ids
+
+    @property
+    @contract
+    def ids(self) -> List:
+        return self._ids
+
+
+class DeleteResourcesEndpoint(Endpoint):
+    """
+    Deletes resources by their IDs.
+
+    Resources that do not exist are reported as not found. All others are
+    deleted in a single batch.
+    """
+
+    @contract
+    def __init__(self, resources: ShrinkableResourceRepository):
+        resource_name = resources.get_type().name
+        super().__init__('%ss-delete' % resource_name,
+                         '/%ss' % resource_name,
+                         DeleteResourcesRequestType(),
+                         build_resource_batch_response_type_class(
+                             resources.get_type())())
+        self._resources = resources
+
+    def handle(self, request: Request):
+        assert isinstance(request, DeleteResourcesRequest)
+        resources = {resource.id: resource for resource in
+                     self._resources.get_resources(ids=request.ids)}
+        items = []
+        for index, resource_id in enumerate(request.ids):
+            if resource_id in resources:
+                items.append(ResourceBatchItem(index, resources[resource_id]))
+            else:
+                items.append(ResourceBatchItem(index, error=NotFoundError(
+                    description='Could not find resource "%s".' %
+                                resource_id)))
+        if resources:
+            try:
+                self._resources.delete_resources(resources.values())
+                publish_resources_changed(self._resources,
+                                          resources.values(), True)
+            except Error as e:
+                items = [item if item.error is not None else
+                         item.with_result(error=e) for item in items]
+        return ResourceBatchResponse(items)
+
+
 class ResourceEndpointRepository(EndpointRepository):
     """
     Provides endpoints for resource types.
@@ -719,10 +2465,12 @@ class ResourceEndpointRepository(EndpointRepository):
             endpoints.append(AddResourceEndpoint(resources))
         if isinstance(resources, UpdateableResourceRepository):
             endpoints.append(ReplaceResourceEndpoint(resources))
+            endpoints.append(ReplaceResourcesEndpoint(resources))
             if isinstance(resources.get_update_type(), OutputDataType):
                 endpoints.append(AlterResourceEndpoint(resources))
                 endpoints.append(AlterResourcesEndpoint(resources))
         if isinstance(resources, ShrinkableResourceRepository):
             endpoints.append(DeleteResourceEndpoint(resources))
+            endpoints.append(DeleteResourcesEndpoint(resources))
 
         return endpoints
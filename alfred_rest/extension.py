@@ -1,6 +1,11 @@
+import os
+
 from alfred.app import Extension, App
 from alfred_http.endpoints import EndpointFactoryRepository
 from alfred_http.extension import HttpExtension
+from alfred_rest.cache import EncodedResourceCache, \
+    build_caching_resource_repository
+from alfred_rest.changes import ResourcesChanged
 from alfred_rest.endpoints import JsonSchemaEndpoint, \
     ExternalJsonSchemaEndpoint, ResourceEndpointRepository, ErrorPayloadType
 from alfred_rest.json import ExternalReferenceProxy
@@ -37,13 +42,32 @@ class RestExtension(Extension):
     def _rest_error_response_payload_type(self):
         return ErrorPayloadType()
 
+    @Extension.service()
+    def _encoded_resources(self):
+        cache = EncodedResourceCache()
+        App.current.events.subscribe(
+            ResourcesChanged,
+            lambda event: cache.invalidate(event.resource_type_name,
+                                           event.resource_ids))
+        return cache
+
+    @Extension.service()
+    def _published_resource_type_names(self):
+        return frozenset(resources.get_type().name for resources in
+                         App.current.services(tag='published_resources'))
+
     @Extension.service()
     def _resources(self):
         resources = {}
+        cached_resources = App.current.services(tag='cached_resources')
         for tagged_resources in App.current.services(tag='resources'):
+            if any(tagged_resources is cached for cached in cached_resources):
+                tagged_resources = build_caching_resource_repository(
+                    tagged_resources)
             resources[tagged_resources.get_type().name] = tagged_resources
         return resources
 
     @Extension.service(tags=('json_schema',))
     def _alfred_json_schema(self):
-        return AlfredJsonSchema().get()
+        return AlfredJsonSchema(os.environ.get(
+            'ALFRED_DEDUPLICATE_SCHEMAS', '') not in ('', '0')).get()
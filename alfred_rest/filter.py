@@ -0,0 +1,268 @@
+import abc
+import json
+from operator import attrgetter
+from typing import Iterable, Dict, List, Callable
+
+from contracts import contract, ContractsMeta, with_metaclass
+
+from alfred_http.endpoints import BadRequestError
+from alfred_json.type import OutputDataType, get_described_properties
+
+
+class Filter(with_metaclass(ContractsMeta)):
+    """
+    Filters resources by the value of one of their JSON properties.
+    """
+
+    @contract
+    def __init__(self, property_name: str):
+        self._property_name = property_name
+
+    @property
+    @contract
+    def property_name(self) -> str:
+        return self._property_name
+
+    @abc.abstractmethod
+    @contract
+    def matches(self, value) -> bool:
+        """
+        Checks whether a property value matches this filter.
+        """
+        pass
+
+
+def comparison_key(value):
+    """
+    Converts a JSON value to a key that is equal to the keys of equal values.
+
+    Python considers True and 1 equal, but JSON does not.
+    """
+    return isinstance(value, bool), value
+
+
+class EqualsFilter(Filter):
+    def __init__(self, property_name: str, value):
+        super().__init__(property_name)
+        self._value = value
+
+    @property
+    def value(self):
+        return self._value
+
+    def matches(self, value):
+        return comparison_key(value) == comparison_key(self._value)
+
+
+class InFilter(Filter):
+    @contract
+    def __init__(self, property_name: str, values: Iterable):
+        super().__init__(property_name)
+        self._values = list(values)
+        self._keys = set(map(comparison_key, self._values))
+
+    @property
+    @contract
+    def values(self) -> List:
+        return self._values
+
+    def matches(self, value):
+        try:
+            return comparison_key(value) in self._keys
+        except TypeError:
+            # Unhashable values, such as objects, never match.
+            return False
+
+
+class RangeFilter(Filter):
+    def __init__(self, property_name: str, minimum=None, maximum=None,
+                 exclusive_minimum=False, exclusive_maximum=False):
+        super().__init__(property_name)
+        assert minimum is not None or maximum is not None
+        self._minimum = minimum
+        self._maximum = maximum
+        self._exclusive_minimum = exclusive_minimum
+        self._exclusive_maximum = exclusive_maximum
+
+    @property
+    def minimum(self):
+        return self._minimum
+
+    @property
+    def maximum(self):
+        return self._maximum
+
+    @property
+    @contract
+    def exclusive_minimum(self) -> bool:
+        return self._exclusive_minimum
+
+    @property
+    @contract
+    def exclusive_maximum(self) -> bool:
+        return self._exclusive_maximum
+
+    def matches(self, value):
+        if isinstance(value, bool):
+            return False
+        try:
+            if self._minimum is not None:
+                if value < self._minimum or self._exclusive_minimum and \
+                        value == self._minimum:
+                    return False
+            if self._maximum is not None:
+                if value > self._maximum or self._exclusive_maximum and \
+                        value == self._maximum:
+                    return False
+        except TypeError:
+            # Values cannot be compared to bounds of other types.
+            return False
+        return True
+
+
+def _reject_constant(constant: str):
+    raise ValueError('%s is not a filter value.' % constant)
+
+
+@contract
+def parse_filter_value(value: str):
+    """
+    Parses a filter value from a query string.
+
+    Values that are JSON scalars, such as true, 3.5, or "3.5", are parsed as
+    such. All other values are strings.
+    """
+    try:
+        parsed = json.loads(value, parse_constant=_reject_constant)
+    except ValueError:
+        return value
+    if isinstance(parsed, (List, Dict)):
+        return value
+    return parsed
+
+
+_RANGE_OPERATORS = ('gt', 'gte', 'lt', 'lte')
+
+
+@contract
+def parse_filters(argument: Dict) -> List:
+    """
+    Parses filters from a "deep object" query argument.
+
+    The argument's keys are property names, and its values are either values
+    to match, or dictionaries of operators and their operands:
+    - filter[type]=ola
+    - filter[type][eq]=ola
+    - filter[type][in]=ola,hue, or filter[type][in]=ola&filter[type][in]=hue
+    - filter[luminosity][gt]=0.5, as well as "gte", "lt", and "lte"
+    :return: List[Filter]
+    :raises BadRequestError: Raised if the argument contains invalid filters.
+    """
+    filters = []
+    for property_name, operators in argument.items():
+        if not isinstance(operators, Dict):
+            operators = {
+                'eq': operators,
+            }
+        bounds = {}
+        for operator, operand in operators.items():
+            if isinstance(operand, Dict):
+                raise BadRequestError(
+                    description='The "%s" filter for property "%s" cannot be nested.' % (
+                        operator, property_name))
+            operands = operand if isinstance(operand, List) else [operand]
+            if 'eq' == operator:
+                values = list(map(parse_filter_value, operands))
+                if 1 == len(values):
+                    filters.append(EqualsFilter(property_name, values[0]))
+                else:
+                    filters.append(InFilter(property_name, values))
+            elif 'in' == operator:
+                filters.append(InFilter(property_name, [
+                    parse_filter_value(value) for operand in operands for
+                    value in operand.split(',')]))
+            elif operator in _RANGE_OPERATORS:
+                if 1 != len(operands):
+                    raise BadRequestError(
+                        description='The "%s" filter for property "%s" takes a single value.' % (
+                            operator, property_name))
+                value = parse_filter_value(operands[0])
+                if isinstance(value, bool) or value is None:
+                    raise BadRequestError(
+                        description='The "%s" filter for property "%s" requires a number or a string.' % (
+                            operator, property_name))
+                bounds[operator] = value
+            else:
+                raise BadRequestError(
+                    description='Unknown filter operator "%s" for property "%s". Use one of %s.' % (
+                        operator, property_name,
+                        ', '.join(('eq', 'in') + _RANGE_OPERATORS)))
+        if bounds:
+            if 'gt' in bounds and 'gte' in bounds or \
+                    'lt' in bounds and 'lte' in bounds:
+                raise BadRequestError(
+                    description='Property "%s" has conflicting range filters.' % property_name)
+            filters.append(RangeFilter(
+                property_name,
+                bounds.get('gt', bounds.get('gte')),
+                bounds.get('lt', bounds.get('lte')),
+                'gt' in bounds,
+                'lt' in bounds))
+    return filters
+
+
+@contract
+def get_property_getter(resource_type: OutputDataType,
+                        property_name: str) -> Callable:
+    """
+    Builds a function that gets a JSON property value from a resource.
+
+    If the resource type describes its properties, values are read from the
+    resources' attributes directly, rather than by serializing resources
+    entirely.
+    :return: Callable. It raises KeyError or AttributeError if a resource
+      does not have the property.
+    """
+    properties = get_described_properties(resource_type)
+    if properties is None:
+        return lambda resource: resource_type.to_json(resource)[property_name]
+    for resource_property in properties:
+        if resource_property.name == property_name:
+            get_attribute = attrgetter(resource_property.attribute)
+            if resource_property.data_type is None:
+                return get_attribute
+            to_json = resource_property.data_type.to_json
+            return lambda resource: to_json(get_attribute(resource))
+
+    def _get_missing_property(resource):
+        raise KeyError(property_name)
+    return _get_missing_property
+
+
+@contract
+def filter_resources(resources: Iterable, filters: Iterable,
+                     resource_type: OutputDataType) -> Iterable:
+    """
+    Filters resources, in memory.
+
+    This is the fallback for repositories that cannot apply filters natively.
+    Resources that do not have a filter's property never match it.
+    :param resource_type: The type to read the resources' properties with.
+    """
+    filters = list(filters)
+    if not filters:
+        return resources
+    getters = [(resource_filter, get_property_getter(
+        resource_type, resource_filter.property_name)) for resource_filter in
+        filters]
+
+    def _matches(resource):
+        for resource_filter, getter in getters:
+            try:
+                value = getter(resource)
+            except (AttributeError, KeyError):
+                return False
+            if not resource_filter.matches(value):
+                return False
+        return True
+    return filter(_matches, resources)
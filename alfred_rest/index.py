@@ -0,0 +1,504 @@
+import abc
+from bisect import bisect_left, bisect_right
+from threading import Lock
+from itertools import islice
+from typing import Iterable, Dict, Optional, List, Set, Tuple, Iterator
+
+from contracts import contract, ContractsMeta, with_metaclass
+
+from alfred_json.type import OutputDataType
+from alfred_rest.filter import Filter, EqualsFilter, InFilter, RangeFilter, \
+    get_property_getter, filter_resources, comparison_key
+from alfred_rest.resource import Page, paginate, unique_ids
+from alfred_rest.sort import sort_key
+
+
+class Index(with_metaclass(ContractsMeta)):
+    """
+    Indexes resource IDs by the value of one of the resources' JSON
+    properties.
+
+    Indexes are declared by repositories, and kept in sync by ResourceIndexes.
+    """
+
+    @contract
+    def __init__(self, property_name: str):
+        self._property_name = property_name
+
+    @property
+    @contract
+    def property_name(self) -> str:
+        return self._property_name
+
+    @abc.abstractmethod
+    @contract
+    def add(self, resource_id: str, value):
+        pass
+
+    @abc.abstractmethod
+    @contract
+    def remove(self, resource_id: str, value):
+        pass
+
+    @abc.abstractmethod
+    def clear(self):
+        pass
+
+    @abc.abstractmethod
+    @contract
+    def supports(self, resource_filter: Filter) -> bool:
+        """
+        Checks whether this index can select the resources matching a filter.
+        """
+        pass
+
+    @abc.abstractmethod
+    @contract
+    def estimate(self, resource_filter: Filter) -> int:
+        """
+        Counts the resources this index selects for a filter.
+
+        This MUST be cheaper than self.select().
+        """
+        pass
+
+    @abc.abstractmethod
+    @contract
+    def select(self, resource_filter: Filter) -> Set:
+        """
+        Selects the IDs of the resources matching a filter.
+        :return: Set[str]
+        """
+        pass
+
+    def __repr__(self):
+        return '%s(%s)' % (type(self).__name__, self._property_name)
+
+
+class HashIndex(Index):
+    """
+    Indexes resources by exact property values, for equality filters.
+    """
+
+    def __init__(self, property_name: str):
+        super().__init__(property_name)
+        self._ids = {}
+
+    def add(self, resource_id, value):
+        try:
+            self._ids.setdefault(comparison_key(value), set()).add(
+                resource_id)
+        except TypeError:
+            # Unhashable values, such as objects, never match filters.
+            pass
+
+    def remove(self, resource_id, value):
+        try:
+            ids = self._ids.get(comparison_key(value))
+        except TypeError:
+            return
+        if ids is not None:
+            ids.discard(resource_id)
+            if not ids:
+                del self._ids[comparison_key(value)]
+
+    def clear(self):
+        self._ids = {}
+
+    def supports(self, resource_filter):
+        return resource_filter.property_name == self._property_name and \
+            isinstance(resource_filter, (EqualsFilter, InFilter))
+
+    def _get_values(self, resource_filter: Filter) -> List:
+        if isinstance(resource_filter, EqualsFilter):
+            return [resource_filter.value]
+        return resource_filter.values
+
+    def estimate(self, resource_filter):
+        return sum(len(self._ids.get(comparison_key(value), ())) for
+                   value in self._get_values(resource_filter))
+
+    def select(self, resource_filter):
+        ids = set()
+        for value in self._get_values(resource_filter):
+            ids.update(self._ids.get(comparison_key(value), ()))
+        return ids
+
+
+class SortedIndex(Index):
+    """
+    Indexes resources by ordered property values, for range filters and
+    sorted pages.
+
+    Values are ordered by alfred_rest.sort.sort_key(), so that numbers and
+    strings, which cannot be compared to each other, are kept apart. Resources
+    with equal values are ordered by their IDs.
+    """
+
+    def __init__(self, property_name: str):
+        super().__init__(property_name)
+        # The sort keys of the indexed values, and the IDs of their resources.
+        self._keys = []
+        self._ids = []
+
+    def __len__(self):
+        return len(self._ids)
+
+    @staticmethod
+    def _get_kind(value):
+        """
+        Gets the rank of the sort keys of values that range filters apply to.
+        """
+        if isinstance(value, bool):
+            return None
+        if isinstance(value, (int, float, str)):
+            return sort_key(value)[0]
+        return None
+
+    def _get_position(self, resource_id: str, key, right=False) -> int:
+        start = bisect_left(self._keys, key)
+        end = bisect_right(self._keys, key, start)
+        return (bisect_right if right else bisect_left)(self._ids, resource_id,
+                                                        start, end)
+
+    def add(self, resource_id, value):
+        try:
+            key = sort_key(value)
+        except TypeError:
+            # Values that are not JSON values cannot be ordered.
+            return
+        position = self._get_position(resource_id, key)
+        self._keys.insert(position, key)
+        self._ids.insert(position, resource_id)
+
+    def remove(self, resource_id, value):
+        try:
+            key = sort_key(value)
+        except TypeError:
+            return
+        position = self._get_position(resource_id, key)
+        if position < len(self._ids) and self._ids[position] == resource_id:
+            del self._keys[position]
+            del self._ids[position]
+
+    def clear(self):
+        self._keys = []
+        self._ids = []
+
+    def supports(self, resource_filter):
+        if resource_filter.property_name != self._property_name:
+            return False
+        if isinstance(resource_filter, RangeFilter):
+            bounds = [bound for bound in (resource_filter.minimum,
+                                          resource_filter.maximum) if
+                      bound is not None]
+            kinds = set(map(self._get_kind, bounds))
+            return 1 == len(kinds) and None not in kinds
+        if isinstance(resource_filter, EqualsFilter):
+            return self._get_kind(resource_filter.value) is not None
+        return False
+
+    def _get_range(self, resource_filter: Filter):
+        if isinstance(resource_filter, EqualsFilter):
+            key = sort_key(resource_filter.value)
+            start = bisect_left(self._keys, key)
+            return start, bisect_right(self._keys, key, start)
+        assert isinstance(resource_filter, RangeFilter)
+        minimum = resource_filter.minimum
+        maximum = resource_filter.maximum
+        kind = self._get_kind(minimum if minimum is not None else maximum)
+        if minimum is None:
+            start = bisect_left(self._keys, (kind,))
+        else:
+            start = (bisect_right if resource_filter.exclusive_minimum else
+                     bisect_left)(self._keys, (kind, minimum))
+        if maximum is None:
+            end = bisect_left(self._keys, (kind + 1,))
+        else:
+            end = (bisect_left if resource_filter.exclusive_maximum else
+                   bisect_right)(self._keys, (kind, maximum))
+        return start, max(start, end)
+
+    def estimate(self, resource_filter):
+        start, end = self._get_range(resource_filter)
+        return end - start
+
+    def select(self, resource_filter):
+        start, end = self._get_range(resource_filter)
+        return set(self._ids[start:end])
+
+    @contract
+    def iterate(self, after: Optional[Tuple] = None,
+                descending: bool = False) -> Iterator:
+        """
+        Iterates over the IDs of the indexed resources, in order.
+        :param after: Optional[Tuple[Tuple, str]]. The sort key and ID of the
+          resource to start after.
+        :param descending: Whether to iterate in descending order.
+        :return: Iterator[str]
+        """
+        if descending:
+            end = len(self._ids)
+            if after is not None:
+                end = self._get_position(after[1], after[0])
+            positions = range(end - 1, -1, -1)
+        else:
+            start = 0
+            if after is not None:
+                start = self._get_position(after[1], after[0], True)
+            positions = range(start, len(self._ids))
+        for position in positions:
+            yield self._ids[position]
+
+
+class QueryPlan:
+    """
+    Describes how resources are selected for a set of filters.
+    """
+
+    @contract
+    def __init__(self, index: Optional[Index] = None,
+                 resource_filter: Optional[Filter] = None,
+                 candidates: Optional[int] = None,
+                 residual_filters: Iterable = (), ordered: bool = False,
+                 lookup: bool = False):
+        """
+
+        :param index: The index that selects candidate resources, or None if
+          all resources are scanned or looked up.
+        :param resource_filter: The filter the index selects resources for.
+        :param candidates: The number of candidate resources.
+        :param residual_filters: Iterable[Filter]. The filters that are applied
+          to the candidates in memory.
+        :param ordered: Whether the index is a SortedIndex that is walked in
+          the order of a sorted page, until the page is full.
+        :param lookup: Whether the candidates are looked up by their IDs.
+        """
+        assert not ordered or isinstance(index, SortedIndex)
+        assert not lookup or index is None
+        self._index = index
+        self._filter = resource_filter
+        self._candidates = candidates
+        self._residual_filters = list(residual_filters)
+        self._ordered = ordered
+        self._lookup = lookup
+
+    @property
+    def index(self) -> Optional[Index]:
+        return self._index
+
+    @property
+    def filter(self) -> Optional[Filter]:
+        return self._filter
+
+    @property
+    def candidates(self) -> Optional[int]:
+        return self._candidates
+
+    @property
+    def residual_filters(self) -> List:
+        return self._residual_filters
+
+    @property
+    @contract
+    def ordered(self) -> bool:
+        return self._ordered
+
+    @property
+    @contract
+    def lookup(self) -> bool:
+        return self._lookup
+
+    @contract
+    def to_json(self) -> Dict:
+        strategy = 'scan'
+        if self._ordered:
+            strategy = 'ordered'
+        elif self._lookup:
+            strategy = 'lookup'
+        elif self._index is not None:
+            strategy = 'index'
+        plan = {
+            'strategy': strategy,
+            'residual_filters': [resource_filter.property_name for
+                                 resource_filter in self._residual_filters],
+        }
+        if self._index is not None:
+            plan['index'] = repr(self._index)
+        if self._candidates is not None:
+            plan['candidates'] = self._candidates
+        return plan
+
+
+class ResourceIndexes:
+    """
+    Keeps secondary indexes of resources in sync, and selects resources with
+    them.
+
+    Resources MUST be passed to self.update() after their indexed properties
+    change.
+    """
+
+    @contract
+    def __init__(self, resource_type: OutputDataType, indexes: Iterable):
+        """
+
+        :param resource_type: The type to read the resources' properties with.
+        :param indexes: Iterable[Index]
+        """
+        self._resource_type = resource_type
+        self._indexes = list(indexes)
+        self._getters = [get_property_getter(resource_type, index.property_name)
+                         for index in self._indexes]
+        self._resources = {}
+        # The indexed values of each resource, so they can be removed from the
+        # indexes after the resource has changed.
+        self._values = {}
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._resources)
+
+    @contract
+    def has_indexes(self) -> bool:
+        return bool(self._indexes)
+
+    @contract
+    def add(self, resources: Iterable):
+        with self._lock:
+            for resource in resources:
+                self._add(resource)
+
+    def _add(self, resource):
+        values = []
+        for index, getter in zip(self._indexes, self._getters):
+            try:
+                value = getter(resource)
+            except (AttributeError, KeyError):
+                # Resources without the property can never match filters on
+                # it, so they need not be indexed.
+                values.append(None)
+                continue
+            index.add(resource.id, value)
+            values.append((value,))
+        self._resources[resource.id] = resource
+        self._values[resource.id] = values
+
+    @contract
+    def update(self, resources: Iterable):
+        with self._lock:
+            for resource in resources:
+                self._remove(resource.id)
+                self._add(resource)
+
+    @contract
+    def remove(self, resources: Iterable):
+        with self._lock:
+            for resource in resources:
+                self._remove(resource.id)
+
+    def _remove(self, resource_id: str):
+        if resource_id not in self._resources:
+            return
+        for index, value in zip(self._indexes, self._values[resource_id]):
+            if value is not None:
+                index.remove(resource_id, value[0])
+        del self._resources[resource_id]
+        del self._values[resource_id]
+
+    def clear(self):
+        with self._lock:
+            self._resources = {}
+            self._values = {}
+            for index in self._indexes:
+                index.clear()
+
+    @contract
+    def plan(self, filters: Iterable, page: Optional[Page] = None,
+             ids: Optional[Iterable] = None) -> QueryPlan:
+        """
+        Chooses the index that selects the fewest resources for the filters.
+
+        If IDs are given, the resources are looked up by them instead, because
+        no index selects fewer.
+
+        Sorted pages are found by walking the SortedIndex of the sort property
+        in order, until the page is full, unless another index selects fewer
+        resources than fit on the page. The SortedIndex must contain all
+        resources, so that none are skipped.
+        """
+        filters = list(filters)
+        if ids is not None:
+            return QueryPlan(candidates=len(unique_ids(ids)),
+                             residual_filters=filters, lookup=True)
+        with self._lock:
+            return self._plan(filters, page)
+
+    def _plan(self, filters: List, page: Optional[Page] = None) -> QueryPlan:
+        plan = self._plan_filters(filters)
+        if page is None or page.sort is None:
+            return plan
+        if plan.index is not None and plan.candidates < page.limit:
+            return plan
+        for index in self._indexes:
+            if isinstance(index, SortedIndex) and \
+                    index.property_name == page.sort.property_name and \
+                    len(index) == len(self._resources):
+                return QueryPlan(index, candidates=len(self._resources),
+                                 residual_filters=filters, ordered=True)
+        return plan
+
+    def _plan_filters(self, filters: List) -> QueryPlan:
+        best = None
+        for resource_filter in filters:
+            for index in self._indexes:
+                if not index.supports(resource_filter):
+                    continue
+                candidates = index.estimate(resource_filter)
+                if best is None or candidates < best[2]:
+                    best = index, resource_filter, candidates
+        if best is None:
+            return QueryPlan(candidates=len(self._resources),
+                             residual_filters=filters)
+        index, resource_filter, candidates = best
+        return QueryPlan(index, resource_filter, candidates,
+                         [x for x in filters if x is not resource_filter])
+
+    @contract
+    def select(self, filters: Iterable, page: Optional[Page] = None,
+               ids: Optional[Iterable] = None) -> List:
+        """
+        Selects the resources matching all filters.
+        :param filters: Iterable[Filter]
+        :param page: If given, select the resources on this page only.
+        :param ids: Optional[Iterable[str]]. If given, select the resources
+          with these IDs only. Unknown IDs are skipped.
+        :return: List
+        """
+        filters = list(filters)
+        if ids is not None:
+            with self._lock:
+                candidates = [self._resources[resource_id] for resource_id in
+                              unique_ids(ids) if resource_id in
+                              self._resources]
+            return list(paginate(filter_resources(candidates, filters,
+                                                  self._resource_type),
+                                 page, self._resource_type))
+        with self._lock:
+            plan = self._plan(filters, page)
+            if plan.ordered:
+                resources = (self._resources[resource_id] for resource_id in
+                             plan.index.iterate(page.get_after_key(),
+                                                page.sort.descending))
+                return list(islice(filter_resources(
+                    resources, plan.residual_filters, self._resource_type),
+                    page.limit))
+            if plan.index is None:
+                candidates = list(self._resources.values())
+            else:
+                candidates = [self._resources[resource_id] for resource_id in
+                              plan.index.select(plan.filter)]
+        return list(paginate(filter_resources(candidates,
+                                              plan.residual_filters,
+                                              self._resource_type),
+                             page, self._resource_type))
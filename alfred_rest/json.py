@@ -3,23 +3,37 @@ from urllib.parse import urlunsplit, urlsplit
 
 from contracts import contract
 
+from alfred.cache import LruCache
 from alfred_http import base64_encodes
 from alfred_http.endpoints import EndpointUrlBuilder
-from alfred_json.rewriter import Rewriter
+from alfred_json.rewriter import VisitorRewriter, SchemaTraversal
 
 
-class ExternalReferenceProxy(Rewriter):
+class ExternalReferenceProxy(VisitorRewriter):
     """
     Rewrites JSON Schemas to proxy references through
     ExternalJsonSchemaEndpoint.
-    """
 
-    _REWRITE_KEYS = ('id', '$ref', '$schema')
+    Rewritten pointers are memoized per URL root (the scheme, host, and script
+    root URLs are built from). Schemas are rewritten in place, and remembered,
+    so rewriting them again for the same URL root is a no-op. This means
+    schemas must not be changed after they have been rewritten. Through
+    NestedRewriter, pointers are rewritten as part of a shared traversal, which
+    copies schemas instead.
+    """
 
     @contract
-    def __init__(self, base_url: Callable, urls: EndpointUrlBuilder):
+    def __init__(self, base_url: Callable, urls: EndpointUrlBuilder,
+                 pointers_maxsize: int = 4096, schemas_maxsize: int = 64):
         self._base_url = base_url
         self._urls = urls
+        # URL roots come from requests, so bound these as well.
+        self._base_urls = LruCache(schemas_maxsize)
+        self._pointers = LruCache(pointers_maxsize)
+        # Keys are schema IDs. Values are tuples of the schema, to prevent
+        # their IDs from being reused, and the URL root they were rewritten
+        # for.
+        self._schemas = LruCache(schemas_maxsize)
 
     def rewrite_pointer(self, pointer):
         """
@@ -31,8 +45,24 @@ class ExternalReferenceProxy(Rewriter):
         if not isinstance(pointer, str):
             return pointer
 
+        return self._rewrite_pointer(pointer, self._urls.get_url_root())
+
+    def _rewrite_pointer(self, pointer: str, url_root: str):
+        key = (url_root, pointer)
+        rewritten_pointer = self._pointers.get(key)
+        if rewritten_pointer is None:
+            rewritten_pointer = self._build_pointer(pointer, url_root)
+            self._pointers.set(key, rewritten_pointer)
+        return rewritten_pointer
+
+    def _build_pointer(self, pointer: str, url_root: str):
+        base_url = self._base_urls.get(url_root)
+        if base_url is None:
+            base_url = self._base_url()
+            self._base_urls.set(url_root, base_url)
+
         # Skip pointers that have been rewritten already.
-        if pointer.startswith(self._base_url()):
+        if pointer.startswith(base_url):
             return pointer
 
         original_parts = urlsplit(pointer)
@@ -54,22 +84,35 @@ class ExternalReferenceProxy(Rewriter):
 
         return pointer
 
+    def visit_pointer(self, key, pointer, traversal):
+        url_root = traversal.get_state(self, self._urls.get_url_root)
+        return self._rewrite_pointer(pointer, url_root)
+
     def rewrite(self, schema):
-        return self._rewrite(schema)
+        # Rewrite schemas in place, so we can tell if we rewrite them again.
+        url_root = self._urls.get_url_root()
+        rewritten = self._schemas.get(id(schema))
+        if rewritten is not None and rewritten[0] is schema and rewritten[
+                1] == url_root:
+            return schema
+        schema = self._rewrite(schema, url_root)
+        self._schemas.set(id(schema), (schema, url_root))
+        return schema
 
-    def _rewrite(self, data):
+    def _rewrite(self, data, url_root: str):
         if isinstance(data, List):
             for item in data:
                 # Traverse child elements.
-                self._rewrite(item)
+                self._rewrite(item, url_root)
             return data
         elif isinstance(data, Dict):
             for key in data:
-                if key in self._REWRITE_KEYS:
-                    data[key] = self.rewrite_pointer(data[key])
+                if key in SchemaTraversal.POINTER_KEYS:
+                    if isinstance(data[key], str):
+                        data[key] = self._rewrite_pointer(data[key], url_root)
 
                 # Traverse child elements.
                 else:
-                    data[key] = self._rewrite(data[key])
+                    data[key] = self._rewrite(data[key], url_root)
             return data
         return data
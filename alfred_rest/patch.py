@@ -0,0 +1,100 @@
+from typing import AbstractSet, Dict, Optional, Tuple
+
+from contracts import contract
+from jsonpatch import JsonPatch
+from jsonpointer import JsonPointer
+
+from alfred_json.serializer import SerializerCompiler
+from alfred_json.type import UpdateInputDataType, OutputDataType
+
+
+@contract
+def get_patched_properties(patch: JsonPatch) -> Optional[AbstractSet]:
+    """
+    Gets the names of the top-level properties a JSON Patch may change.
+    :return: Optional[AbstractSet[str]]. None if the patch replaces the
+      document as a whole.
+    """
+    names = set()
+    for operation in patch.patch:
+        if operation['op'] == 'test':
+            continue
+        paths = [operation['path']]
+        if operation['op'] == 'move':
+            paths.append(operation['from'])
+        for path in paths:
+            parts = JsonPointer(path).parts
+            if not parts:
+                return None
+            names.add(parts[0])
+    return frozenset(names)
+
+
+def _get_read_properties(patch: JsonPatch) -> Optional[AbstractSet]:
+    """
+    Gets the names of the top-level properties a JSON Patch reads or changes.
+    :return: Optional[AbstractSet[str]]. None if the patch uses the document
+      as a whole.
+    """
+    names = set()
+    for operation in patch.patch:
+        paths = [operation['path']]
+        if 'from' in operation:
+            paths.append(operation['from'])
+        for path in paths:
+            parts = JsonPointer(path).parts
+            if not parts:
+                return None
+            names.add(parts[0])
+    return frozenset(names)
+
+
+# Marks properties that are absent from JSON objects.
+_ABSENT = object()
+
+
+def _diff(json_data: Dict, other_json_data: Dict,
+          names: Optional[AbstractSet] = None) -> AbstractSet:
+    if names is None:
+        names = json_data.keys() | other_json_data.keys()
+    return frozenset(name for name in names if json_data.get(
+        name, _ABSENT) != other_json_data.get(name, _ABSENT))
+
+
+@contract
+def get_changed_properties(resource_type: OutputDataType, resource,
+                           json_data: Dict) -> AbstractSet:
+    """
+    Gets the names of the top-level properties of which JSON data changes the
+    values, if it were to replace a resource.
+    :return: AbstractSet[str]
+    """
+    return _diff(resource_type.to_json(resource), json_data)
+
+
+@contract
+def patch_resource(patch: JsonPatch, resource,
+                   resource_type: UpdateInputDataType,
+                   serializers: SerializerCompiler) -> Tuple:
+    """
+    Applies a JSON Patch to a resource.
+
+    The patch is applied to the JSON representation of the top-level
+    properties it reads or changes, or to the resource's entire JSON
+    representation if it uses the document as a whole. Only the properties of
+    which the patch changes the values are then updated on the resource
+    itself.
+    :return: Tuple[Any, AbstractSet[str]]. The updated resource, and the names
+      of the properties that changed. If no properties changed, the resource
+      was not updated.
+    """
+    assert isinstance(resource_type, OutputDataType)
+    resource_data = serializers.get_serializer(
+        resource_type, _get_read_properties(patch))(resource)
+    patched_resource_data = patch.apply(resource_data)
+    names = _diff(resource_data, patched_resource_data,
+                  get_patched_properties(patch))
+    if names:
+        resource = resource_type.update_properties_from_json(
+            patched_resource_data, resource, names)
+    return resource, names
@@ -1,12 +1,18 @@
 import abc
-from typing import Iterable, Optional, Dict, Union, Callable
+import heapq
+from collections import OrderedDict
+from operator import attrgetter, itemgetter
+from typing import Iterable, Optional, Dict, Union, Callable, Tuple, List
 
 from contracts import contract, ContractsMeta, with_metaclass
 
 from alfred import format_iter
 from alfred_http.endpoints import BadRequestError
 from alfred_json.type import IdentifiableDataType, IdentifiableScalarType, \
-    OutputDataType, InputDataType, UpdateInputDataType, OneOfComplexType
+    OutputDataType, InputDataType, UpdateInputDataType, OneOfComplexType, \
+    Property
+from alfred_rest.changes import ResourceChanges
+from alfred_rest.sort import Sort, sort_key
 
 
 class ResourceIdType(IdentifiableScalarType):
@@ -52,6 +58,11 @@ class ResourceType(IdentifiableDataType, UpdateInputDataType, OutputDataType):
         except AttributeError:
             raise ValueError('Resources must have an "id" property.')
 
+    def get_properties(self):
+        return [
+            Property('id'),
+        ]
+
 
 class AnyResourceType(ResourceType, InputDataType, UpdateInputDataType):
     @contract
@@ -72,9 +83,20 @@ class AnyResourceType(ResourceType, InputDataType, UpdateInputDataType):
     def update_from_json(self, json_data, instance):
         return self._subtype.update_from_json(json_data, instance)
 
+    def update_properties_from_json(self, json_data, instance, names):
+        return self._subtype.update_properties_from_json(json_data, instance,
+                                                         names)
+
     def to_json(self, data):
         return self._subtype.to_json(data)
 
+    def get_properties(self):
+        # The properties depend on each concrete type.
+        return None
+
+    def compile_serializer(self, compiler):
+        return compiler.get_serializer(self._subtype)
+
 
 class ResourceNotFound(RuntimeError):
     def __init__(self, resource_name: str,
@@ -88,11 +110,129 @@ class ResourceNotFound(RuntimeError):
         super().__init__(message)
 
 
+class Page:
+    """
+    Describes a page of resources.
+
+    A page contains at most `limit` resources, ordered by their IDs, which come
+    after `after`, if it is given. Because pages are not based on offsets,
+    repositories with sorted IDs can find them without visiting the resources
+    before them.
+
+    If a sort is given, resources are ordered by it instead, and the page
+    starts after the resource with ID `after` and sort value `after_value`.
+    Repositories can find such pages without sorting all resources by
+    maintaining ordered indexes. See alfred_rest.index.SortedIndex.
+    """
+
+    @contract
+    def __init__(self, limit: int, after: Optional[str] = None,
+                 sort: Optional[Sort] = None, after_value=None):
+        assert limit > 0
+        assert sort is not None or after_value is None
+        self._limit = limit
+        self._after = after
+        self._sort = sort
+        self._after_value = after_value
+
+    @property
+    @contract
+    def limit(self) -> int:
+        return self._limit
+
+    @property
+    @contract
+    def after(self) -> Optional[str]:
+        return self._after
+
+    @property
+    @contract
+    def sort(self) -> Optional[Sort]:
+        return self._sort
+
+    @property
+    def after_value(self):
+        return self._after_value
+
+    @contract
+    def get_after_key(self) -> Optional[Tuple]:
+        """
+        Gets the sort key (see Sort.get_key_function()) this page starts after.
+        """
+        if self._after is None:
+            return None
+        return sort_key(self._after_value), self._after
+
+    @contract
+    def contains(self, resource_id: str) -> bool:
+        """
+        Checks whether a resource ID comes after the start of this page.
+
+        This only applies to pages that are not sorted.
+        """
+        return self._after is None or resource_id > self._after
+
+
+@contract
+def paginate(resources: Iterable, page: Optional[Page] = None,
+             resource_type: Optional[OutputDataType] = None) -> Iterable:
+    """
+    Gets a page of resources, in memory.
+
+    This is the fallback for repositories that cannot find pages natively. It
+    visits every resource, but keeps no more than the page in memory.
+    :param resource_type: The type to read the resources' properties with.
+      This is required for sorted pages.
+    """
+    if page is None:
+        return resources
+    if page.sort is None:
+        return heapq.nsmallest(
+            page.limit,
+            filter(lambda resource: page.contains(resource.id), resources),
+            key=attrgetter('id'))
+    assert resource_type is not None
+    get_key = page.sort.get_key_function(resource_type)
+    after_key = page.get_after_key()
+    keyed_resources = ((get_key(resource), resource) for resource in
+                       resources)
+    if page.sort.descending:
+        if after_key is not None:
+            keyed_resources = filter(lambda x: x[0] < after_key,
+                                     keyed_resources)
+        keyed_resources = heapq.nlargest(page.limit, keyed_resources,
+                                         key=itemgetter(0))
+    else:
+        if after_key is not None:
+            keyed_resources = filter(lambda x: x[0] > after_key,
+                                     keyed_resources)
+        keyed_resources = heapq.nsmallest(page.limit, keyed_resources,
+                                          key=itemgetter(0))
+    return [resource for _, resource in keyed_resources]
+
+
+@contract
+def unique_ids(ids: Iterable) -> List:
+    """
+    Removes duplicate resource IDs, keeping the first occurrence of each.
+    :param ids: Iterable[str]
+    :return: List[str]
+    """
+    return list(OrderedDict.fromkeys(ids))
+
+
 class ResourceRepository(with_metaclass(ContractsMeta)):
     """
     Allows internal data as to be retrieved through the REST-ful HTTP API.
     Register child classes as Extension services with the "resources" tag, and
-    HTTP GET endpoints will be available automatically.
+    HTTP GET endpoints will be available automatically. Add the
+    "cached_resources" tag as well to cache their resources, see
+    alfred_rest.cache.CachingResourceRepository.
+
+    Add the "published_resources" tag if every change to the resources is
+    published as an alfred_rest.changes.ResourcesChanged event, including
+    changes that are not made through the API. Only then are responses and
+    encoded resources cached, because they are invalidated by these events.
     """
 
     @abc.abstractmethod
@@ -106,9 +246,32 @@ class ResourceRepository(with_metaclass(ContractsMeta)):
 
     @abc.abstractmethod
     @contract
-    def get_resources(self, ids=None, filters: Iterable=()) -> Iterable:
+    def get_resources(self, ids=None, filters: Iterable=(),
+                      page: Optional[Page] = None) -> Iterable:
+        """
+        Gets resources.
+        :param ids: Optional[Iterable[str]]. If given, get the resources with
+          these IDs only. Unknown IDs are skipped. Repositories SHOULD look
+          these up directly, rather than scan all resources for them.
+        :param filters: Iterable
+        :param page: If given, return the resources on this page only, ordered
+          by their IDs, or by the page's sort. See paginate() for a generic
+          implementation.
+        :return: Iterable
+        """
         pass
 
+    @contract
+    def explain(self, ids=None, filters: Iterable = (),
+                page: Optional[Page] = None) -> Dict:
+        """
+        Describes how self.get_resources() selects resources, for debugging.
+        :return: Dict. See alfred_rest.index.QueryPlan.to_json().
+        """
+        return {
+            'strategy': 'scan',
+        }
+
 
 class ExpandableResourceRepository(ResourceRepository):
     """
@@ -172,3 +335,24 @@ class UpdateableResourceRepository(ResourceRepository):
     @contract
     def update_resources(self, resources: Iterable) -> Iterable:
         pass
+
+
+class SyncableResourceRepository(ResourceRepository):
+    """
+    Allows clients to get the resources that changed since they last synced,
+    through the REST-ful HTTP API.
+    Register child classes as Extension services with the "resources" tag, and
+    the HTTP GET endpoints for all resources will accept the "since" query
+    parameter automatically. See alfred_rest.changes.ChangeLog.
+    """
+
+    @abc.abstractmethod
+    @contract
+    def get_changes(self, since: str) -> ResourceChanges:
+        """
+        Gets the resources that were added, updated, or deleted since a sync
+        token. See alfred_rest.changes.parse_sync_token().
+        :raises alfred_rest.changes.ChangesExpired: Raised if the changes are
+          no longer available.
+        """
+        pass
@@ -4,12 +4,20 @@ from contracts import contract
 
 from alfred.app import App
 from alfred_http.endpoints import ErrorResponseType
+from alfred_json.type import build_sparse_json_schema
 from alfred_rest.endpoints import JsonRequestPayloadType, \
-    JsonResponsePayloadType, JsonPayloadType
+    JsonResponsePayloadType, JsonPayloadType, SparseResponseType
 
 
 class AlfredJsonSchema:
-    def __init__(self):
+    @contract
+    def __init__(self, deduplicate_subschemas: bool = False):
+        """
+
+        :param deduplicate_subschemas: Whether to move identical subschemas to
+          shared definitions. See alfred_json.rewriter.SubschemaDeduplicator.
+        """
+        self._deduplicate_subschemas = deduplicate_subschemas
         self._endpoints = None
         self._urls = App.current.service('http', 'urls')
         self._rewriter = App.current.service('json', 'schema_rewriter')
@@ -39,13 +47,22 @@ class AlfredJsonSchema:
                         request_type.name,
                         request_payload_type.data_type.get_json_schema())
 
-            response_type = endpoint.response_type
-            for response_payload_type in response_type.get_payload_types():
-                if isinstance(response_payload_type, JsonResponsePayloadType):
+            response_types = [endpoint.response_type] + list(
+                endpoint.response_type.get_linked_response_types())
+            for response_type in response_types:
+                for response_payload_type in response_type.get_payload_types():
+                    if not isinstance(response_payload_type,
+                                      JsonResponsePayloadType):
+                        continue
                     schema['definitions'].setdefault('response', {})
                     schema['definitions']['response'].setdefault(
                         response_type.name,
                         response_payload_type.data_type.get_json_schema())
+                    if isinstance(response_type, SparseResponseType):
+                        schema['definitions']['response'].setdefault(
+                            response_type.sparse_name,
+                            build_sparse_json_schema(
+                                response_payload_type.data_type))
 
         for error_response_payload_type in self._error_response_type.get_payload_types():
             if isinstance(error_response_payload_type,
@@ -57,5 +74,8 @@ class AlfredJsonSchema:
                         error_response_payload_type, JsonPayloadType) else {})
 
         schema = self._rewriter.rewrite(schema)
+        if self._deduplicate_subschemas:
+            schema = App.current.service(
+                'json', 'subschema_deduplicator').rewrite(schema)
 
         return schema
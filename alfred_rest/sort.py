@@ -0,0 +1,98 @@
+import json
+from typing import Callable, Tuple
+
+from contracts import contract
+
+from alfred_http.endpoints import BadRequestError
+from alfred_json.type import OutputDataType
+from alfred_rest.filter import get_property_getter
+
+
+@contract
+def sort_key(value) -> Tuple:
+    """
+    Converts a JSON value to a key that orders all JSON values.
+
+    Nulls come first, followed by booleans, numbers, strings, and finally
+    arrays and objects, which are ordered by their JSON encodings.
+    :raises TypeError: Raised if the value is not a JSON value.
+    """
+    if value is None:
+        return 0,
+    if isinstance(value, bool):
+        return 1, value
+    if isinstance(value, (int, float)):
+        return 2, value
+    if isinstance(value, str):
+        return 3, value
+    return 4, json.dumps(value, sort_keys=True)
+
+
+class Sort:
+    """
+    Orders resources by the value of one of their JSON properties.
+
+    Resources with equal values are ordered by their IDs. Descending order is
+    the exact reverse of ascending order, so this includes the IDs. Resources
+    that do not have the property are ordered as if its value were null.
+    """
+
+    @contract
+    def __init__(self, property_name: str, descending: bool = False):
+        self._property_name = property_name
+        self._descending = descending
+
+    @property
+    @contract
+    def property_name(self) -> str:
+        return self._property_name
+
+    @property
+    @contract
+    def descending(self) -> bool:
+        return self._descending
+
+    @contract
+    def get_value_getter(self, resource_type: OutputDataType) -> Callable:
+        """
+        Builds a function that gets the value to sort a resource by.
+        :param resource_type: The type to read the resources' properties with.
+        """
+        getter = get_property_getter(resource_type, self._property_name)
+
+        def _get_value(resource):
+            try:
+                return getter(resource)
+            except (AttributeError, KeyError):
+                return None
+        return _get_value
+
+    @contract
+    def get_key_function(self, resource_type: OutputDataType) -> Callable:
+        """
+        Builds a function that gets the keys to sort resources by, in
+        ascending order.
+        :param resource_type: The type to read the resources' properties with.
+        """
+        get_value = self.get_value_getter(resource_type)
+        return lambda resource: (sort_key(get_value(resource)), resource.id)
+
+    def __str__(self):
+        return '%s%s' % ('-' if self._descending else '', self._property_name)
+
+
+@contract
+def parse_sort(argument: str) -> Sort:
+    """
+    Parses a sort from a query argument.
+
+    The argument is the name of the property to sort by, prefixed by "-" for
+    descending order, e.g. sort=label or sort=-luminosity.
+    :raises BadRequestError: Raised if the argument is not a property name.
+    """
+    descending = argument.startswith('-')
+    property_name = argument[1:] if descending else argument
+    if not property_name or ',' in property_name:
+        raise BadRequestError(
+            description='Sort by a single property, e.g. sort=label or sort=-label.')
+    return Sort(property_name, descending)
@@ -1,6 +1,7 @@
 import json
+import re
 import traceback
-from typing import Optional, Dict, Iterable
+from typing import Optional, Dict, Iterable, Union
 from urllib.parse import urldefrag
 
 from contracts import contract
@@ -18,7 +19,8 @@ class RestTestCase(HttpTestCase):
     def get_extension_classes(self):
         return super().get_extension_classes() + [RestTestExtension]
 
-    def request(self, endpoint_name: str, body: Optional[str] = None,
+    def request(self, endpoint_name: str,
+                body: Optional[Union[str, bytes]] = None,
                 parameters: Optional[Dict] = None,
                 headers: Optional[Dict] = None):
         response = super().request(endpoint_name, body, parameters, headers)
@@ -30,20 +32,26 @@ class RestTestCase(HttpTestCase):
         endpoint = self._app.service(
             'http', 'endpoints').get_endpoint(endpoint_name)
         response_types = [endpoint.response_type, ErrorResponseType()]
-        response_types = filter(lambda rt: len(
+        response_types = list(filter(lambda rt: len(
             list(filter(lambda pt: isinstance(pt, JsonPayloadType),
-                        rt.get_payload_types()))), response_types)
+                        rt.get_payload_types()))), response_types))
         if not response_types:
             raise AssertionError(
                 'This request did not expect a JSON response.')
 
+        schema_url = self._app.service('http', 'urls').build('schema')
+        response_schema_urls = ['%s#/definitions/response/%s' % (
+            schema_url, response_type.name) for response_type in
+            response_types]
+        # Responses that link to their schema must be valid against it.
+        described_by = re.search(r'<([^>]+)>; rel="describedby"',
+                                 response.headers.get('Link', ''))
+        if described_by:
+            response_schema_urls = [described_by.group(1)]
+
         requirements = []
-        for response_type in response_types:
+        for response_schema_url in response_schema_urls:
             try:
-                schema_url = self._app.service(
-                    'http', 'urls').build('schema')
-                response_schema_url = '%s#/definitions/response/%s' % (
-                    schema_url, response_type.name)
                 response_schema = self._get_schema(response_schema_url)
                 json_validator = self._app.service('json', 'validator')
                 json_validator.validate(json.loads(
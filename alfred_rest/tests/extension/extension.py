@@ -12,6 +12,7 @@ class RestTestExtension(Extension):
     def name():
         return 'rest-test'
 
-    @Extension.service(tags=('resources',))
+    @Extension.service(tags=('resources', 'cached_resources',
+                             'published_resources'))
     def _resources(self):
         return RestTestResourceRepository()
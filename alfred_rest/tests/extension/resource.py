@@ -4,9 +4,11 @@ from contracts import contract
 
 from alfred_json.type import IdentifiableDataType, OutputDataType, \
     InputDataType, UpdateInputDataType
+from alfred_rest.changes import ChangeLog
+from alfred_rest.index import ResourceIndexes, HashIndex, SortedIndex
 from alfred_rest.resource import ResourceNotFound, \
     ShrinkableResourceRepository, ExpandableResourceRepository, ResourceIdType, \
-    UpdateableResourceRepository
+    UpdateableResourceRepository, SyncableResourceRepository
 
 
 class RestTestResource:
@@ -105,7 +107,7 @@ class UpdateRestTestResourceType(IdentifiableDataType, InputDataType, UpdateInpu
         }
 
 
-class RestTestResourceRepository(ShrinkableResourceRepository, ExpandableResourceRepository, UpdateableResourceRepository):
+class RestTestResourceRepository(ShrinkableResourceRepository, ExpandableResourceRepository, UpdateableResourceRepository, SyncableResourceRepository):
     def __init__(self):
         self._type = RestTestResourceType()
         self._add_type = AddRestTestResourceType()
@@ -115,6 +117,9 @@ class RestTestResourceRepository(ShrinkableResourceRepository, ExpandableResourc
             RestTestResource('Bar'),
         ]
         self._resources = {}
+        self._indexes = ResourceIndexes(self._type, (HashIndex('label'),
+                                                     SortedIndex('label')))
+        self._changes = ChangeLog()
         self.add_resources(resources)
 
     def get_type(self):
@@ -132,17 +137,20 @@ class RestTestResourceRepository(ShrinkableResourceRepository, ExpandableResourc
         except KeyError:
             raise ResourceNotFound(resource_id)
 
-    def get_resources(self, ids=None, filters=()):
-        resources = self._resources.values()
-        if ids is not None:
-            resources = filter(lambda x: x.id in ids, resources)
-        return resources
+    def get_resources(self, ids=None, filters=(), page=None):
+        return self._indexes.select(filters, page, ids)
+
+    def explain(self, ids=None, filters=(), page=None):
+        return self._indexes.plan(filters, page, ids).to_json()
 
     def add_resource(self, resource):
         if resource.id in self._resources:
             # @todo Convert this to a proper (HTTP?) exception.
             raise RuntimeError()
         self._resources[resource.id] = resource
+        self._indexes.add((resource,))
+        self._changes.record((resource.id,))
+        return resource
 
     def add_resources(self, resources: Iterable):
         for resource in resources:
@@ -153,6 +161,8 @@ class RestTestResourceRepository(ShrinkableResourceRepository, ExpandableResourc
         if resource.id not in self._resources:
             raise ResourceNotFound(self._type.name)
         self._resources[resource.id] = resource
+        self._indexes.update((resource,))
+        self._changes.record((resource.id,))
         return resource
 
     def update_resources(self, resources: Iterable):
@@ -162,7 +172,12 @@ class RestTestResourceRepository(ShrinkableResourceRepository, ExpandableResourc
 
     def delete_resource(self, resource):
         del self._resources[resource.id]
+        self._indexes.remove((resource,))
+        self._changes.record((resource.id,), True)
 
     def delete_resources(self, resources: Iterable):
         for resource in resources:
             self.delete_resource(resource)
+
+    def get_changes(self, since):
+        return self._changes.get_changes(since, self.get_resources)
@@ -0,0 +1,139 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from alfred_rest.cache import EncodedResourceCache, \
+    build_caching_resource_repository
+from alfred_rest.resource import ResourceNotFound, Page, \
+    ResourceRepository, ExpandableResourceRepository, ShrinkableResourceRepository, \
+    UpdateableResourceRepository, SyncableResourceRepository
+from alfred_rest.tests.extension.resource import RestTestResourceRepository, \
+    RestTestResource
+from alfred_rest.tests.test_filter import Fruit
+
+
+class EncodedResourceCacheTest(TestCase):
+    def setUp(self):
+        self._encoded = []
+
+    def _encode(self, fruit: Fruit) -> bytes:
+        self._encoded.append(fruit.name)
+        return fruit.name.encode('utf-8')
+
+    def testEncodeShouldCacheRepresentations(self):
+        sut = EncodedResourceCache()
+        apple = Fruit('apple', True, 150)
+        for _ in range(2):
+            self.assertEqual(
+                sut.encode('fruit', apple, 'application/json', None,
+                           self._encode), b'apple')
+        sut.encode('fruit', apple, 'application/json', frozenset(['id']),
+                   self._encode)
+        sut.encode('fruit', apple, 'application/x-ndjson', None,
+                   self._encode)
+        self.assertEqual(self._encoded, ['apple', 'apple', 'apple'])
+        self.assertEqual(sut.representations.hits, 1)
+
+    def testInvalidateShouldEncodeResourcesAgain(self):
+        sut = EncodedResourceCache()
+        apple = Fruit('apple', True, 150)
+        banana = Fruit('banana', False, 120)
+        for fruit in (apple, banana):
+            sut.encode('fruit', fruit, 'application/json', None, self._encode)
+        sut.invalidate('fruit', ['apple'])
+        sut.invalidate('vegetable', ['banana'])
+        for fruit in (apple, banana):
+            sut.encode('fruit', fruit, 'application/json', None, self._encode)
+        self.assertEqual(self._encoded, ['apple', 'banana', 'apple'])
+
+
+class ReadOnlyResourceRepository(ResourceRepository):
+    def __init__(self, resources: ResourceRepository):
+        self._resources = resources
+
+    def get_type(self):
+        return self._resources.get_type()
+
+    def get_resource(self, resource_id):
+        return self._resources.get_resource(resource_id)
+
+    def get_resources(self, ids=None, filters=(), page=None):
+        return self._resources.get_resources(ids, filters, page)
+
+
+class CachingResourceRepositoryTest(TestCase):
+    def setUp(self):
+        self._now = 0.0
+        self._resources = RestTestResourceRepository()
+        self._sut = build_caching_resource_repository(
+            self._resources, ttl=10.0, negative_ttl=1.0,
+            clock=lambda: self._now)
+
+    def testBuildShouldSupportSameOperations(self):
+        for interface in (ExpandableResourceRepository,
+                          ShrinkableResourceRepository,
+                          UpdateableResourceRepository,
+                          SyncableResourceRepository):
+            self.assertIsInstance(self._sut, interface)
+        sut = build_caching_resource_repository(ReadOnlyResourceRepository(
+            self._resources))
+        self.assertIsInstance(sut, ResourceRepository)
+        self.assertNotIsInstance(sut, UpdateableResourceRepository)
+
+    def testGetResourceShouldCacheResources(self):
+        with patch.object(self._resources, 'get_resource',
+                          wraps=self._resources.get_resource) as get_resource:
+            resource = self._sut.get_resource('foo')
+            self.assertIs(self._sut.get_resource('foo'), resource)
+            self.assertEqual(get_resource.call_count, 1)
+            self._now = 10.0
+            self.assertIs(self._sut.get_resource('foo'), resource)
+            self.assertEqual(get_resource.call_count, 2)
+        self.assertEqual(self._sut.hits, 1)
+        self.assertEqual(self._sut.misses, 2)
+
+    def testGetResourceShouldCacheUnknownIds(self):
+        with patch.object(self._resources, 'get_resource',
+                          wraps=self._resources.get_resource) as get_resource:
+            for _ in range(2):
+                with self.assertRaises(ResourceNotFound):
+                    self._sut.get_resource('baz')
+            self.assertEqual(get_resource.call_count, 1)
+            self._resources.add_resource(RestTestResource('baz'))
+            self._now = 1.0
+            self.assertEqual(self._sut.get_resource('baz').id, 'baz')
+
+    def testGetResourcesShouldGetUncachedIdsOnly(self):
+        self._sut.get_resource('foo')
+        with patch.object(self._resources, 'get_resources',
+                          wraps=self._resources.get_resources) as \
+                get_resources:
+            resources = self._sut.get_resources(['Bar', 'baz', 'foo', 'Bar'])
+            self.assertEqual([resource.id for resource in resources],
+                             ['Bar', 'foo'])
+            get_resources.assert_called_once_with(['Bar', 'baz'])
+            resources = self._sut.get_resources(['baz', 'foo', 'Bar'],
+                                                page=Page(1))
+            self.assertEqual([resource.id for resource in resources],
+                             ['Bar'])
+            self.assertEqual(get_resources.call_count, 1)
+
+    def testWritesShouldUpdateCache(self):
+        self._sut.get_resource('foo')
+        self._sut.update_resource(RestTestResource('foo', 'Foo'))
+        self.assertEqual(self._sut.get_resource('foo').label, 'Foo')
+        self._sut.add_resources([RestTestResource('baz')])
+        self._sut.delete_resources([self._sut.get_resource('Bar')])
+        with patch.object(self._resources, 'get_resources') as get_resources:
+            self.assertEqual(
+                [resource.id for resource in
+                 self._sut.get_resources(['foo', 'Bar', 'baz'])],
+                ['foo', 'baz'])
+            get_resources.assert_not_called()
+
+    def testAddResourceShouldCacheAddedResource(self):
+        added_resource = RestTestResource('baz', 'Baz')
+        with patch.object(self._resources, 'add_resource',
+                          return_value=added_resource):
+            self.assertIs(self._sut.add_resource(RestTestResource('baz')),
+                          added_resource)
+        self.assertIs(self._sut.get_resource('baz'), added_resource)
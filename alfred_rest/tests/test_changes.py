@@ -0,0 +1,97 @@
+from unittest import TestCase
+
+from alfred_rest.changes import ChangeLog, ChangesExpired, \
+    format_sync_token, parse_sync_token
+from alfred_rest.tests.test_filter import Fruit
+
+
+class ChangeLogTest(TestCase):
+    def setUp(self):
+        self._fruits = {
+            'apple': Fruit('apple', True, 150),
+            'banana': Fruit('banana', False, 120),
+        }
+
+    def _get_fruits(self, ids):
+        if ids is None:
+            return list(self._fruits.values())
+        return [self._fruits[fruit_id] for fruit_id in ids if
+                fruit_id in self._fruits]
+
+    @staticmethod
+    def _token(sut: ChangeLog, sequence: int) -> str:
+        return format_sync_token(sut.epoch, sequence)
+
+    def testGetChangesSinceZeroShouldGetAllResources(self):
+        sut = ChangeLog()
+        sut.record(['apple', 'banana'])
+        changes = sut.get_changes('0', self._get_fruits)
+        self.assertEqual(changes.sequence, 3)
+        self.assertEqual(changes.token, self._token(sut, 3))
+        self.assertCountEqual([change.resource_id for change in changes],
+                              ['apple', 'banana'])
+
+    def testGetChanges(self):
+        sut = ChangeLog()
+        sut.record(['apple', 'banana'])
+        sut.record(['apple'])
+        del self._fruits['banana']
+        sut.record(['banana'], True)
+        changes = sut.get_changes(self._token(sut, 2), self._get_fruits)
+        self.assertEqual(changes.sequence, 5)
+        self.assertEqual([(change.resource_id, change.sequence, change.deleted)
+                          for change in changes],
+                         [('apple', 4, False), ('banana', 5, True)])
+        self.assertIs(changes.changes[0].resource, self._fruits['apple'])
+        self.assertEqual(sut.get_changes(self._token(sut, 5),
+                                         self._get_fruits).changes, [])
+
+    def testGetChangesShouldReportMissingResourcesAsDeleted(self):
+        sut = ChangeLog()
+        sut.record(['apple', 'cherry'])
+        changes = sut.get_changes(self._token(sut, 2), self._get_fruits)
+        self.assertEqual([(change.resource_id, change.deleted)
+                          for change in changes], [('cherry', True)])
+
+    def testGetChangesShouldExpireDiscardedChanges(self):
+        sut = ChangeLog(2)
+        sut.record(['apple', 'banana', 'cherry', 'durian'])
+        with self.assertRaises(ChangesExpired):
+            sut.get_changes(self._token(sut, 2), self._get_fruits)
+        self.assertEqual(
+            [change.resource_id for change in
+             sut.get_changes(self._token(sut, 3), self._get_fruits)],
+            ['cherry', 'durian'])
+
+    def testGetChangesShouldExpireUnknownSequenceNumbers(self):
+        sut = ChangeLog()
+        self.assertEqual(sut.get_changes(self._token(sut, 1),
+                                         self._get_fruits).changes, [])
+        with self.assertRaises(ChangesExpired):
+            sut.get_changes(self._token(sut, 2), self._get_fruits)
+
+    def testGetChangesShouldExpireOtherEpochs(self):
+        sut = ChangeLog()
+        sut.record(['apple', 'banana'])
+        other_log = ChangeLog()
+        self.assertNotEqual(other_log.epoch, sut.epoch)
+        with self.assertRaises(ChangesExpired):
+            sut.get_changes(self._token(other_log, 2), self._get_fruits)
+        with self.assertRaises(ChangesExpired):
+            sut.get_changes(self._token(other_log, 1), self._get_fruits)
+        self.assertEqual(len(sut.get_changes(
+            self._token(other_log, 0), self._get_fruits).changes), 2)
+
+
+class SyncTokenTest(TestCase):
+    def testParseSyncToken(self):
+        self.assertEqual(parse_sync_token('0'), (None, 0))
+        self.assertEqual(parse_sync_token(format_sync_token('1a2b', 12)),
+                         ('1a2b', 12))
+
+    def testParseSyncTokenWithInvalidTokenShouldRaiseValueError(self):
+        for token in ('', '12', '-1', '1a2b:', ':12', '1a2b:-1', '1a2b:012',
+                      'xyz:1'):
+            with self.subTest(token=token):
+                with self.assertRaises(ValueError):
+                    parse_sync_token(token)
@@ -1,11 +1,25 @@
 import json
+import re
 from typing import List
+from unittest.mock import patch
+from urllib.parse import urlparse, parse_qs
 
 from jsonschema import validate
 
 from alfred_http import base64_encodes
+from alfred_http.endpoints import BadRequestError
+from alfred_http.http import HttpBody
 from alfred_json import json_schema
+from alfred_json.cbor import CborCodec
+from alfred_json.msgpack import MsgpackCodec
+from alfred_json.type import ListType
+from alfred_rest.changes import ResourcesChanged, format_sync_token, \
+    parse_sync_token
+from alfred_rest.endpoints import JsonRequestPayloadType, \
+    JsonBatchRequestPayloadType, ResourceBatchType, ResourceBatch, \
+    AddResourceEndpoint, ReplaceResourcesEndpoint, split_batches
 from alfred_rest.tests import RestTestCase
+from alfred_rest.tests.extension.resource import AddRestTestResourceType
 
 
 class JsonSchemaEndpointTest(RestTestCase):
@@ -78,6 +92,20 @@ class GetResourceEndpointTest(RestTestCase):
         })
         self.assertResponseStatus(404, response)
 
+    def testEndpointShouldReturnSparseFieldset(self):
+        response = self.request('rest-test', parameters={
+            'id': 'foo',
+            'fields': 'label',
+        })
+        self.assertResponseStatus(200, response)
+        self.assertEqual(json.loads(response.body.content), {
+            'label': '',
+        })
+        match = re.fullmatch('<(.+)>; rel="describedby"',
+                             response.headers['Link'])
+        self.assertTrue(match.group(1).endswith(
+            '#/definitions/response/rest-test-sparse'))
+
 
 class GetResourcesEndpointTest(RestTestCase):
     def testEndpointShouldReturnResources(self):
@@ -90,9 +118,227 @@ class GetResourcesEndpointTest(RestTestCase):
             actual_ids.append(resource_data['id'])
         self.assertCountEqual(actual_ids, expected_ids)
 
+    def testEndpointShouldCacheResponsesUntilResourcesChange(self):
+        cache = self._app.service('http', 'response_cache')
+        response = self.request('rest-tests')
+        self.assertResponseStatus(200, response)
+        hits = cache.hits
+        self.assertEqual(self.request('rest-tests').body.content,
+                         response.body.content)
+        self.assertEqual(cache.hits, hits + 1)
+        response = self.request('rest-test-delete', parameters={
+            'id': 'foo',
+        })
+        self.assertResponseStatus(200, response)
+        response = self.request('rest-tests')
+        self.assertEqual([resource['id'] for resource in json.loads(
+            response.body.content)], ['Bar'])
+
+    def testEndpointShouldReturnResourcesById(self):
+        response = self.request('rest-tests', parameters={
+            'id': ['foo', 'baz'],
+            'explain': 'true',
+        })
+        self.assertResponseStatus(200, response)
+        data = json.loads(response.body.content)
+        self.assertEqual([resource['id'] for resource in data], ['foo'])
+        query_plan = json.loads(response.headers['X-Query-Plan'])
+        self.assertEqual(query_plan['strategy'], 'lookup')
+
+    def testEndpointShouldLinkToNextPageWithIds(self):
+        response = self.request('rest-tests', parameters={
+            'id': ['foo', 'Bar'],
+            'limit': 1,
+        })
+        self.assertResponseStatus(200, response)
+        data = json.loads(response.body.content)
+        self.assertEqual([resource['id'] for resource in data], ['Bar'])
+        match = re.fullmatch('<(.+)>; rel="next"', response.headers['Link'])
+        query = parse_qs(urlparse(match.group(1)).query)
+        self.assertEqual(query['id'], ['foo', 'Bar'])
+
+    def testEndpointShouldReturnChanges(self):
+        response = self.request('rest-tests', parameters={
+            'since': '0',
+        })
+        self.assertResponseStatus(200, response)
+        data = json.loads(response.body.content)
+        self.assertCountEqual([change['id'] for change in data],
+                              ['foo', 'Bar'])
+        token = response.headers['X-Sequence']
+        epoch, sequence = parse_sync_token(token)
+
+        self.request('rest-tests-delete', parameters={
+            'id': 'foo',
+        })
+        response = self.request('rest-tests', parameters={
+            'since': token,
+        })
+        self.assertResponseStatus(200, response)
+        data = json.loads(response.body.content)
+        self.assertEqual(data, [{
+            'id': 'foo',
+            'sequence': sequence + 1,
+            'deleted': True,
+        }])
+        self.assertEqual(response.headers['X-Sequence'],
+                         format_sync_token(epoch, sequence + 1))
+
+    def testEndpointShouldGoneForUnknownSequence(self):
+        response = self.request('rest-tests', parameters={
+            'since': '0',
+        })
+        epoch, _ = parse_sync_token(response.headers['X-Sequence'])
+        response = self.request('rest-tests', parameters={
+            'since': format_sync_token(epoch, 999),
+        })
+        self.assertResponseStatus(410, response)
+
+    def testEndpointShouldGoneForOtherEpochs(self):
+        # Epochs are eight characters long, so this one is never current.
+        response = self.request('rest-tests', parameters={
+            'since': format_sync_token('f' * 9, 1),
+        })
+        self.assertResponseStatus(410, response)
+
+    def testEndpointShouldBadRequestForInvalidSince(self):
+        response = self.request('rest-tests', parameters={
+            'since': '1',
+        })
+        self.assertResponseStatus(400, response)
+
+    def testEndpointShouldBadRequestForChangesWithPage(self):
+        response = self.request('rest-tests', parameters={
+            'since': '0',
+            'limit': 1,
+        })
+        self.assertResponseStatus(400, response)
+
+    def testEndpointShouldReturnPages(self):
+        response = self.request('rest-tests', parameters={
+            'limit': 1,
+        })
+        self.assertResponseStatus(200, response)
+        data = json.loads(response.body.content)
+        self.assertEqual([resource['id'] for resource in data], ['Bar'])
+        match = re.fullmatch('<(.+)>; rel="next"', response.headers['Link'])
+        self.assertIsNotNone(match)
+        query = parse_qs(urlparse(match.group(1)).query)
+        self.assertEqual(query['limit'], ['1'])
+
+        response = self.request('rest-tests', parameters={
+            'limit': 1,
+            'cursor': query['cursor'][0],
+        })
+        self.assertResponseStatus(200, response)
+        data = json.loads(response.body.content)
+        self.assertEqual([resource['id'] for resource in data], ['foo'])
+        self.assertNotIn('Link', response.headers)
+
+    def testEndpointShouldReturnSortedPages(self):
+        response = self.request('rest-tests', parameters={
+            'sort': '-label',
+            'limit': 1,
+        })
+        self.assertResponseStatus(200, response)
+        data = json.loads(response.body.content)
+        self.assertEqual([resource['id'] for resource in data], ['foo'])
+        match = re.fullmatch('<(.+)>; rel="next"', response.headers['Link'])
+        query = parse_qs(urlparse(match.group(1)).query)
+        self.assertEqual(query['sort'], ['-label'])
+
+        response = self.request('rest-tests', parameters={
+            'sort': '-label',
+            'limit': 1,
+            'cursor': query['cursor'][0],
+        })
+        self.assertResponseStatus(200, response)
+        data = json.loads(response.body.content)
+        self.assertEqual([resource['id'] for resource in data], ['Bar'])
+        self.assertNotIn('Link', response.headers)
+
+        response = self.request('rest-tests', parameters={
+            'sort': 'label',
+            'cursor': query['cursor'][0],
+        })
+        self.assertResponseStatus(400, response)
+
+    def testEndpointShouldBadRequestForInvalidPage(self):
+        for parameters in ({'limit': 0}, {'limit': 'foo'}, {'cursor': 'foo'}):
+            with self.subTest(parameters=parameters):
+                response = self.request('rest-tests', parameters=parameters)
+                self.assertResponseStatus(400, response)
+
+    def testEndpointShouldFilterResources(self):
+        response = self.request('rest-tests', parameters={
+            'filter[id][in]': 'foo,baz',
+        })
+        self.assertResponseStatus(200, response)
+        data = json.loads(response.body.content)
+        self.assertEqual([resource['id'] for resource in data], ['foo'])
+
+    def testEndpointShouldLinkToNextPageWithFilters(self):
+        response = self.request('rest-tests', parameters={
+            'limit': 1,
+            'filter[label]': '',
+        })
+        self.assertResponseStatus(200, response)
+        match = re.fullmatch('<(.+)>; rel="next"', response.headers['Link'])
+        query = parse_qs(urlparse(match.group(1)).query,
+                         keep_blank_values=True)
+        self.assertEqual(query['filter[label]'], [''])
+
+    def testEndpointShouldExplainQueryPlan(self):
+        response = self.request('rest-tests', parameters={
+            'filter[label]': '',
+            'explain': 'true',
+        })
+        self.assertResponseStatus(200, response)
+        self.assertEqual(json.loads(response.headers['X-Query-Plan']), {
+            'strategy': 'index',
+            'index': 'HashIndex(label)',
+            'candidates': 2,
+            'residual_filters': [],
+        })
+
+    def testEndpointShouldBadRequestForInvalidFilter(self):
+        response = self.request('rest-tests', parameters={
+            'filter[id][between]': 'foo',
+        })
+        self.assertResponseStatus(400, response)
+
+    def testEndpointShouldReturnSparseFieldsets(self):
+        response = self.request('rest-tests', parameters={
+            'limit': 1,
+            'fields': 'id',
+        })
+        self.assertResponseStatus(200, response)
+        self.assertEqual(json.loads(response.body.content), [{
+            'id': 'Bar',
+        }])
+        links = dict((rel, url) for url, rel in re.findall(
+            '<([^>]+)>; rel="([^"]+)"', response.headers['Link']))
+        self.assertTrue(links['describedby'].endswith(
+            '#/definitions/response/rest-tests-sparse'))
+        query = parse_qs(urlparse(links['next']).query)
+        self.assertEqual(query['fields'], ['id'])
+
+    def testEndpointShouldReturnNdjsonResources(self):
+        response = self.request('rest-tests', headers={
+            'Accept': 'application/x-ndjson',
+        })
+        self.assertResponseStatus(200, response)
+        self.assertResponseContentType('application/x-ndjson', response)
+        data = [json.loads(line) for line in
+                response.body.content.splitlines()]
+        self.assertCountEqual([resource['id'] for resource in data],
+                              ['foo', 'Bar'])
+
 
 class AddResourceEndpointTest(RestTestCase):
     def testEndpointShouldAddResource(self):
+        events = []
+        self._app.events.subscribe(ResourcesChanged, events.append)
         resource_id = 'qux'
         resource_label = 'QuX'
         body = json.dumps({
@@ -107,6 +353,9 @@ class AddResourceEndpointTest(RestTestCase):
         data = json.loads(response.body.content)
         self.assertEqual(data['id'], resource_id)
         self.assertEqual(data['label'], resource_label)
+        self.assertEqual([(event.resource_type_name, event.resource_ids,
+                           event.deleted) for event in events],
+                         [('rest-test', ('qux',), False)])
 
         # Confirm we can retrieve the resource we just added.
         response = self.request('rest-test', parameters={
@@ -117,6 +366,66 @@ class AddResourceEndpointTest(RestTestCase):
         self.assertEqual(data['id'], resource_id)
         self.assertEqual(data['label'], resource_label)
 
+    def testEndpointShouldImportNdjsonResources(self):
+        body = '\n'.join([
+            json.dumps({
+                'id': 'qux',
+                'label': 'QuX',
+            }),
+            '',
+            '{"id": ',
+            json.dumps({
+                'label': 'Quux',
+            }),
+            json.dumps({
+                'id': 'quuz',
+            }),
+        ])
+        response = self.request('rest-test-add', body=body, headers={
+            'Content-Type': 'application/x-ndjson',
+            'Accept': 'application/x-ndjson',
+        })
+        self.assertResponseStatus(200, response)
+        self.assertResponseContentType('application/x-ndjson', response)
+        report = [json.loads(line) for line in
+                  response.body.content.splitlines()]
+        self.assertEqual([item['line'] for item in report], [1, 3, 4, 5])
+        self.assertEqual([item['status'] for item in report],
+                         [200, 400, 400, 200])
+        self.assertEqual(report[0]['resource']['label'], 'QuX')
+        self.assertEqual(report[1]['error']['code'], 'bad_request')
+
+        # Confirm the valid resources were added.
+        response = self.request('rest-tests')
+        data = json.loads(response.body.content)
+        self.assertCountEqual([resource['id'] for resource in data],
+                              ['foo', 'Bar', 'qux', 'quuz'])
+
+    def testEndpointShouldReportEveryImportedResource(self):
+        events = []
+        self._app.events.subscribe(ResourcesChanged, events.append)
+        body = '\n'.join([
+            json.dumps({
+                'id': 'qux',
+            }),
+            json.dumps({
+                'id': 'foo',
+            }),
+            json.dumps({
+                'id': 'quux',
+            }),
+        ])
+        response = self.request('rest-test-add', body=body, headers={
+            'Content-Type': 'application/x-ndjson',
+        })
+        self.assertResponseStatus(200, response)
+        report = [json.loads(line) for line in
+                  response.body.content.splitlines()]
+        self.assertEqual([item['status'] for item in report], [200, 409, 200])
+        self.assertEqual(report[1]['error']['code'], 'conflict')
+        self.assertEqual([event.resource_ids for event in events],
+                         [('qux', 'quux')])
+
     def testEndpointShouldBadRequestForInvalidResource(self):
         body = json.dumps({})
         response = self.request('rest-test-add', body=body, headers={
@@ -125,6 +434,102 @@ class AddResourceEndpointTest(RestTestCase):
         })
         self.assertResponseStatus(400, response)
 
+    def testEndpointShouldAddResourceBatch(self):
+        body = json.dumps([
+            {
+                'id': 'qux',
+                'label': 'QuX',
+            },
+            {
+                'label': 'Quux',
+            },
+            {
+                'id': 'quuz',
+            },
+        ])
+        response = self.request('rest-test-add', body=body, headers={
+            'Content-Type': 'application/json',
+            'Accept': 'application/json',
+        })
+        self.assertResponseStatus(200, response)
+        report = json.loads(response.body.content)
+        self.assertEqual([item['index'] for item in report], [0, 1, 2])
+        self.assertEqual([item['status'] for item in report], [200, 400, 200])
+        self.assertEqual(report[0]['resource']['label'], 'QuX')
+        self.assertEqual(report[1]['error']['code'], 'bad_request')
+
+        # Confirm the valid resources were added.
+        response = self.request('rest-tests')
+        data = json.loads(response.body.content)
+        self.assertCountEqual([resource['id'] for resource in data],
+                              ['foo', 'Bar', 'qux', 'quuz'])
+
+    def testEndpointShouldReportExistingResourcesInBatch(self):
+        events = []
+        self._app.events.subscribe(ResourcesChanged, events.append)
+        body = json.dumps([
+            {
+                'id': 'qux',
+            },
+            {
+                'id': 'foo',
+            },
+        ])
+        response = self.request('rest-test-add', body=body, headers={
+            'Content-Type': 'application/json',
+            'Accept': 'application/json',
+        })
+        self.assertResponseStatus(200, response)
+        report = json.loads(response.body.content)
+        self.assertEqual([item['status'] for item in report], [200, 409])
+        self.assertEqual(report[0]['resource']['id'], 'qux')
+        self.assertEqual(report[1]['error']['code'], 'conflict')
+        self.assertEqual([event.resource_ids for event in events], [('qux',)])
+
+        # Confirm the new resource was added.
+        response = self.request('rest-test', parameters={
+            'id': 'qux',
+        })
+        self.assertResponseStatus(200, response)
+
+    @patch.object(AddResourceEndpoint, 'BATCH_SIZE', 2)
+    def testEndpointShouldAddResourceBatchInBatches(self):
+        events = []
+        self._app.events.subscribe(ResourcesChanged, events.append)
+        body = json.dumps([
+            {
+                'id': 'qux',
+            },
+            {
+                'id': 'quux',
+            },
+            {
+                'id': 'quuz',
+            },
+        ])
+        response = self.request('rest-test-add', body=body, headers={
+            'Content-Type': 'application/json',
+            'Accept': 'application/json',
+        })
+        self.assertResponseStatus(200, response)
+        report = json.loads(response.body.content)
+        self.assertEqual([item['index'] for item in report], [0, 1, 2])
+        self.assertEqual([item['status'] for item in report], [200, 200, 200])
+        self.assertEqual([event.resource_ids for event in events],
+                         [('qux', 'quux'), ('quuz',)])
+
+    def testEndpointShouldReportInvalidJsonInBatch(self):
+        body = '[{"id": "qux"}, {"id": "quux"} {"id": "quuz"}]'
+        response = self.request('rest-test-add', body=body, headers={
+            'Content-Type': 'application/json',
+            'Accept': 'application/json',
+        })
+        self.assertResponseStatus(200, response)
+        report = json.loads(response.body.content)
+        self.assertEqual([item['index'] for item in report], [0, 1, 2])
+        self.assertEqual([item['status'] for item in report], [200, 200, 400])
+        self.assertEqual(report[2]['error']['code'], 'bad_request')
+
     def testEndpointShouldUnsupportedMediaTypeForInvalidContentType(self):
         resource_id = 'qux'
         resource_label = 'QuX'
@@ -177,6 +582,26 @@ class ReplaceResourceEndpointTest(RestTestCase):
         self.assertEqual(data['id'], resource_id)
         self.assertEqual(data['label'], resource_label)
 
+    def testEndpointShouldSkipUnchangedResource(self):
+        events = []
+        self._app.events.subscribe(ResourcesChanged, events.append)
+        response = self.request('rest-test-replace', parameters={
+            'id': 'foo',
+        }, body=json.dumps({
+            'id': 'foo',
+            'label': '',
+        }), headers={
+            'Content-Type': 'application/json',
+            'Accept': 'application/json',
+        })
+        self.assertResponseStatus(200, response)
+        self.assertEqual(response.headers['X-Unchanged-Resources'], '1')
+        self.assertEqual(json.loads(response.body.content), {
+            'id': 'foo',
+            'label': '',
+        })
+        self.assertEqual(events, [])
+
     def testEndpointShouldBadRequestForInvalidResource(self):
         resource_id = 'foo'
         body = json.dumps({})
@@ -231,6 +656,78 @@ class ReplaceResourceEndpointTest(RestTestCase):
         self.assertResponseStatus(404, response)
 
 
+class ReplaceResourcesEndpointTest(RestTestCase):
+    def testEndpointShouldReplaceResources(self):
+        body = json.dumps([
+            {
+                'id': 'foo',
+                'label': 'Foo',
+            },
+            {
+                'id': 'baz',
+                'label': 'Baz',
+            },
+            {
+                'label': 'Qux',
+            },
+        ])
+        response = self.request('rest-tests-replace', body=body, headers={
+            'Content-Type': 'application/json',
+            'Accept': 'application/json',
+        })
+        self.assertResponseStatus(200, response)
+        report = json.loads(response.body.content)
+        self.assertEqual([item['status'] for item in report], [200, 404, 400])
+        self.assertEqual(report[0]['resource']['label'], 'Foo')
+        self.assertEqual(report[1]['error']['code'], 'not_found')
+
+        # Confirm we can retrieve the resource we just replaced.
+        response = self.request('rest-test', parameters={
+            'id': 'foo',
+        })
+        data = json.loads(response.body.content)
+        self.assertEqual(data['label'], 'Foo')
+
+    @patch.object(ReplaceResourcesEndpoint, 'BATCH_SIZE', 1)
+    def testEndpointShouldReplaceResourcesInBatches(self):
+        events = []
+        self._app.events.subscribe(ResourcesChanged, events.append)
+        body = json.dumps([
+            {
+                'id': 'foo',
+                'label': 'Foo',
+            },
+            {
+                'id': 'baz',
+            },
+            {
+                'id': 'Bar',
+                'label': 'Bar',
+            },
+        ])
+        response = self.request('rest-tests-replace', body=body, headers={
+            'Content-Type': 'application/json',
+            'Accept': 'application/json',
+        })
+        self.assertResponseStatus(200, response)
+        report = json.loads(response.body.content)
+        self.assertEqual([item['index'] for item in report], [0, 1, 2])
+        self.assertEqual([item['status'] for item in report], [200, 404, 200])
+        self.assertEqual([event.resource_ids for event in events],
+                         [('foo',), ('Bar',)])
+
+    def testEndpointShouldBadRequestForInvalidPayload(self):
+        body = json.dumps({
+            'id': 'foo',
+            'label': 'Foo',
+        })
+        response = self.request('rest-tests-replace', body=body, headers={
+            'Content-Type': 'application/json',
+            'Accept': 'application/json',
+        })
+        self.assertResponseStatus(400, response)
+
+
 class AlterResourceEndpointTest(RestTestCase):
     def testEndpointShouldAlterResource(self):
         resource_id = 'foo'
@@ -262,6 +759,25 @@ class AlterResourceEndpointTest(RestTestCase):
         self.assertEqual(data['id'], resource_id)
         self.assertEqual(data['label'], resource_label)
 
+    def testEndpointShouldSkipUnchangedResource(self):
+        events = []
+        self._app.events.subscribe(ResourcesChanged, events.append)
+        response = self.request('rest-test-alter', parameters={
+            'id': 'foo',
+        }, body=json.dumps([
+            {
+                'op': 'replace',
+                'path': '/label',
+                'value': '',
+            },
+        ]), headers={
+            'Content-Type': 'application/json-patch+json',
+            'Accept': 'application/json',
+        })
+        self.assertResponseStatus(200, response)
+        self.assertEqual(response.headers['X-Unchanged-Resources'], '1')
+        self.assertEqual(events, [])
+
     def testEndpointShouldBadRequestForInvalidResource(self):
         resource_id = 'foo'
         body = json.dumps({})
@@ -350,6 +866,35 @@ class AlterResourcesEndpointTest(RestTestCase):
         for resource_data in data:
             self.assertEqual(resource_data['label'], resource_label)
 
+    def testEndpointShouldSkipUnchangedResources(self):
+        events = []
+        self._app.events.subscribe(ResourcesChanged, events.append)
+        self.request('rest-test-replace', parameters={
+            'id': 'foo',
+        }, body=json.dumps({
+            'id': 'foo',
+            'label': 'QuX',
+        }), headers={
+            'Content-Type': 'application/json',
+        })
+        response = self.request('rest-tests-alter', body=json.dumps([
+            {
+                'op': 'replace',
+                'path': '/label',
+                'value': 'QuX',
+            },
+        ]), headers={
+            'Content-Type': 'application/json-patch+json',
+            'Accept': 'application/json',
+        })
+        self.assertResponseStatus(200, response)
+        self.assertEqual(response.headers['X-Unchanged-Resources'], '1')
+        self.assertCountEqual([resource_data['label'] for resource_data in
+                               json.loads(response.body.content)],
+                              ['QuX', 'QuX'])
+        self.assertEqual([event.resource_ids for event in events],
+                         [('foo',), ('Bar',)])
+
     def testEndpointShouldBadRequestForInvalidResource(self):
         body = json.dumps({})
         response = self.request('rest-tests-alter', body=body, headers={
@@ -385,11 +930,15 @@ class AlterResourcesEndpointTest(RestTestCase):
 
 class DeleteResourceEndpointTest(RestTestCase):
     def testEndpointShouldDeleteResource(self):
+        events = []
+        self._app.events.subscribe(ResourcesChanged, events.append)
         resource_id = 'foo'
         response = self.request('rest-test-delete', parameters={
             'id': resource_id,
         })
         self.assertResponseStatus(200, response)
+        self.assertEqual([(event.resource_ids, event.deleted)
+                          for event in events], [(('foo',), True)])
 
         # Confirm we can no longer retrieve the resource we just deleted.
         response = self.request('rest-test', parameters={
@@ -410,3 +959,183 @@ class DeleteResourceEndpointTest(RestTestCase):
             'id': resource_id,
         })
         self.assertResponseStatus(200, response)
+
+
+class DeleteResourcesEndpointTest(RestTestCase):
+    def testEndpointShouldDeleteResources(self):
+        response = self.request('rest-tests-delete', parameters={
+            'id': ['foo', 'baz'],
+        }, headers={
+            'Accept': 'application/json',
+        })
+        self.assertResponseStatus(200, response)
+        report = json.loads(response.body.content)
+        self.assertEqual([item['status'] for item in report], [200, 404])
+        self.assertEqual(report[0]['resource']['id'], 'foo')
+
+        # Confirm we can no longer retrieve the resource we just deleted.
+        response = self.request('rest-tests')
+        data = json.loads(response.body.content)
+        self.assertEqual([resource['id'] for resource in data], ['Bar'])
+
+    def testEndpointShouldBadRequestWithoutIds(self):
+        response = self.request('rest-tests-delete')
+        self.assertResponseStatus(400, response)
+
+
+class JsonRequestPayloadTypeTest(RestTestCase):
+    def testFromHttpRequestBodyWithListTypeShouldDeserializeItems(self):
+        sut = JsonRequestPayloadType(ListType(AddRestTestResourceType()))
+        body = HttpBody(iter([b'[{"id": "foo", "lab', b'el": "Foo"}, ',
+                              b'{"id": "bar"}]']), 'application/json')
+        resources = list(sut.from_http_request_body(body))
+        self.assertEqual(len(resources), 2)
+        self.assertEqual(resources[0].id, 'foo')
+        self.assertEqual(resources[0].label, 'Foo')
+        self.assertEqual(resources[1].id, 'bar')
+
+    def testFromHttpRequestBodyWithListTypeShouldBadRequestForInvalidItem(
+            self):
+        sut = JsonRequestPayloadType(ListType(AddRestTestResourceType()))
+        body = HttpBody(b'[{"id": "foo"}, {"label": "Bar"}]',
+                        'application/json')
+        resources = sut.from_http_request_body(body)
+        self.assertEqual(next(resources).id, 'foo')
+        with self.assertRaises(BadRequestError):
+            next(resources)
+
+    def testFromHttpRequestBodyWithListTypeShouldBadRequestForInvalidJson(
+            self):
+        sut = JsonRequestPayloadType(ListType(AddRestTestResourceType()))
+        body = HttpBody(b'[{"id": "foo"}', 'application/json')
+        with self.assertRaises(BadRequestError):
+            list(sut.from_http_request_body(body))
+
+
+class JsonBatchRequestPayloadTypeTest(RestTestCase):
+    def testFromHttpRequestBodyShouldDeserializeItemsWhileReading(self):
+        sut = JsonBatchRequestPayloadType(ResourceBatchType(
+            AddRestTestResourceType()))
+        chunks = iter([b' [{"id": "foo", "lab', b'el": "Foo"}, ',
+                       b'{"label": "Bar"}, ', b'{"id": "baz"}]'])
+        batch = sut.from_http_request_body(HttpBody(chunks,
+                                                    'application/json'))
+        self.assertIsInstance(batch, ResourceBatch)
+        items = iter(batch)
+        item = next(items)
+        self.assertEqual(item.index, 0)
+        self.assertEqual(item.resource.label, 'Foo')
+        # The last chunk has not been read yet.
+        self.assertEqual(next(chunks), b'{"id": "baz"}]')
+
+    def testFromHttpRequestBodyShouldReportInvalidItems(self):
+        sut = JsonBatchRequestPayloadType(ResourceBatchType(
+            AddRestTestResourceType()))
+        body = HttpBody(iter([b'[{"id": "foo"}, {"label": "Bar"}, ',
+                              b'{"id": "baz"}, {']), 'application/json')
+        items = list(sut.from_http_request_body(body))
+        self.assertEqual([item.index for item in items], [0, 1, 2, 3])
+        self.assertEqual([item.error is None for item in items],
+                         [True, False, True, False])
+        self.assertIsInstance(items[1].error, BadRequestError)
+        self.assertIsInstance(items[3].error, BadRequestError)
+
+    def testFromHttpRequestBodyShouldDeserializeSingleResource(self):
+        sut = JsonBatchRequestPayloadType(ResourceBatchType(
+            AddRestTestResourceType(), True))
+        body = HttpBody(iter([b'{"id": "foo", ', b'"label": "Foo"}']),
+                        'application/json')
+        resource = sut.from_http_request_body(body)
+        self.assertEqual(resource.id, 'foo')
+        self.assertEqual(resource.label, 'Foo')
+
+    def testFromHttpRequestBodyShouldBadRequestForSingleResource(self):
+        sut = JsonBatchRequestPayloadType(ResourceBatchType(
+            AddRestTestResourceType()))
+        body = HttpBody(b'{"id": "foo"}', 'application/json')
+        with self.assertRaises(BadRequestError):
+            sut.from_http_request_body(body)
+
+
+class SplitBatchesTest(RestTestCase):
+    def testSplitBatches(self):
+        self.assertEqual(list(split_batches(iter(range(5)), 2)),
+                         [[0, 1], [2, 3], [4]])
+
+    def testSplitBatchesWithoutItems(self):
+        self.assertEqual(list(split_batches([], 2)), [])
+
+
+class BinaryPayloadTypesTest(RestTestCase):
+    CONTENT_TYPES = (
+        ('application/msgpack', MsgpackCodec()),
+        ('application/cbor', CborCodec()),
+    )
+
+    def testGetResourcesShouldNegotiateContentType(self):
+        for content_type, codec in self.CONTENT_TYPES:
+            with self.subTest(content_type=content_type):
+                response = self.request('rest-tests', headers={
+                    'Accept': content_type,
+                })
+                self.assertResponseStatus(200, response)
+                self.assertResponseContentType(content_type, response)
+                data = codec.decode(response.body.content)
+                self.assertCountEqual([resource['id'] for resource in data],
+                                      ['foo', 'Bar'])
+
+    def testGetResourceShouldNegotiateContentType(self):
+        for content_type, codec in self.CONTENT_TYPES:
+            with self.subTest(content_type=content_type):
+                response = self.request('rest-test', parameters={
+                    'id': 'foo',
+                }, headers={
+                    'Accept': content_type,
+                })
+                self.assertResponseStatus(200, response)
+                self.assertResponseContentType(content_type, response)
+                self.assertEqual(codec.decode(response.body.content)['id'],
+                                 'foo')
+
+    def testGetResourceShouldPreferJson(self):
+        response = self.request('rest-test', parameters={
+            'id': 'foo',
+        })
+        self.assertResponseContentType('application/json', response)
+
+    def testAddResource(self):
+        for content_type, codec in self.CONTENT_TYPES:
+            with self.subTest(content_type=content_type):
+                resource_id = 'qux_%s' % content_type.split('/')[1]
+                response = self.request('rest-test-add', body=codec.encode({
+                    'id': resource_id,
+                    'label': 'QuX',
+                }), headers={
+                    'Content-Type': content_type,
+                    'Accept': content_type,
+                })
+                self.assertResponseStatus(200, response)
+                data = codec.decode(response.body.content)
+                self.assertEqual(data['id'], resource_id)
+                self.assertEqual(data['label'], 'QuX')
+
+    def testAddResourceShouldBadRequestForInvalidResource(self):
+        for content_type, codec in self.CONTENT_TYPES:
+            with self.subTest(content_type=content_type):
+                response = self.request('rest-test-add', body=codec.encode({
+                    'label': 'QuX',
+                }), headers={
+                    'Content-Type': content_type,
+                    'Accept': 'application/json',
+                })
+                self.assertResponseStatus(400, response)
+
+    def testAddResourceShouldBadRequestForInvalidPayload(self):
+        for content_type, codec in self.CONTENT_TYPES:
+            with self.subTest(content_type=content_type):
+                response = self.request('rest-test-add', body=b'\xc1\xff',
+                                        headers={
+                                            'Content-Type': content_type,
+                                            'Accept': 'application/json',
+                                        })
+                self.assertResponseStatus(400, response)
@@ -0,0 +1,133 @@
+from unittest import TestCase
+
+from alfred_http.endpoints import BadRequestError
+from alfred_json.type import OutputDataType, Property
+from alfred_rest.filter import parse_filter_value, parse_filters, \
+    EqualsFilter, InFilter, RangeFilter, filter_resources
+
+
+class Fruit:
+    def __init__(self, name, ripe, weight):
+        self.name = name
+        self.ripe = ripe
+        self.weight = weight
+
+    @property
+    def id(self):
+        return self.name
+
+
+class FruitType(OutputDataType):
+    def get_json_schema(self):
+        return {
+            'type': 'object',
+        }
+
+    def to_json(self, data):
+        return {
+            'name': data.name,
+            'ripe': data.ripe,
+            'weight': data.weight,
+        }
+
+    def get_properties(self):
+        return [
+            Property('name'),
+            Property('ripe'),
+            Property('weight'),
+        ]
+
+
+class UndescribedFruitType(FruitType):
+    def get_properties(self):
+        return None
+
+
+class ParseFilterValueTest(TestCase):
+    def testParseFilterValue(self):
+        self.assertIs(parse_filter_value('true'), True)
+        self.assertIsNone(parse_filter_value('null'))
+        self.assertEqual(parse_filter_value('3.5'), 3.5)
+        self.assertEqual(parse_filter_value('"3.5"'), '3.5')
+        self.assertEqual(parse_filter_value('ola'), 'ola')
+        self.assertEqual(parse_filter_value('NaN'), 'NaN')
+        self.assertEqual(parse_filter_value('[1]'), '[1]')
+
+
+class ParseFiltersTest(TestCase):
+    def testParseFilters(self):
+        filters = parse_filters({
+            'type': 'ola',
+            'label': ['Foo', 'Bar'],
+            'id': {
+                'in': 'foo,bar',
+            },
+            'luminosity': {
+                'gt': '0',
+                'lte': '0.5',
+            },
+        })
+        self.assertEqual(len(filters), 4)
+        equals_filter, label_filter, in_filter, range_filter = filters
+        self.assertIsInstance(equals_filter, EqualsFilter)
+        self.assertEqual(equals_filter.value, 'ola')
+        self.assertIsInstance(label_filter, InFilter)
+        self.assertEqual(label_filter.values, ['Foo', 'Bar'])
+        self.assertIsInstance(in_filter, InFilter)
+        self.assertEqual(in_filter.values, ['foo', 'bar'])
+        self.assertIsInstance(range_filter, RangeFilter)
+        self.assertEqual(range_filter.minimum, 0)
+        self.assertTrue(range_filter.exclusive_minimum)
+        self.assertEqual(range_filter.maximum, 0.5)
+        self.assertFalse(range_filter.exclusive_maximum)
+
+    def testParseFiltersShouldBadRequestForInvalidFilters(self):
+        for argument in ({'luminosity': {'between': '1'}},
+                         {'luminosity': {'gt': 'true'}},
+                         {'luminosity': {'gt': '1', 'gte': '1'}},
+                         {'luminosity': {'gt': {'foo': '1'}}}):
+            with self.subTest(argument=argument):
+                with self.assertRaises(BadRequestError):
+                    parse_filters(argument)
+
+
+class FilterTest(TestCase):
+    def testEqualsFilterShouldDistinguishBooleansFromNumbers(self):
+        sut = EqualsFilter('ripe', True)
+        self.assertTrue(sut.matches(True))
+        self.assertFalse(sut.matches(1))
+
+    def testInFilter(self):
+        sut = InFilter('weight', [1, 2])
+        self.assertTrue(sut.matches(2.0))
+        self.assertFalse(sut.matches(3))
+        self.assertFalse(sut.matches(True))
+        self.assertFalse(sut.matches([1]))
+
+    def testRangeFilter(self):
+        sut = RangeFilter('weight', 1, 2, exclusive_maximum=True)
+        self.assertTrue(sut.matches(1))
+        self.assertTrue(sut.matches(1.5))
+        self.assertFalse(sut.matches(2))
+        self.assertFalse(sut.matches('1.5'))
+        self.assertFalse(sut.matches(True))
+
+
+class FilterResourcesTest(TestCase):
+    FRUITS = [
+        Fruit('apple', True, 150),
+        Fruit('banana', False, 120),
+        Fruit('cherry', True, 5),
+    ]
+
+    def testFilterResources(self):
+        filters = [EqualsFilter('ripe', True), RangeFilter('weight', 10)]
+        for fruit_type in (FruitType(), UndescribedFruitType()):
+            with self.subTest(fruit_type=fruit_type):
+                fruits = filter_resources(self.FRUITS, filters, fruit_type)
+                self.assertEqual([fruit.name for fruit in fruits], ['apple'])
+
+    def testFilterResourcesWithUnknownProperty(self):
+        fruits = filter_resources(self.FRUITS, [EqualsFilter('color', 'red')],
+                                  FruitType())
+        self.assertEqual(list(fruits), [])
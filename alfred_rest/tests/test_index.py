@@ -0,0 +1,164 @@
+from unittest import TestCase
+
+from alfred_rest.filter import EqualsFilter, InFilter, RangeFilter
+from alfred_rest.index import HashIndex, SortedIndex, ResourceIndexes
+from alfred_rest.resource import Page
+from alfred_rest.sort import Sort, sort_key
+from alfred_rest.tests.test_filter import Fruit, FruitType
+
+
+class HashIndexTest(TestCase):
+    def testSelect(self):
+        sut = HashIndex('ripe')
+        sut.add('apple', True)
+        sut.add('banana', False)
+        sut.add('cherry', True)
+        sut.add('durian', 1)
+        resource_filter = EqualsFilter('ripe', True)
+        self.assertTrue(sut.supports(resource_filter))
+        self.assertEqual(sut.estimate(resource_filter), 2)
+        self.assertEqual(sut.select(resource_filter), {'apple', 'cherry'})
+        self.assertEqual(sut.select(InFilter('ripe', [False, 1])),
+                         {'banana', 'durian'})
+
+    def testRemove(self):
+        sut = HashIndex('ripe')
+        sut.add('apple', True)
+        sut.remove('apple', True)
+        self.assertEqual(sut.select(EqualsFilter('ripe', True)), set())
+
+    def testSupports(self):
+        sut = HashIndex('ripe')
+        self.assertFalse(sut.supports(EqualsFilter('weight', True)))
+        self.assertFalse(sut.supports(RangeFilter('ripe', 1)))
+
+
+class SortedIndexTest(TestCase):
+    def testSelect(self):
+        sut = SortedIndex('weight')
+        for resource_id, value in (('apple', 150), ('banana', 120),
+                                   ('cherry', 5), ('durian', 120),
+                                   ('elderberry', '120'), ('fig', True)):
+            sut.add(resource_id, value)
+        resource_filter = RangeFilter('weight', 100, 150,
+                                      exclusive_maximum=True)
+        self.assertTrue(sut.supports(resource_filter))
+        self.assertEqual(sut.estimate(resource_filter), 2)
+        self.assertEqual(sut.select(resource_filter), {'banana', 'durian'})
+        self.assertEqual(sut.select(RangeFilter('weight', 120, 200, True)),
+                         {'apple'})
+        self.assertEqual(sut.select(EqualsFilter('weight', '120')),
+                         {'elderberry'})
+
+    def testRemove(self):
+        sut = SortedIndex('weight')
+        sut.add('banana', 120)
+        sut.add('durian', 120)
+        sut.remove('banana', 120)
+        self.assertEqual(sut.select(EqualsFilter('weight', 120)), {'durian'})
+
+    def testIterate(self):
+        sut = SortedIndex('weight')
+        for resource_id, value in (('apple', 150), ('banana', 120),
+                                   ('cherry', None), ('durian', 120),
+                                   ('elderberry', '120')):
+            sut.add(resource_id, value)
+        self.assertEqual(len(sut), 5)
+        self.assertEqual(list(sut.iterate()), [
+            'cherry', 'banana', 'durian', 'apple', 'elderberry'])
+        after = sort_key(120), 'banana'
+        self.assertEqual(list(sut.iterate(after)),
+                         ['durian', 'apple', 'elderberry'])
+        self.assertEqual(list(sut.iterate(after, True)), ['cherry'])
+
+    def testSupports(self):
+        sut = SortedIndex('weight')
+        self.assertFalse(sut.supports(EqualsFilter('weight', True)))
+        self.assertFalse(sut.supports(RangeFilter('weight', 1, 'z')))
+        self.assertFalse(sut.supports(InFilter('weight', [1])))
+
+
+class ResourceIndexesTest(TestCase):
+    def _build_sut(self):
+        sut = ResourceIndexes(FruitType(), (HashIndex('ripe'),
+                                            SortedIndex('weight')))
+        sut.add([
+            Fruit('apple', True, 150),
+            Fruit('banana', False, 120),
+            Fruit('cherry', True, 5),
+        ])
+        return sut
+
+    def testSelectShouldUseMostSelectiveIndex(self):
+        sut = self._build_sut()
+        filters = [EqualsFilter('ripe', True), RangeFilter('weight', 130)]
+        plan = sut.plan(filters)
+        self.assertEqual(plan.to_json(), {
+            'strategy': 'index',
+            'index': 'SortedIndex(weight)',
+            'candidates': 1,
+            'residual_filters': ['ripe'],
+        })
+        self.assertEqual([fruit.name for fruit in sut.select(filters)],
+                         ['apple'])
+
+    def testSelectWithoutIndexes(self):
+        sut = self._build_sut()
+        filters = [EqualsFilter('name', 'cherry')]
+        self.assertEqual(sut.plan(filters).to_json(), {
+            'strategy': 'scan',
+            'candidates': 3,
+            'residual_filters': ['name'],
+        })
+        self.assertEqual([fruit.name for fruit in sut.select(filters)],
+                         ['cherry'])
+
+    def testUpdate(self):
+        sut = self._build_sut()
+        banana = Fruit('banana', True, 120)
+        sut.update([banana])
+        self.assertCountEqual(
+            [fruit.name for fruit in sut.select([EqualsFilter('ripe', True)])],
+            ['apple', 'banana', 'cherry'])
+        self.assertEqual(sut.select([EqualsFilter('ripe', False)]), [])
+
+    def testRemove(self):
+        sut = self._build_sut()
+        sut.remove([Fruit('cherry', True, 5)])
+        self.assertEqual(
+            [fruit.name for fruit in sut.select([EqualsFilter('ripe', True)])],
+            ['apple'])
+        self.assertEqual(len(sut), 2)
+
+    def testSelectWithIdsShouldLookUpResources(self):
+        sut = self._build_sut()
+        filters = [EqualsFilter('ripe', True)]
+        ids = ['cherry', 'durian', 'banana', 'cherry']
+        self.assertEqual(sut.plan(filters, ids=ids).to_json(), {
+            'strategy': 'lookup',
+            'candidates': 3,
+            'residual_filters': ['ripe'],
+        })
+        self.assertEqual(
+            [fruit.name for fruit in sut.select(filters, ids=ids)],
+            ['cherry'])
+
+    def testSelectWithSortedPageShouldWalkSortedIndex(self):
+        sut = self._build_sut()
+        filters = [EqualsFilter('ripe', True)]
+        page = Page(1, 'cherry', Sort('weight'), 5)
+        self.assertEqual(sut.plan(filters, page).to_json(), {
+            'strategy': 'ordered',
+            'index': 'SortedIndex(weight)',
+            'candidates': 3,
+            'residual_filters': ['ripe'],
+        })
+        self.assertEqual([fruit.name for fruit in sut.select(filters, page)],
+                         ['apple'])
+
+    def testSelectWithSortedPageWithoutSortedIndex(self):
+        sut = self._build_sut()
+        page = Page(2, sort=Sort('name', True))
+        self.assertEqual(sut.plan([], page).to_json()['strategy'], 'scan')
+        self.assertEqual([fruit.name for fruit in sut.select([], page)],
+                         ['cherry', 'banana'])
@@ -1,6 +1,18 @@
+from alfred_http.endpoints import EndpointUrlBuilder
+from alfred_rest.json import ExternalReferenceProxy
 from alfred_rest.tests import RestTestCase
 
 
+class CountingEndpointUrlBuilder(EndpointUrlBuilder):
+    def __init__(self, endpoints):
+        super().__init__(endpoints)
+        self.builds = 0
+
+    def build(self, endpoint_name, parameters=None):
+        self.builds += 1
+        return super().build(endpoint_name, parameters)
+
+
 class ExternalReferenceProxyTest(RestTestCase):
     ORIGINAL_EXTERNAL_POINTER = 'http://json-schema.org/draft-04/schema#'
     REWRITTEN_EXTERNAL_POINTER = 'http://alfred.local/about/json/external-schema/aHR0cDovL2pzb24tc2NoZW1hLm9yZy9kcmFmdC0wNC9zY2hlbWE%3D'
@@ -69,3 +81,26 @@ class ExternalReferenceProxyTest(RestTestCase):
         sut = self._app.service('rest', 'external_reference_proxy')
         rewritten_schema = sut.rewrite(original_schema)
         self.assertEqual(rewritten_schema, expected_schema)
+
+    def testRewritePointerShouldBeMemoized(self):
+        base_url = self._app.service('http', 'base_url')
+        urls = CountingEndpointUrlBuilder(
+            self._app.service('http', 'endpoints'))
+        sut = ExternalReferenceProxy(base_url, urls)
+        for _ in range(3):
+            self.assertEqual(sut.rewrite_pointer(
+                self.ORIGINAL_EXTERNAL_POINTER),
+                self.REWRITTEN_EXTERNAL_POINTER)
+        self.assertEqual(urls.builds, 1)
+
+    def testRewriteShouldSkipRewrittenSchemas(self):
+        schema = {
+            '$ref': self.ORIGINAL_EXTERNAL_POINTER,
+        }
+        sut = self._app.service('rest', 'external_reference_proxy')
+        self.assertIs(sut.rewrite(schema), schema)
+        # Alter the schema, so we can tell if it is rewritten again.
+        schema['$ref'] = self.ORIGINAL_EXTERNAL_POINTER
+        self.assertEqual(sut.rewrite(schema), {
+            '$ref': self.ORIGINAL_EXTERNAL_POINTER,
+        })
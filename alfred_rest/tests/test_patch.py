@@ -0,0 +1,76 @@
+from unittest import TestCase
+
+from jsonpatch import JsonPatch
+
+from alfred_json.serializer import SerializerCompiler
+from alfred_json.tests.test_serializer import Fruit, FruitType
+from alfred_json.type import UpdateInputDataType
+from alfred_rest.patch import get_patched_properties, patch_resource
+
+
+class GetPatchedPropertiesTest(TestCase):
+    def testGetPatchedProperties(self):
+        patch = JsonPatch([
+            {'op': 'replace', 'path': '/label', 'value': 'Foo'},
+            {'op': 'add', 'path': '/tags/-', 'value': 'bar'},
+            {'op': 'move', 'from': '/color', 'path': '/colour'},
+            {'op': 'test', 'path': '/id', 'value': 'foo'},
+        ])
+        self.assertEqual(get_patched_properties(patch),
+                         {'label', 'tags', 'color', 'colour'})
+
+    def testGetPatchedPropertiesShouldReturnNoneForDocuments(self):
+        patch = JsonPatch([
+            {'op': 'replace', 'path': '', 'value': {}},
+        ])
+        self.assertIsNone(get_patched_properties(patch))
+
+    def testGetPatchedPropertiesShouldIgnoreTests(self):
+        patch = JsonPatch([
+            {'op': 'test', 'path': '/label', 'value': 'Foo'},
+        ])
+        self.assertEqual(get_patched_properties(patch), set())
+
+
+class UpdateableFruitType(FruitType, UpdateInputDataType):
+    def update_from_json(self, json_data, instance):
+        instance.name = json_data['name']
+        instance.kind = json_data['kind']
+        return instance
+
+    def update_properties_from_json(self, json_data, instance, names):
+        for name in names & {'name', 'kind'}:
+            setattr(instance, name, json_data[name])
+        return instance
+
+
+class PatchResourceTest(TestCase):
+    def testPatchResourceShouldOnlySerializePatchedProperties(self):
+        # The color is never read.
+        resource = Fruit('Apple', 'fruit', None)
+        del resource.color
+        patch = JsonPatch([
+            {'op': 'test', 'path': '/kind', 'value': 'fruit'},
+            {'op': 'replace', 'path': '/name', 'value': 'Pear'},
+        ])
+        resource, names = patch_resource(patch, resource,
+                                         UpdateableFruitType(),
+                                         SerializerCompiler())
+        self.assertEqual(names, {'name'})
+        self.assertEqual(resource.name, 'Pear')
+        self.assertEqual(resource.kind, 'fruit')
+
+    def testPatchResourceShouldPatchDocuments(self):
+        resource = Fruit('Apple', 'fruit', 'FF0000')
+        patch = JsonPatch([
+            {'op': 'replace', 'path': '', 'value': {
+                'name': 'Banana',
+                'kind': 'fruit',
+                'color': '#FFFF00',
+            }},
+        ])
+        resource, names = patch_resource(patch, resource,
+                                         UpdateableFruitType(),
+                                         SerializerCompiler())
+        self.assertEqual(names, {'name', 'color'})
+        self.assertEqual(resource.name, 'Banana')
@@ -0,0 +1,29 @@
+import os
+from unittest.mock import patch
+
+from alfred_rest.tests import RestTestCase
+
+
+class AlfredJsonSchemaTest(RestTestCase):
+    def testGetShouldNotDeduplicateSubschemasByDefault(self):
+        deduplicator = self._app.service('json', 'subschema_deduplicator')
+        with patch.object(deduplicator, 'rewrite') as rewrite:
+            self._app.service('json', 'schemas').get_schemas()
+        rewrite.assert_not_called()
+
+
+class DeduplicatedAlfredJsonSchemaTest(RestTestCase):
+    def setUp(self):
+        environment = patch.dict(os.environ, {
+            'ALFRED_DEDUPLICATE_SCHEMAS': '1',
+        })
+        environment.start()
+        self.addCleanup(environment.stop)
+        super().setUp()
+
+    def testGetShouldDeduplicateSubschemas(self):
+        deduplicator = self._app.service('json', 'subschema_deduplicator')
+        with patch.object(deduplicator, 'rewrite',
+                          side_effect=deduplicator.rewrite) as rewrite:
+            self._app.service('json', 'schemas').get_schemas()
+        rewrite.assert_called_once()
@@ -0,0 +1,53 @@
+from unittest import TestCase
+
+from alfred_http.endpoints import BadRequestError
+from alfred_rest.resource import Page, paginate
+from alfred_rest.sort import sort_key, parse_sort, Sort
+from alfred_rest.tests.test_filter import Fruit, FruitType
+
+
+class SortKeyTest(TestCase):
+    def testSortKey(self):
+        values = [{'b': 1}, 'apple', 2.5, 1, True, False, None, [1]]
+        self.assertEqual(sorted(values, key=sort_key),
+                         [None, False, True, 1, 2.5, 'apple', [1], {'b': 1}])
+
+
+class ParseSortTest(TestCase):
+    def testParseSort(self):
+        sort = parse_sort('-weight')
+        self.assertEqual(sort.property_name, 'weight')
+        self.assertTrue(sort.descending)
+        self.assertEqual(str(sort), '-weight')
+        self.assertFalse(parse_sort('weight').descending)
+
+    def testParseSortShouldBadRequestForInvalidSorts(self):
+        for argument in ('', '-', 'weight,name'):
+            with self.subTest(argument=argument):
+                with self.assertRaises(BadRequestError):
+                    parse_sort(argument)
+
+
+class PaginateTest(TestCase):
+    FRUITS = [
+        Fruit('apple', True, 150),
+        Fruit('banana', False, 120),
+        Fruit('cherry', True, 5),
+        Fruit('durian', True, 120),
+    ]
+
+    def testPaginateWithSort(self):
+        page = Page(2, sort=Sort('weight'))
+        fruits = paginate(self.FRUITS, page, FruitType())
+        self.assertEqual([fruit.name for fruit in fruits],
+                         ['cherry', 'banana'])
+        page = Page(2, 'banana', Sort('weight'), 120)
+        fruits = paginate(self.FRUITS, page, FruitType())
+        self.assertEqual([fruit.name for fruit in fruits],
+                         ['durian', 'apple'])
+
+    def testPaginateWithDescendingSort(self):
+        page = Page(2, 'durian', Sort('weight', True), 120)
+        fruits = paginate(self.FRUITS, page, FruitType())
+        self.assertEqual([fruit.name for fruit in fruits],
+                         ['banana', 'cherry'])